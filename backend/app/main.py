@@ -1,18 +1,62 @@
-from fastapi import FastAPI
+import json
+import sys
+from .utils import metrics
+from .utils.scheduler import LANE_INTERACTIVE, interactive_deadline, lane, model_error, record_gauges
+from .utils.startup import FirstResponseMiddleware, LAZY_INIT, get_startup_profile, profile_import, warm_up
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware # <-- ADD THIS LINE
 from pydantic import BaseModel
-from typing import List
-from .services.titan_service import generate_clarity_alert
-# This import is corrected based on the new service name and aliasing instruction
-from .services.bedrock_service import get_authenticity_analysis as get_authenticity_score
+from typing import List, Optional
+
+# --- Engine loading ---
+# Engines are imported on first use so a request never pays for an engine it isn't using
+# (the authenticity engine pulls in numpy and the few-shot machinery). With AURA_LAZY_INIT=0
+# they are all imported here instead.
+def _clarity_engine():
+    return profile_import("app.services.titan_service")
+
+def _authenticity_engine():
+    return profile_import("app.services.bedrock_service")
+
+def _batch_engine():
+    return profile_import("app.services.batch_service")
+
+def _job_engine():
+    return profile_import("app.services.job_service")
+
+def _clarity_state_engine():
+    return profile_import("app.services.clarity_state_service")
+
+if not LAZY_INIT:
+    _clarity_engine()
+    _authenticity_engine()
+    _batch_engine()
+    _job_engine()
+    _clarity_state_engine()
 
 class ClarityRequest(BaseModel):
     reviews: List[str]
+    # With a product_id, `reviews` are only the new reviews and the product's running summary is updated.
+    product_id: Optional[str] = None
+    review_ids: Optional[List[str]] = None
 
 class AuthenticityRequest(BaseModel):
     review_text: str
+    review_id: Optional[str] = None
 
-app = FastAPI()
+class BatchAuthenticityRequest(BaseModel):
+    reviews: List[str]
+    review_ids: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
+
+class ScanJobRequest(BaseModel):
+    reviews: List[str]
+    review_ids: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
+
+# The app-wide dependency marks where routing and body parsing end, for the asgi_overhead metric.
+app = FastAPI(dependencies=[Depends(metrics.mark_handler_started)])
 
 # --- START ADDITIONS: CORS Configuration ---
 origins = [
@@ -30,14 +74,115 @@ app.add_middleware(
 )
 # --- END ADDITIONS: CORS Configuration ---
 
+# Records time to first response for /api/v1/startup_profile.
+app.add_middleware(FirstResponseMiddleware)
+# Added last so it's the outermost layer and its timings include CORS handling.
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+def warm_engines():
+    # Under uvicorn, load the AURA_WARMUP engines before serving (Lambda does this in handler.py).
+    warm_up()
+
+@app.on_event("shutdown")
+def persist_dedup_index():
+    # Under uvicorn, flush the near-duplicate index on shutdown (Lambda saves on a timer instead).
+    if "app.services.dedup_service" in sys.modules:
+        sys.modules["app.services.dedup_service"].save_dedup_index()
+
+# The model-calling handlers are `async def`: Bedrock calls run on the shared client's pool,
+# so a slow Claude completion never ties up one of uvicorn's worker threads.
+# Each interactive request gets one scheduler deadline, shared by every model call it makes.
 @app.post("/api/v1/generate_clarity_alert")
-def handle_clarity_alert(request: ClarityRequest):
-    alert = generate_clarity_alert(request.reviews)
+async def handle_clarity_alert(request: ClarityRequest):
+    with lane(LANE_INTERACTIVE, interactive_deadline()):
+        if request.product_id:
+            return await _clarity_state_engine().aupdate_product_clarity(request.product_id, request.reviews,
+                                                                         review_ids=request.review_ids)
+        try:
+            alert = await _clarity_engine().agenerate_clarity_alert(request.reviews)
+        except Exception as e:
+            # Titan failures (throttling included) come back as an error dict like the other engines'.
+            print(f"ERROR: Clarity alert generation failed: {e}")
+            return dict(model_error(e), clarity_alert=None)
     return {"clarity_alert": alert}
 
+@app.get("/api/v1/products/{product_id}/clarity")
+def handle_product_clarity(product_id: str):
+    # The stored summary for a product updated through generate_clarity_alert; no model call.
+    return _clarity_state_engine().get_product_clarity(product_id)
+
 @app.post("/api/v1/analyze_review_authenticity")
-def handle_review_authenticity(request: AuthenticityRequest):
+async def handle_review_authenticity(request: AuthenticityRequest):
     # The call now directly uses the Bedrock service function.
     # No SageMaker endpoint name or environment variable check is needed here.
-    analysis = get_authenticity_score(review_text=request.review_text)
-    return analysis
\ No newline at end of file
+    with lane(LANE_INTERACTIVE, interactive_deadline()):
+        analysis = await _authenticity_engine().aget_authenticity_analysis(review_text=request.review_text,
+                                                                           review_id=request.review_id)
+    return analysis
+
+@app.post("/api/v1/analyze_review_authenticity/stream")
+async def handle_review_authenticity_stream(request: AuthenticityRequest):
+    # Server-Sent Events: "reasoning" deltas while Claude thinks, then "result" as soon as the
+    # JSON verdict is complete, then "done".
+    # The lane is entered inside the generator, which runs after the handler returns;
+    # the deadline still counts from the request's arrival.
+    deadline = interactive_deadline()
+
+    async def events():
+        with lane(LANE_INTERACTIVE, deadline):
+            stream = _authenticity_engine().astream_authenticity_analysis(review_text=request.review_text,
+                                                                          review_id=request.review_id)
+            async for event, data in stream:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/v1/analyze_reviews_authenticity")
+async def handle_reviews_authenticity(request: BatchAuthenticityRequest):
+    # Reviews are fanned out concurrently; results come back in input order,
+    # with per-item 'error' keys so one bad review doesn't fail the batch.
+    results = await _batch_engine().aanalyze_reviews_batch(request.reviews, max_concurrency=request.max_concurrency,
+                                                           review_ids=request.review_ids)
+    if isinstance(results, dict):
+        # The whole batch was rejected (e.g. too many reviews, or mismatched review_ids).
+        return results
+    return {"results": results}
+
+# Bulk catalog scans: submit returns a job id right away; background workers analyze the
+# reviews and checkpoint results, which clients poll and page through.
+@app.post("/api/v1/jobs", status_code=202)
+def handle_submit_scan_job(request: ScanJobRequest):
+    return _job_engine().submit_job(request.reviews, review_ids=request.review_ids,
+                                    max_concurrency=request.max_concurrency)
+
+@app.get("/api/v1/jobs/{job_id}")
+def handle_scan_job_status(job_id: str):
+    return _job_engine().get_job(job_id)
+
+@app.get("/api/v1/jobs/{job_id}/results")
+def handle_scan_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    return _job_engine().get_job_results(job_id, offset=offset, limit=limit)
+
+@app.delete("/api/v1/jobs/{job_id}")
+def handle_cancel_scan_job(job_id: str):
+    return _job_engine().cancel_job(job_id)
+
+@app.get("/api/v1/cache/stats")
+def handle_cache_stats():
+    # Hit/miss counters for the shared authenticity/clarity result cache.
+    return profile_import("app.utils.cache").get_result_cache().get_stats()
+
+@app.get("/api/v1/startup_profile")
+def handle_startup_profile():
+    # Per-module import times, warm-up times and time to first response for this process.
+    return get_startup_profile()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def handle_metrics():
+    # Prometheus scrape target for long-running (uvicorn) deployments; Lambda logs the same
+    # measurements per request as structured metric lines instead.
+    record_gauges()
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+
+from app.services.bedrock_service import (
+    AUTHENTICITY_PACKING, aanalyze_reviews_packed, aget_authenticity_analysis, pack_reviews,
+)
+from app.utils.scheduler import LANE_BATCH, lane, model_error
+
+# Upper bound on simultaneous Bedrock calls made for a single batch request.
+DEFAULT_BATCH_CONCURRENCY = int(os.environ.get("AUTHENTICITY_BATCH_CONCURRENCY", "8"))
+# Ceiling on a client-requested max_concurrency, so one request can't take over the Bedrock pool.
+MAX_BATCH_CONCURRENCY = int(os.environ.get("AUTHENTICITY_BATCH_MAX_CONCURRENCY", "32"))
+# Larger scans belong in a bulk scan job (POST /api/v1/jobs).
+MAX_BATCH_REVIEWS = int(os.environ.get("AUTHENTICITY_BATCH_MAX_REVIEWS", "500"))
+# Wall-clock budget for a whole batch; items still running after it are reported as timed out.
+DEFAULT_BATCH_TIMEOUT_SECONDS = float(os.environ.get("AUTHENTICITY_BATCH_TIMEOUT_SECONDS", "50"))
+
+
+def _group_reviews(reviews: list) -> list:
+    # Packed groups share one Claude call; otherwise every review is its own unit of work.
+    if AUTHENTICITY_PACKING:
+        return pack_reviews(reviews)
+    return [[index] for index in range(len(reviews))]
+
+
+def _invalid_batch(reviews: list, review_ids: list):
+    if len(reviews) > MAX_BATCH_REVIEWS:
+        return {"error": f"A batch can contain at most {MAX_BATCH_REVIEWS} reviews; use a bulk scan job for more."}
+    if review_ids is not None and len(review_ids) != len(reviews):
+        return {"error": "review_ids must have one entry per review."}
+    return None
+
+
+def _clamp_concurrency(max_concurrency: int, groups: list) -> int:
+    return max(1, min(max_concurrency or DEFAULT_BATCH_CONCURRENCY, MAX_BATCH_CONCURRENCY, len(groups)))
+
+
+async def aanalyze_reviews_batch(reviews: list, max_concurrency: int = None, timeout_seconds: float = None,
+                                 review_ids: list = None) -> list:
+    """
+    Analyzes many reviews concurrently, with at most `max_concurrency` Bedrock calls in flight.
+    With AUTHENTICITY_PACKING on, reviews are scored in token-budgeted groups of one Claude call each.
+
+    Args:
+        reviews (list): The review texts to analyze.
+        max_concurrency (int): Maximum number of concurrent analyses. Defaults to
+            AUTHENTICITY_BATCH_CONCURRENCY and is capped at AUTHENTICITY_BATCH_MAX_CONCURRENCY.
+        timeout_seconds (float): Overall time budget for the batch. Defaults to
+            AUTHENTICITY_BATCH_TIMEOUT_SECONDS.
+        review_ids (list): Optional stable ids, one per review (see get_authenticity_analysis).
+
+    Returns:
+        list: One analysis dict per review, in input order. Each dict carries its 'index';
+              failed or timed-out items carry an 'error' key instead of a score. A batch of more
+              than AUTHENTICITY_BATCH_MAX_REVIEWS reviews, or with mismatched review_ids, gets a
+              single 'error' dict instead.
+    """
+    if not reviews:
+        return []
+    invalid = _invalid_batch(reviews, review_ids)
+    if invalid:
+        return invalid
+    review_ids = review_ids or [None] * len(reviews)
+
+    groups = _group_reviews(reviews)
+    semaphore = asyncio.Semaphore(_clamp_concurrency(max_concurrency, groups))
+    timeout_seconds = timeout_seconds or DEFAULT_BATCH_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout_seconds
+
+    async def analyze(review_texts, group_ids):
+        async with semaphore:
+            with lane(LANE_BATCH, deadline):
+                if len(review_texts) == 1:
+                    return [await aget_authenticity_analysis(review_texts[0], review_id=group_ids[0])]
+                return await aanalyze_reviews_packed(review_texts, group_ids)
+
+    tasks = [asyncio.ensure_future(analyze([reviews[index] for index in group], [review_ids[index] for index in group]))
+             for group in groups]
+    await asyncio.wait(tasks, timeout=timeout_seconds)
+
+    results = [None] * len(reviews)
+    for group, task in zip(groups, tasks):
+        if not task.done():
+            task.cancel()
+            analyses = [{"error": f"Analysis did not complete within {timeout_seconds} seconds."}] * len(group)
+        elif task.exception() is not None:
+            print(f"ERROR: Unexpected failure while analyzing batch item: {task.exception()}")
+            analyses = [model_error(task.exception())] * len(group)
+        else:
+            analyses = task.result()
+        for index, analysis in zip(group, analyses):
+            results[index] = dict(analysis, index=index)
+    return results
@@ -0,0 +1,218 @@
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.utils import metrics
+from app.utils.scheduler import BEDROCK_SCHEDULER_ENABLED, get_limiter, is_throttle
+from app.utils.startup import LAZY_INIT, profile_import
+
+# --- Shared Bedrock runtime settings (used by both the Titan and Claude engines) ---
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION", os.environ.get("AWS_REGION", "us-east-1"))
+# HTTP connection pool size; also the number of threads serving async invocations.
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+BEDROCK_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("BEDROCK_CONNECT_TIMEOUT_SECONDS", "5"))
+# Claude can take tens of seconds for a long completion, so keep this above the slowest call.
+BEDROCK_READ_TIMEOUT_SECONDS = float(os.environ.get("BEDROCK_READ_TIMEOUT_SECONDS", "60"))
+# Total attempts per call, including the first one.
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "4"))
+# "adaptive" adds botocore's own client-side rate limiting on top of "standard" retries. The scheduler
+# already rate limits every call, so a second token bucket under it only adds delay; "standard" is
+# the default unless the scheduler is off.
+BEDROCK_RETRY_MODE = os.environ.get("BEDROCK_RETRY_MODE", "standard" if BEDROCK_SCHEDULER_ENABLED else "adaptive")
+
+_bedrock_runtime = None
+_bedrock_runtime_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_bedrock_runtime():
+    """The process-wide bedrock-runtime client, created on first use."""
+    global _bedrock_runtime
+    if _bedrock_runtime is None:
+        with _bedrock_runtime_lock:
+            if _bedrock_runtime is None:
+                boto3 = profile_import("boto3")
+                botocore_config = profile_import("botocore.config")
+                config = botocore_config.Config(
+                    region_name=BEDROCK_REGION,
+                    max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                    connect_timeout=BEDROCK_CONNECT_TIMEOUT_SECONDS,
+                    read_timeout=BEDROCK_READ_TIMEOUT_SECONDS,
+                    retries={"total_max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": BEDROCK_RETRY_MODE},
+                    tcp_keepalive=True,
+                )
+                _bedrock_runtime = boto3.client(service_name="bedrock-runtime", config=config)
+    return _bedrock_runtime
+
+
+def set_bedrock_runtime(client):
+    """Replaces the shared client, e.g. with a local stand-in for benchmarks. None resets it."""
+    global _bedrock_runtime
+    with _bedrock_runtime_lock:
+        _bedrock_runtime = client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # One thread per pooled connection: boto3 is blocking, so this bounds how many
+                # async invocations can be on the wire at once without starving the event loop.
+                _executor = ThreadPoolExecutor(max_workers=BEDROCK_MAX_POOL_CONNECTIONS,
+                                               thread_name_prefix="bedrock-invoke")
+    return _executor
+
+
+def invoke_model(model_id: str, body: dict) -> dict:
+    """
+    Invokes a Bedrock model synchronously, once the model's scheduler lets the call start.
+
+    Args:
+        model_id (str): Bedrock model id, e.g. 'anthropic.claude-v2:1'.
+        body (dict): The model-specific request body.
+
+    Returns:
+        dict: The parsed JSON response body.
+
+    Raises:
+        SchedulerDeadlineExceeded: If the call couldn't start within the caller's deadline.
+    """
+    if BEDROCK_SCHEDULER_ENABLED:
+        get_limiter(model_id).acquire()
+    return _invoke(model_id, body)
+
+
+def _report_outcome(model_id: str, response_metadata: dict = None, error: Exception = None):
+    # Throttling feedback for the model's AIMD rate limiter.
+    if not BEDROCK_SCHEDULER_ENABLED:
+        return
+    if error is not None:
+        if is_throttle(error):
+            get_limiter(model_id).on_throttle()
+    else:
+        get_limiter(model_id).on_success(retried=(response_metadata or {}).get("RetryAttempts", 0) > 0)
+
+
+def _invoke(model_id: str, body: dict) -> dict:
+    try:
+        with metrics.span(model_id, "invoke_model"):
+            response = get_bedrock_runtime().invoke_model(
+                body=json.dumps(body), modelId=model_id,
+                accept="application/json", contentType="application/json"
+            )
+    except Exception as e:
+        metrics.record_bedrock_error(model_id, e)
+        _report_outcome(model_id, error=e)
+        raise
+    with metrics.span(model_id, "body_read"):
+        response_body = json.loads(response.get("body").read())
+    metrics.record_bedrock_call(model_id, response.get("ResponseMetadata"))
+    _report_outcome(model_id, response.get("ResponseMetadata"))
+    return response_body
+
+
+def invoke_model_stream(model_id: str, body: dict):
+    """
+    Invokes a Bedrock model with invoke_model_with_response_stream, once the model's scheduler
+    lets the call start.
+
+    Yields:
+        dict: Each decoded chunk of the response stream, in order. Closing the generator early
+              closes the underlying HTTP stream.
+    """
+    if BEDROCK_SCHEDULER_ENABLED:
+        get_limiter(model_id).acquire()
+    yield from _invoke_stream(model_id, body)
+
+
+def _invoke_stream(model_id: str, body: dict):
+    try:
+        with metrics.span(model_id, "invoke_model"):
+            response = get_bedrock_runtime().invoke_model_with_response_stream(
+                body=json.dumps(body), modelId=model_id,
+                accept="application/json", contentType="application/json"
+            )
+    except Exception as e:
+        metrics.record_bedrock_error(model_id, e)
+        _report_outcome(model_id, error=e)
+        raise
+    stream = response.get("body")
+    invocation_metrics = {}
+    # Only time spent waiting on the stream counts, not the consumer's work between chunks.
+    read_seconds = 0.0
+    failed = False
+    try:
+        events = iter(stream)
+        while True:
+            started = time.perf_counter()
+            event = next(events, None)
+            read_seconds += time.perf_counter() - started
+            if event is None:
+                break
+            chunk = event.get("chunk")
+            if chunk:
+                decoded = json.loads(chunk.get("bytes").decode("utf-8"))
+                invocation_metrics = decoded.get("amazon-bedrock-invocationMetrics") or invocation_metrics
+                yield decoded
+    except Exception as e:
+        failed = True
+        metrics.record_bedrock_error(model_id, e)
+        _report_outcome(model_id, error=e)
+        raise
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        metrics.observe(model_id, "stream_read", read_seconds)
+        if not failed:
+            # Token counts arrive with the last chunk, so a stream closed early reports none.
+            metrics.record_bedrock_call(model_id, response.get("ResponseMetadata"),
+                                        invocation_metrics.get("inputTokenCount"),
+                                        invocation_metrics.get("outputTokenCount"))
+            _report_outcome(model_id, response.get("ResponseMetadata"))
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs blocking work (boto3 calls, embeddings) on the shared invocation pool."""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context into the pool thread so per-request metrics keep accumulating.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), partial(context.run, func, *args, **kwargs))
+
+
+async def ainvoke_model(model_id: str, body: dict) -> dict:
+    """
+    Async counterpart of invoke_model for `async def` handlers. The blocking boto3 call runs on
+    a thread pool sized to the connection pool, so the event loop stays free. Queueing for the
+    scheduler happens on the event loop, so waiting calls never hold a pool thread.
+    """
+    if BEDROCK_SCHEDULER_ENABLED:
+        await get_limiter(model_id).aacquire()
+    return await run_blocking(_invoke, model_id, body)
+
+
+async def ainvoke_model_stream(model_id: str, body: dict):
+    """Async counterpart of invoke_model_stream; each blocking read happens on the invocation pool."""
+    if BEDROCK_SCHEDULER_ENABLED:
+        await get_limiter(model_id).aacquire()
+    stream = _invoke_stream(model_id, body)
+    done = object()
+    try:
+        while True:
+            chunk = await run_blocking(next, stream, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        await run_blocking(stream.close)
+
+
+if not LAZY_INIT:
+    get_bedrock_runtime()
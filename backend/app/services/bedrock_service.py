@@ -1,181 +1,575 @@
-import boto3
-import json
+import asyncio
+import contextvars
 import os
-import re
-
-# Initialize Bedrock client
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name=os.environ.get("AWS_REGION", "us-east-1") # Ensure region is correctly configured
+from concurrent.futures import ThreadPoolExecutor
+from app.services.bedrock_client import ainvoke_model, ainvoke_model_stream, invoke_model, invoke_model_stream, run_blocking
+from app.services.dedup_service import DEDUP_ENABLED, find_near_duplicate, record_review
+from app.services.fewshot_service import (
+    FEWSHOT_BANK_VERSION, FEWSHOT_ENABLED, FEWSHOT_K, select_examples, select_pack_examples,
 )
-
-def get_authenticity_analysis(review_text: str):
+from app.services.heuristic_service import HEURISTIC_PREFILTER_ENABLED, prefilter_review
+from app.services.titan_service import aanalyze_review_authenticity, analyze_review_authenticity, estimate_tokens
+from app.utils import metrics
+from app.utils.cache import CACHE_ENABLED, get_result_cache, make_cache_key, normalize_text, prompt_version
+from app.utils.json_stream import IncrementalJSONExtractor, extract_json_object, extract_json_objects
+from app.utils.scheduler import model_error
+from app.utils.prompts import (
+    AUTHENTICITY_PROMPT_TEMPLATE, CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE, CLAUDE_JSON_REPAIR_PROMPT_TEMPLATE, CLAUDE_PACKED_AUTHENTICITY_PROMPT_TEMPLATE,
+)
+from app.utils.singleflight import SingleFlight
+
+# Explicitly set to Claude v2.1 Model ID
+CLAUDE_MODEL_ID = 'anthropic.claude-v2:1'
+# Read Claude's output as a stream and stop as soon as a valid verdict object has closed.
+AUTHENTICITY_EARLY_STOP = os.environ.get("AUTHENTICITY_EARLY_STOP", "1") != "0"
+# Short format-only retries when an analysis ends without a valid JSON verdict.
+AUTHENTICITY_REPAIR_ATTEMPTS = int(os.environ.get("AUTHENTICITY_REPAIR_ATTEMPTS", "1"))
+# Tail of the failed output passed to the repair prompt; the conclusion is at the end.
+AUTHENTICITY_REPAIR_MAX_CHARS = 3000
+
+
+# --- Packed scoring settings (bulk paths) ---
+# Score several reviews per Claude call, so the fixed instructions and examples are sent once per pack.
+AUTHENTICITY_PACKING = os.environ.get("AUTHENTICITY_PACKING", "1") != "0"
+# Review text per packed call, in estimated tokens; the instructions and examples come on top of it.
+AUTHENTICITY_PACK_TOKEN_BUDGET = int(os.environ.get("AUTHENTICITY_PACK_TOKEN_BUDGET", "2000"))
+# Reviews per packed call. Bounds the output, which needs about AUTHENTICITY_PACK_OUTPUT_TOKENS per review.
+AUTHENTICITY_PACK_MAX_REVIEWS = int(os.environ.get("AUTHENTICITY_PACK_MAX_REVIEWS", "16"))
+AUTHENTICITY_PACK_OUTPUT_TOKENS = 120
+
+# --- Cascaded routing settings ---
+# Score with Titan Express first and escalate to Claude only when its verdict is ambiguous or unusable.
+AUTHENTICITY_CASCADE_ENABLED = os.environ.get("AUTHENTICITY_CASCADE_ENABLED", "1") != "0"
+# Titan scores strictly between these bounds are ambiguous and go to Claude.
+AUTHENTICITY_CASCADE_LOW = float(os.environ.get("AUTHENTICITY_CASCADE_LOW", "0.3"))
+AUTHENTICITY_CASCADE_HIGH = float(os.environ.get("AUTHENTICITY_CASCADE_HIGH", "0.8"))
+
+# Verdicts may come from the Titan tier, so its prompt and band are part of the version too.
+_CASCADE_VERSION = (AUTHENTICITY_PROMPT_TEMPLATE, f"cascade={AUTHENTICITY_CASCADE_LOW}:{AUTHENTICITY_CASCADE_HIGH}") \
+    if AUTHENTICITY_CASCADE_ENABLED else ()
+# Changes whenever the prompt template changes, so stale verdicts are never served.
+AUTHENTICITY_PROMPT_VERSION = prompt_version(CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE, FEWSHOT_BANK_VERSION,
+                                             f"fewshot={FEWSHOT_ENABLED}:{FEWSHOT_K}", *_CASCADE_VERSION)
+# Packed verdicts come from a different prompt, so they are cached under their own version.
+AUTHENTICITY_PACKED_PROMPT_VERSION = prompt_version(CLAUDE_PACKED_AUTHENTICITY_PROMPT_TEMPLATE, FEWSHOT_BANK_VERSION,
+                                                    f"fewshot={FEWSHOT_ENABLED}:{FEWSHOT_K}")
+
+# Keyed by the cache key, i.e. by model, prompt version and normalized review text. A retryable
+# error (throttling, or the leader's own deadline) isn't shared; each follower tries for itself.
+_authenticity_flight = SingleFlight("authenticity", shareable=lambda result: not result.get("retryable"))
+
+def get_authenticity_analysis(review_text: str, review_id: str = None):
     """
     Analyzes the authenticity of a review using an Amazon Bedrock LLM (Claude v2.1).
+    Blatant fakes are answered by the local heuristic pre-filter, and near-duplicates of an
+    already scored review reuse its verdict, without calling Bedrock.
 
     Args:
         review_text (str): The text of the review to analyze.
+        review_id (str): Optional stable id of the review, so re-scoring the same review
+                         isn't counted as recycled content.
 
     Returns:
         dict: A dictionary containing the authenticity analysis,
               including 'authenticity_score' (float) and 'reasoning' (string),
-              or an 'error' message if processing fails.
+              or an 'error' message if processing fails. 'source' tells whether the
+              verdict came from the "heuristic" pre-filter, a "near_duplicate" or the "llm",
+              and 'duplicate_cluster' describes the review's near-duplicate cluster.
+              LLM verdicts carry the 'tier' ("titan" or "claude") that produced them.
     """
-    # --- START MODIFICATION ---
-    # Explicitly set to Claude v2.1 Model ID
-    model_id = 'anthropic.claude-v2:1' # Changed model ID to anthropic.claude-v2:1
-    # --- END MODIFICATION ---
-
-    # The prompt's core instruction emphasizes understanding nuances and specific patterns.
-    # Claude models prefer the Human/Assistant dialogue format.
-
-    # Base content of the prompt (without Human/Assistant wrappers yet)
-    base_prompt_content = f"""
-You are an expert review authenticity analyzer, highly skilled in detecting subtle nuances in language. Your primary objective is to accurately determine the authenticity of product reviews by applying criteria consistent with distinguishing genuine user experiences from deceptive content. You will leverage a deep understanding of human review patterns and common manipulation tactics.
-
-**Characteristics of Authentic Reviews:**
-* **Specificity & Detail:** Contains concrete examples, features, usage scenarios, or specific problems.
-* **Personal Experience:** Uses phrases like "I noticed," "I used it for," "my experience," reflecting real interaction.
-* **Balanced Perspective (Contradictory Sentiment):** Often includes a mix of pros and cons, or expresses mixed feelings about different aspects within the same review.
-* **Natural Language & Imperfections (Low-Effort Authenticity / Grammar Quirks):** May include minor typos, grammatical quirks, or a conversational tone, or be very short if reflecting genuine "good enough" sentiment tied to value/price.
-* **Specific Emotional Expression:** Anger, joy, or frustration tied to a particular feature or event.
-* **Irrelevant but Real Details:** May discuss logistical elements like shipping, packaging, or delivery, even if unrelated to core product function, because these are real customer experiences.
-* **Sarcasm:** Employs positive words or exaggerated praise to convey an underlying negative sentiment or criticism, requiring contextual understanding.
-
-**Characteristics of Fake Reviews (including Sophisticated Fakes):**
-* **Generality & Vagueness (Empty Raves/Inane Negativity):** Lacks specific details, uses generic praise ("good product," "works great") or vague, unsubstantiated criticism.
-* **Overly Hyperbolic or Emotional Language:** Excessive exclamation points, extreme adjectives without concrete support.
-* **Repetition & Content Recycling:** Phrases or ideas repeated excessively; content might be recycled from other reviews.
-* **Promotional Language (Astroturfing):** Sounds like marketing copy, uses excessive jargon, or promotes external links/other products.
-* **"A+ in Composition":** Consistently perfect grammar and syntax, sometimes unnatural for a casual review, especially when paired with generic content (AI tell).
-* **Lack of Realistic Incidents:** Struggles to invent specific, vivid anecdotes that make a review feel truly authentic.
-* **Reviewer Profile Anomalies:** (While you can't check profiles, this informs the textual patterns to look for.)
-
-**Your Analysis Process for the given Review:**
-1.  **Thorough Reading:** Carefully read and understand the review.
-2.  **Pattern Recognition:** Identify specific words, phrases, and structural patterns that align with either authentic or fake characteristics.
-3.  **Contextual Interpretation:** For ambiguous cases (like sarcasm or irrelevant details), interpret the true intent based on the full context.
-4.  **Reasoning Formulation:** Detail your step-by-step thought process, explaining *why* you classify it as authentic or fake, citing specific textual evidence from the review.
-5.  **Score Assignment:** Assign an "authenticity_score" (float from 0.0 to 1.0) based on your analysis:
-    * **0.0-0.2:** Highly likely fake (e.g., clear spam, blatant promotion, extremely generic positive/negative, AI tells).
-    * **0.2-0.5:** Likely fake or very low-effort, suspicious authentic (e.g., overly vague, some AI tells, unsubstantiated claims).
-    * **0.5-0.7:** Ambiguous / Neutral / Low-effort authentic (e.g., "It's fine," short but not suspicious, or reviews primarily about logistics with vague product comment).
-    * **0.7-0.9:** Likely authentic (e.g., some specific details, natural tone, minor flaws, or genuine mixed sentiment).
-    * **0.9-1.0:** Highly likely authentic (e.g., highly detailed, balanced, clear personal experience, nuanced human expression like sarcasm).
-6.  **Strict JSON Output:** Provide your final findings as a JSON object.
-
-Here are diverse, challenging examples (balanced for authentic/fake and covering edge cases) for precise analysis:
-
-Review: "Good product. Happy with the purchase. Works as advertised. No issues."
-Reasoning: This review is characterized by extreme brevity and generic, non-descriptive praise ("Good product," "Happy with the purchase," "No issues"). It completely lacks any specific details about features, personal experience, or unique observations. This pattern is strongly indicative of a low-effort fake or incentivized review that doesn't reflect genuine interaction or deep engagement with the product, falling under "Generality and Vagueness."
-Analysis: {{ "authenticity_score": 0.15, "reasoning": "Generic praise, extremely short, and completely lacks specific details about product features or user experience, strongly indicative of inauthenticity." }}
-
-Review: "The 'Quantum Flow 3000' water filter drastically improved my tap water taste. I noticed a difference in my morning coffee. Installation took about 15 minutes, largely thanks to the clear diagram on page 7 of the manual. Filter replacement seems straightforward too. Highly recommend for city dwellers."
-Reasoning: This review demonstrates high authenticity through its remarkable specificity and detail. It names the product, identifies a specific benefit ("improved tap water taste," "difference in my morning coffee"), provides a precise installation time, references a specific page in the manual, and targets a specific user demographic. This depth of verifiable detail reflects genuine personal experience and interaction.
-Analysis: {{ "authenticity_score": 0.98, "reasoning": "Highly specific details about usage, installation, and noticeable improvements, referencing a specific manual page, indicating a highly genuine, experienced user." }}
-
-Review: "Oh wow, this 'super-duper' noise-cancelling headset is just *amazing*! I can still hear my dog barking two rooms over and the traffic outside. Truly, the silence is deafening. Five stars for the effort, I suppose."
-Reasoning: This is a classic example of sarcasm. Despite using seemingly positive words ("amazing," "super-duper," "Five stars"), the review's context reveals a clearly negative experience. The user explicitly states they can still hear noise and that "silence is deafening," which is ironic. This requires interpreting the implied meaning over literal word choice, indicating genuine but frustrated human expression.
-Analysis: {{ "authenticity_score": 0.88, "reasoning": "Authentic review using sarcasm; positive words convey a negative experience supported by specific observations of poor noise cancellation." }}
-
-Review: "This is the optimal solution for managing complex data ecosystems. Its advanced API integration facilitates seamless data ingestion, ensuring robust interoperability across diverse enterprise architectures. A truly scalable infrastructure enhancement for any tech-forward organization. Visit buyproductnow.xyz for more!"
-Reasoning: This review exhibits several hallmarks of a sophisticated fake. It uses excessive, formal technical jargon ("optimal solution," "complex data ecosystems," "robust interoperability," "diverse enterprise architectures") that sounds like marketing copy rather than a genuine user's organic feedback. The inclusion of an explicit external promotional URL ("buyproductnow.xyz") is a definitive red flag for spam. It's an "A+ in Composition" but lacks realistic human touch.
-Analysis: {{ "authenticity_score": 0.02, "reasoning": "Overuse of corporate jargon, highly promotional tone, and includes an external link, indicating a highly inauthentic or spam review designed to mimic authenticity." }}
-
-Review: "I bought this new coffee maker and it's okay. Nothing special, but it brews coffee. The packaging was a bit flimsy, but the delivery was super fast. My old one broke last month."
-Reasoning: This review combines several authentic characteristics. It starts with low-effort authenticity ("it's okay," "Nothing special") but then includes genuine irrelevant details about packaging and delivery speed, which are common real-world user observations. It also provides a brief personal context ("My old one broke last month"). While not highly detailed about the product itself, it exhibits patterns of genuine, albeit casual, human feedback.
-Analysis: {{ "authenticity_score": 0.65, "reasoning": "Authentic, low-effort review with irrelevant details about packaging/delivery and minimal product specifics, typical of casual user feedback." }}
-
-Review: "I love this phone's battery life; it lasts forever. But I have to charge it three times a day. The camera is great, but photos often come out blurry in good light. Overall, it's a confusing product."
-Reasoning: This review displays clear contradictory sentiment. It praises the battery life ("lasts forever") while immediately contradicting it ("charge it three times a day"). Similarly, it praises the camera ("great") then notes a significant flaw ("blurry in good light"). This mix of specific pros and cons within the same review is highly indicative of a genuine user's mixed experience.
-Analysis: {{ "authenticity_score": 0.90, "reasoning": "Authentic review exhibiting contradictory sentiment, providing specific pros and cons within the same feedback, reflecting a nuanced user experience." }}
-
-Review: "Amazing product. Everyone should buy this. The best purchase. I love it so much. A+++++"
-Reasoning: This review consists of repetitive, generic praise and excessive positive sentiment without any supporting details or specific experiences. Phrases like "Amazing product," "Everyone should buy this," "The best purchase," and "A+++++" are hallmarks of low-effort, mass-generated, or incentivized fake reviews. It lacks any personal touch or specific observations.
-Analysis: {{ "authenticity_score": 0.08, "reasoning": "Repetitive, generic, and hyperbolic praise lacking specific details, strongly indicative of a fake or incentivized review." }}
-
-Review: "The new software update is totally useless! My app crashes constantly now, especially when I try to save. This is unacceptable! Developers, fix this immediately!"
-Reasoning: This review, despite its strong negative emotion, is highly authentic. It clearly identifies a specific problem ("app crashes constantly"), provides a trigger ("especially when I try to save"), and makes a direct call to action to the developers. This level of specific, actionable feedback, even when frustrated, is a hallmark of a genuine user reporting an issue.
-Analysis: {{ "authenticity_score": 0.94, "reasoning": "Highly specific negative review detailing a particular software bug and its impact, indicating genuine user frustration and experience." }}
-
-Review: "It's fine. Whatever."
-Reasoning: This review is extremely short and dismissive, offering no specific information or descriptive content. While its brevity makes it low-effort, it doesn't contain the typical hyperbolic or promotional language of fakes. It leans towards authentic because very short, indifferent reviews can be genuine, but the lack of detail makes its authenticity somewhat ambiguous.
-Analysis: {{ "authenticity_score": 0.45, "reasoning": "Extremely short and vague, offers no descriptive content or specific sentiment, indicating low-effort authenticity with ambiguity." }}
-
-Review: "{review_text}"
-Please analyze the authenticity of the above review.
-Provide your reasoning step-by-step in your thought process before giving the final analysis.
-Your final output MUST be ONLY a single JSON object with two keys:
-- "authenticity_score": a float between 0.0 (completely fake) and 1.0 (completely authentic).
-- "reasoning": a string explaining your analysis.
-
-Output JSON:
-"""
-
-    # --- START MODIFICATION ---
-    # Claude-specific body parameters
-    body = json.dumps({
-        "prompt": f"\n\nHuman: {base_prompt_content}\n\nAssistant:", # Wrapped for Claude
-        "max_tokens_to_sample": 700, # Max tokens for Claude response
-        "temperature": 0.1,   # Keep low for consistency
-        "top_p": 0.9,
-        "stop_sequences": ["\n\nHuman:", "Output JSON:"], # Important stop sequences for Claude
-    })
-    # --- END MODIFICATION ---
+    verdict, signature, match = _lookup_local_verdict(review_text)
+    if verdict is None:
+        verdict = _get_cached_analysis(review_text)
+    return _finalize_verdict(review_text, verdict, signature, match, review_id)
+
+async def aget_authenticity_analysis(review_text: str, review_id: str = None):
+    """Async counterpart of get_authenticity_analysis for `async def` handlers."""
+    verdict, signature, match = _lookup_local_verdict(review_text)
+    if verdict is None:
+        verdict = await _aget_cached_analysis(review_text)
+    return _finalize_verdict(review_text, verdict, signature, match, review_id)
+
+async def astream_authenticity_analysis(review_text: str, review_id: str = None):
+    """
+    Streaming variant of aget_authenticity_analysis, built on Bedrock's response-stream API.
 
+    Yields:
+        tuple: (event, data) pairs. "reasoning" events carry {"text": ...} deltas of Claude's
+               reasoning as they are generated. A single "result" event carries the final analysis
+               as soon as its JSON object is complete; verdicts that need no model call (pre-filter,
+               near-duplicate, cache) produce only the "result" event.
+    """
+    verdict, signature, match = _lookup_local_verdict(review_text)
+    cache_key = _authenticity_cache_key(review_text)
+    if verdict is None and CACHE_ENABLED:
+        with metrics.span("authenticity", "cache_lookup"):
+            hit, cached_analysis = get_result_cache().get(cache_key)
+        if hit:
+            verdict = dict(cached_analysis)
+    if verdict is not None:
+        yield "result", _finalize_verdict(review_text, verdict, signature, match, review_id)
+        return
+
+    if AUTHENTICITY_CASCADE_ENABLED:
+        verdict = await _atitan_tier(review_text)
+        if verdict is not None:
+            yield "result", _store_streamed_analysis(review_text, verdict, cache_key, signature, match, review_id)
+            return
+
+    extractor = IncrementalJSONExtractor(_validate_analysis)
+    reasoning_sent = 0
     try:
-        response = bedrock_runtime.invoke_model(
-            body=body,
-            modelId=model_id,
-            accept='application/json',
-            contentType='application/json'
-        )
+        body = await run_blocking(_build_claude_body, review_text)
+        stream = ainvoke_model_stream(CLAUDE_MODEL_ID, body)
+        try:
+            async for chunk in stream:
+                analysis_result = extractor.feed(chunk.get("completion", ""))
+                reasoning = extractor.reasoning
+                if len(reasoning) > reasoning_sent:
+                    yield "reasoning", {"text": reasoning[reasoning_sent:]}
+                    reasoning_sent = len(reasoning)
+                if analysis_result is not None:
+                    break
+        finally:
+            # Closing the stream early stops generation once the verdict is complete.
+            await stream.aclose()
+        metrics.observe("authenticity", "json_extract", extractor.seconds)
+
+        analysis_result = extractor.result
+        if analysis_result is None:
+            analysis_result = await _arepair_analysis(extractor.text)
+    except Exception as e:
+        print(f"ERROR: An error occurred during Bedrock invocation: {e}")
+        analysis_result = model_error(e)
 
-        response_body = json.loads(response.get('body').read())
+    yield "result", _store_streamed_analysis(review_text, analysis_result, cache_key, signature, match, review_id)
 
-        # --- START MODIFICATION ---
-        # Claude-specific output extraction
-        generated_text = response_body.get('completion', '').strip() # Claude's response is in 'completion'
-        # --- END MODIFICATION ---
+def pack_reviews(reviews: list) -> list:
+    """
+    Groups reviews for analyze_reviews_packed: consecutive reviews whose combined text fits
+    AUTHENTICITY_PACK_TOKEN_BUDGET estimated tokens, with at most AUTHENTICITY_PACK_MAX_REVIEWS each.
+
+    Returns:
+        list: Groups of review indices, in input order. A review larger than the budget gets a
+              group of its own.
+    """
+    groups, current, current_tokens = [], [], 0
+    for index, review_text in enumerate(reviews):
+        tokens = estimate_tokens(review_text)
+        if current and (current_tokens + tokens > AUTHENTICITY_PACK_TOKEN_BUDGET or
+                        len(current) >= AUTHENTICITY_PACK_MAX_REVIEWS):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def analyze_reviews_packed(reviews: list, review_ids: list = None) -> list:
+    """
+    Bulk counterpart of get_authenticity_analysis. Reviews that get past the pre-filter,
+    near-duplicate and cache stages go through the Titan tier first, like single reviews do.
+    Only the ones it escalates are scored together in one Claude call that returns an indexed
+    JSON array, so the instructions and few-shot examples are paid for once per group rather
+    than once per review. Reviews missing from the array (partial or malformed output) are
+    retried individually with Claude.
 
-        # Robust JSON extraction logic remains the same
-        json_match = re.search(r'```json\s*(\{.*\})\s*```', generated_text, re.DOTALL)
+    Args:
+        reviews (list): The review texts, normally one group from pack_reviews().
+        review_ids (list): Optional stable ids, one per review.
 
-        if json_match:
-            json_string = json_match.group(1)
+    Returns:
+        list: One analysis dict per review, in input order, shaped like get_authenticity_analysis results.
+    """
+    lookups, verdicts, pending = _lookup_pack(reviews)
+    if AUTHENTICITY_CASCADE_ENABLED and pending:
+        texts = [reviews[indices[0]] for indices in pending.values()]
+        with ThreadPoolExecutor(max_workers=len(texts), thread_name_prefix="authenticity-titan") as executor:
+            # Each task runs in a copy of the request's context, so its lane and metrics carry over.
+            futures = [executor.submit(contextvars.copy_context().run, _titan_tier, text) for text in texts]
+            _keep_titan_verdicts(reviews, pending, [future.result() for future in futures], verdicts)
+    if len(pending) > 1:
+        _unpack(pending, _score_pack(reviews, pending), verdicts)
+    for indices in pending.values():
+        if indices[0] not in verdicts:
+            _assign(verdicts, indices, _get_cached_analysis(reviews[indices[0]], escalated=AUTHENTICITY_CASCADE_ENABLED))
+    return _finalize_pack(reviews, review_ids, lookups, verdicts)
+
+async def aanalyze_reviews_packed(reviews: list, review_ids: list = None) -> list:
+    """Async counterpart of analyze_reviews_packed."""
+    lookups, verdicts, pending = _lookup_pack(reviews)
+    if AUTHENTICITY_CASCADE_ENABLED and pending:
+        titan_verdicts = await asyncio.gather(*(_atitan_tier(reviews[indices[0]]) for indices in pending.values()))
+        _keep_titan_verdicts(reviews, pending, titan_verdicts, verdicts)
+    if len(pending) > 1:
+        _unpack(pending, await _ascore_pack(reviews, pending), verdicts)
+    retries = [indices for indices in pending.values() if indices[0] not in verdicts]
+    analyses = await asyncio.gather(*(_aget_cached_analysis(reviews[indices[0]], escalated=AUTHENTICITY_CASCADE_ENABLED)
+                                      for indices in retries))
+    for indices, analysis in zip(retries, analyses):
+        _assign(verdicts, indices, analysis)
+    return _finalize_pack(reviews, review_ids, lookups, verdicts)
+
+def _lookup_pack(reviews: list):
+    # Identical reviews in a group share one slot in the packed prompt.
+    lookups, verdicts, pending = [], {}, {}
+    for index, review_text in enumerate(reviews):
+        verdict, signature, match = _lookup_local_verdict(review_text)
+        lookups.append((signature, match))
+        if verdict is None and CACHE_ENABLED:
+            with metrics.span("authenticity", "cache_lookup"):
+                # A single-review verdict is preferred over a packed one.
+                for cache_key in (_authenticity_cache_key(review_text), _packed_cache_key(review_text)):
+                    hit, cached_analysis = get_result_cache().get(cache_key)
+                    if hit:
+                        verdict = dict(cached_analysis)
+                        break
+        if verdict is not None:
+            verdicts[index] = verdict
         else:
-            json_match = re.search(r'(\{.*?\})', generated_text, re.DOTALL)
-            if json_match:
-                json_string = json_match.group(0)
-            else:
-                raise ValueError(f"No valid JSON object found in model output. Raw output: {generated_text}")
+            pending.setdefault(_packed_cache_key(review_text), []).append(index)
+    return lookups, verdicts, pending
+
+def _keep_titan_verdicts(reviews: list, pending: dict, titan_verdicts: list, verdicts: dict):
+    """Takes the reviews Titan settled out of `pending`, leaving only the escalated ones to pack."""
+    for key, verdict in zip(list(pending), titan_verdicts):
+        if verdict is None:
+            continue
+        indices = pending.pop(key)
+        _assign(verdicts, indices, verdict)
+        # A Titan verdict doesn't depend on packing, so it's cached like a single-review one.
+        if CACHE_ENABLED:
+            get_result_cache().put(_authenticity_cache_key(reviews[indices[0]]), verdict)
+
+def _score_pack(reviews: list, pending: dict) -> str:
+    try:
+        body = _build_packed_body([reviews[indices[0]] for indices in pending.values()])
+        return invoke_model(CLAUDE_MODEL_ID, body).get("completion", "")
+    except Exception as e:
+        print(f"ERROR: Packed authenticity call failed; scoring its reviews individually: {e}")
+        return ""
 
+async def _ascore_pack(reviews: list, pending: dict) -> str:
+    try:
+        body = await run_blocking(_build_packed_body, [reviews[indices[0]] for indices in pending.values()])
+        return (await ainvoke_model(CLAUDE_MODEL_ID, body)).get("completion", "")
+    except Exception as e:
+        print(f"ERROR: Packed authenticity call failed; scoring its reviews individually: {e}")
+        return ""
+
+def _build_packed_body(review_texts: list) -> dict:
+    with metrics.span("authenticity", "prompt_build"):
+        numbered_reviews = "\n".join(f'{number}. Review: "{review_text}"'
+                                     for number, review_text in enumerate(review_texts, start=1))
+        prompt = CLAUDE_PACKED_AUTHENTICITY_PROMPT_TEMPLATE.format(
+            examples=select_pack_examples(review_texts), count=len(review_texts), numbered_reviews=numbered_reviews)
+    return {
+        # Prefilling the opening bracket keeps the reply to just the array.
+        "prompt": f"\n\nHuman: {prompt}\n\nAssistant: [",
+        "max_tokens_to_sample": AUTHENTICITY_PACK_OUTPUT_TOKENS * len(review_texts) + 50,
+        "temperature": 0.1,
+        "top_p": 0.9,
+        "stop_sequences": ["\n\nHuman:"],
+    }
+
+def _validate_packed_item(candidate):
+    if not isinstance(candidate, dict) or not str(candidate.get("index", "")).isdigit():
+        return None
+    number = int(candidate.pop("index"))
+    verdict = _validate_analysis(candidate)
+    return (number, verdict) if verdict is not None else None
+
+def _unpack(pending: dict, completion: str, verdicts: dict):
+    """Assigns each verdict in the packed output to its reviews and caches it; the rest stay pending."""
+    slots = list(pending.values())
+    keys = list(pending)
+    with metrics.span("authenticity", "json_extract"):
+        # Items are extracted one object at a time, so a truncated or malformed array still yields its valid items.
+        items = extract_json_objects("[" + completion, _validate_packed_item)
+    scored = 0
+    for number, verdict in items:
+        if not 1 <= number <= len(slots) or slots[number - 1][0] in verdicts:
+            continue
+        _assign(verdicts, slots[number - 1], verdict)
+        if CACHE_ENABLED:
+            get_result_cache().put(keys[number - 1], verdict)
+        scored += 1
+
+    metrics.inc("authenticity_packed_calls_total")
+    metrics.inc("authenticity_packed_reviews_total", scored)
+    if scored < len(slots):
+        print(f"WARNING: Packed authenticity output covered {scored} of {len(slots)} reviews; "
+              "retrying the rest individually.")
+        metrics.inc("authenticity_packed_retries_total", len(slots) - scored)
+
+def _assign(verdicts: dict, indices: list, verdict: dict):
+    for index in indices:
+        verdicts[index] = dict(verdict)
+
+def _finalize_pack(reviews: list, review_ids: list, lookups: list, verdicts: dict) -> list:
+    review_ids = review_ids or [None] * len(reviews)
+    return [_finalize_verdict(review_text, verdicts[index], *lookups[index], review_ids[index])
+            for index, review_text in enumerate(reviews)]
+
+def _packed_cache_key(review_text: str) -> str:
+    return make_cache_key("authenticity", CLAUDE_MODEL_ID, AUTHENTICITY_PACKED_PROMPT_VERSION, normalize_text(review_text))
+
+def _store_streamed_analysis(review_text, analysis_result, cache_key, signature, match, review_id):
+    if CACHE_ENABLED and "error" not in analysis_result:
+        get_result_cache().put(cache_key, analysis_result)
+    return _finalize_verdict(review_text, analysis_result, signature, match, review_id)
+
+def _lookup_local_verdict(review_text: str):
+    """Pipeline stages that never call Bedrock: the heuristic pre-filter and near-duplicate reuse."""
+    if HEURISTIC_PREFILTER_ENABLED:
+        with metrics.span("authenticity", "heuristic_prefilter"):
+            verdict = prefilter_review(review_text)
+        if verdict is not None:
+            return verdict, None, None
+
+    if DEDUP_ENABLED:
+        with metrics.span("authenticity", "dedup_lookup"):
+            signature, match = find_near_duplicate(review_text)
+        if match and match["verdict"]:
+            return dict(match["verdict"], source="near_duplicate"), signature, match
+        return None, signature, match
+    return None, None, None
+
+def _finalize_verdict(review_text: str, verdict: dict, signature, match, review_id: str):
+    if DEDUP_ENABLED and "error" not in verdict:
+        with metrics.span("authenticity", "dedup_record"):
+            verdict = record_review(review_text, verdict, signature, match, review_id)
+    return verdict
+
+def _authenticity_cache_key(review_text: str) -> str:
+    return make_cache_key("authenticity", CLAUDE_MODEL_ID, AUTHENTICITY_PROMPT_VERSION, normalize_text(review_text))
+
+def _get_cached_analysis(review_text: str, escalated: bool = False):
+    # Identical (normalized) reviews are scored once; errors are never cached.
+    # `escalated` skips the Titan tier for reviews it has already passed on to Claude.
+    cache_key = _authenticity_cache_key(review_text)
+    if CACHE_ENABLED:
+        with metrics.span("authenticity", "cache_lookup"):
+            hit, cached_analysis = get_result_cache().get(cache_key)
+        if hit:
+            return dict(cached_analysis)
+
+    # Concurrent requests for the same review share one in-flight Claude call.
+    return dict(_authenticity_flight.do(cache_key, _analyze_and_store, review_text, cache_key, escalated))
+
+async def _aget_cached_analysis(review_text: str, escalated: bool = False):
+    cache_key = _authenticity_cache_key(review_text)
+    if CACHE_ENABLED:
+        with metrics.span("authenticity", "cache_lookup"):
+            hit, cached_analysis = get_result_cache().get(cache_key)
+        if hit:
+            return dict(cached_analysis)
+
+    return dict(await _authenticity_flight.ado(cache_key, _aanalyze_and_store, review_text, cache_key, escalated))
+
+def _analyze_and_store(review_text: str, cache_key: str, escalated: bool = False):
+    # The cache is written before the in-flight call completes, so a request arriving just after
+    # it finishes finds the result instead of starting another call.
+    analysis_result = _route_analysis(review_text, escalated)
+    if CACHE_ENABLED and "error" not in analysis_result:
+        get_result_cache().put(cache_key, analysis_result)
+    return analysis_result
+
+async def _aanalyze_and_store(review_text: str, cache_key: str, escalated: bool = False):
+    analysis_result = await _aroute_analysis(review_text, escalated)
+    if CACHE_ENABLED and "error" not in analysis_result:
+        get_result_cache().put(cache_key, analysis_result)
+    return analysis_result
+
+def _route_analysis(review_text: str, escalated: bool = False):
+    """Cascade: a clear-cut Titan Express verdict is final; ambiguous or unusable ones go to Claude."""
+    if AUTHENTICITY_CASCADE_ENABLED and not escalated:
+        verdict = _titan_tier(review_text)
+        if verdict is not None:
+            return verdict
+    return _analyze_with_claude(review_text)
+
+async def _aroute_analysis(review_text: str, escalated: bool = False):
+    if AUTHENTICITY_CASCADE_ENABLED and not escalated:
+        verdict = await _atitan_tier(review_text)
+        if verdict is not None:
+            return verdict
+    return await _aanalyze_with_claude(review_text)
+
+def _titan_tier(review_text: str):
+    try:
+        titan_result = analyze_review_authenticity(review_text)
+    except Exception as e:
+        print(f"WARNING: Titan authenticity tier failed, escalating to Claude: {e}")
+        titan_result = None
+    return _accept_titan_verdict(titan_result)
+
+async def _atitan_tier(review_text: str):
+    try:
+        titan_result = await aanalyze_review_authenticity(review_text)
+    except Exception as e:
+        print(f"WARNING: Titan authenticity tier failed, escalating to Claude: {e}")
+        titan_result = None
+    return _accept_titan_verdict(titan_result)
+
+def _accept_titan_verdict(titan_result):
+    """Titan's verdict if it is outside the ambiguous band, otherwise None; records the routing decision."""
+    if titan_result is None:
+        reason = "titan_error"
+    elif not isinstance(titan_result, dict) or "error" in titan_result:
+        reason = "titan_unparsable"
+    else:
         try:
-            analysis_result = json.loads(json_string)
+            score = float(titan_result.get("authenticity_score"))
+        except (TypeError, ValueError):
+            score = None
+        if score is None or not 0.0 <= score <= 1.0:
+            reason = "titan_unparsable"
+        elif AUTHENTICITY_CASCADE_LOW < score < AUTHENTICITY_CASCADE_HIGH:
+            reason = "ambiguous"
+        else:
+            metrics.inc("authenticity_route_total", tier="titan", reason="confident")
+            return {"authenticity_score": score, "reasoning": _titan_reasoning(titan_result),
+                    "source": "llm", "tier": "titan"}
+    metrics.inc("authenticity_route_total", tier="claude", reason=reason)
+    return None
+
+def _titan_reasoning(titan_result: dict) -> str:
+    # Titan's prompt returns signal lists rather than prose; summarize them as the reasoning.
+    parts = []
+    for label, key in (("Positive signals", "key_positive_signals"), ("Concerns", "potential_concerns")):
+        signals = [str(signal) for signal in titan_result.get(key) or [] if signal]
+        if signals:
+            parts.append(f"{label}: {'; '.join(signals)}.")
+    return " ".join(parts) or "No specific authenticity signals were reported."
+
+def _analyze_with_claude(review_text: str):
+    """Uncached Claude v2.1 call behind get_authenticity_analysis."""
+    try:
+        extractor = IncrementalJSONExtractor(_validate_analysis)
+        body = _build_claude_body(review_text)
+        if AUTHENTICITY_EARLY_STOP:
+            stream = invoke_model_stream(CLAUDE_MODEL_ID, body)
+            try:
+                for chunk in stream:
+                    if extractor.feed(chunk.get("completion", "")) is not None:
+                        break
+            finally:
+                # Closing the stream early stops generation once the verdict is complete.
+                stream.close()
+        else:
+            extractor.feed(invoke_model(CLAUDE_MODEL_ID, body).get("completion", ""))
+        metrics.observe("authenticity", "json_extract", extractor.seconds)
 
-            if not isinstance(analysis_result, dict) or \
-               "authenticity_score" not in analysis_result or \
-               "reasoning" not in analysis_result:
-                raise ValueError("Bedrock response is not a valid analysis format.")
+        if extractor.result is not None:
+            return extractor.result
+        return _repair_analysis(extractor.text)
+    except Exception as e:
+        print(f"ERROR: An error occurred during Bedrock invocation: {e}")
+        return model_error(e)
 
-            score = float(analysis_result["authenticity_score"])
-            if not (0.0 <= score <= 1.0):
-                print(f"WARNING: Authenticity score {score} out of expected range [0.0, 1.0]. Clamping.")
-                score = max(0.0, min(1.0, score))
+async def _aanalyze_with_claude(review_text: str):
+    """Async counterpart of _analyze_with_claude."""
+    try:
+        extractor = IncrementalJSONExtractor(_validate_analysis)
+        # Prompt building may embed the review for few-shot selection, so keep it off the event loop.
+        body = await run_blocking(_build_claude_body, review_text)
+        if AUTHENTICITY_EARLY_STOP:
+            stream = ainvoke_model_stream(CLAUDE_MODEL_ID, body)
+            try:
+                async for chunk in stream:
+                    if extractor.feed(chunk.get("completion", "")) is not None:
+                        break
+            finally:
+                await stream.aclose()
+        else:
+            extractor.feed((await ainvoke_model(CLAUDE_MODEL_ID, body)).get("completion", ""))
+        metrics.observe("authenticity", "json_extract", extractor.seconds)
 
-            analysis_result["authenticity_score"] = score
+        if extractor.result is not None:
+            return extractor.result
+        return await _arepair_analysis(extractor.text)
+    except Exception as e:
+        print(f"ERROR: An error occurred during Bedrock invocation: {e}")
+        return model_error(e)
 
-            return analysis_result
+def _build_claude_body(review_text: str) -> dict:
+    # The prompt's core instruction emphasizes understanding nuances and specific patterns.
+    # Claude models prefer the Human/Assistant dialogue format.
 
-        except json.JSONDecodeError as e:
-            print(f"ERROR: Failed to parse extracted JSON string: {e}")
-            print(f"DEBUG: Problematic JSON string for parsing: '{json_string}'")
-            return {"error": "Model returned malformed JSON.", "raw_output": generated_text, "parsing_error": str(e)}
-        except ValueError as e:
-            print(f"ERROR: Model output format validation failed: {e}")
-            print(f"DEBUG: Raw output that failed validation: '{generated_text}'")
-            return {"error": str(e), "raw_output": generated_text}
+    # Base content of the prompt (without Human/Assistant wrappers yet).
+    # Only the few-shot examples nearest to this review are included, not the whole bank.
+    with metrics.span("authenticity", "prompt_build"):
+        base_prompt_content = CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE.format(
+            examples=select_examples(review_text), review_text=review_text)
 
-    except Exception as e:
-        print(f"ERROR: An error occurred during Bedrock invocation: {e}")
-        return {"error": f"Internal server error during analysis: {str(e)}"}
\ No newline at end of file
+    # Claude-specific body parameters
+    return {
+        "prompt": f"\n\nHuman: {base_prompt_content}\n\nAssistant:", # Wrapped for Claude
+        "max_tokens_to_sample": 700, # Max tokens for Claude response
+        "temperature": 0.1,   # Keep low for consistency
+        "top_p": 0.9,
+        "stop_sequences": ["\n\nHuman:", "Output JSON:"], # Important stop sequences for Claude
+    }
+
+def _validate_analysis(candidate):
+    """Schema check for a verdict object: returns it normalized, or None to keep looking."""
+    if not isinstance(candidate, dict) or \
+       "authenticity_score" not in candidate or \
+       not isinstance(candidate.get("reasoning"), str):
+        return None
+    try:
+        score = float(candidate["authenticity_score"])
+    except (TypeError, ValueError):
+        return None
+    if not (0.0 <= score <= 1.0):
+        print(f"WARNING: Authenticity score {score} out of expected range [0.0, 1.0]. Clamping.")
+        score = max(0.0, min(1.0, score))
+
+    candidate["authenticity_score"] = score
+    candidate["source"] = "llm"
+    candidate["tier"] = "claude"
+    return candidate
+
+def _build_repair_body(generated_text: str) -> dict:
+    prompt = CLAUDE_JSON_REPAIR_PROMPT_TEMPLATE.format(raw_output=generated_text[-AUTHENTICITY_REPAIR_MAX_CHARS:])
+    return {
+        # Prefilling the opening brace keeps the reply to just the object.
+        "prompt": f"\n\nHuman: {prompt}\n\nAssistant: {{",
+        "max_tokens_to_sample": 200,
+        "temperature": 0.0,
+        "stop_sequences": ["\n\nHuman:"],
+    }
+
+def _malformed_output_error(generated_text: str) -> dict:
+    print(f"ERROR: Model output contained no valid analysis JSON. Raw output: '{generated_text}'")
+    metrics.inc("authenticity_malformed_total")
+    return {"error": "Model returned malformed JSON.", "raw_output": generated_text}
+
+def _extract_repaired(completion: str):
+    # The reply normally continues the prefilled "{", but accept a complete object as well.
+    return extract_json_object("{" + completion, _validate_analysis) or \
+        extract_json_object(completion, _validate_analysis)
+
+def _repair_analysis(generated_text: str) -> dict:
+    """Re-asks only for the JSON verdict (~200 tokens) instead of rerunning the full analysis."""
+    for _ in range(AUTHENTICITY_REPAIR_ATTEMPTS):
+        print("WARNING: No valid analysis JSON in model output; running format repair.")
+        metrics.inc("authenticity_repairs_total")
+        response_body = invoke_model(CLAUDE_MODEL_ID, _build_repair_body(generated_text))
+        repaired = _extract_repaired(response_body.get("completion", ""))
+        if repaired is not None:
+            return repaired
+    return _malformed_output_error(generated_text)
+
+async def _arepair_analysis(generated_text: str) -> dict:
+    """Async counterpart of _repair_analysis."""
+    for _ in range(AUTHENTICITY_REPAIR_ATTEMPTS):
+        print("WARNING: No valid analysis JSON in model output; running format repair.")
+        metrics.inc("authenticity_repairs_total")
+        response_body = await ainvoke_model(CLAUDE_MODEL_ID, _build_repair_body(generated_text))
+        repaired = _extract_repaired(response_body.get("completion", ""))
+        if repaired is not None:
+            return repaired
+    return _malformed_output_error(generated_text)
@@ -0,0 +1,115 @@
+import hashlib
+
+from app.services.titan_service import aclassify_review_themes, classify_review_themes, select_clarity_alert
+from app.utils import metrics
+from app.utils.cache import normalize_text
+from app.utils.clarity_store import get_clarity_store
+
+
+def update_product_clarity(product_id: str, reviews: list, review_ids: list = None) -> dict:
+    """
+    Stateful Clarity Engine: folds new reviews into a product's running theme counts.
+
+    Only reviews not already counted for the product are sent to Titan, so the work per update
+    grows with the size of the delta, not with the product's review history. The alert is
+    re-selected only when the dominant theme changes, which includes a theme crossing
+    CLARITY_THEME_PREVALENCE in either direction.
+
+    Args:
+        product_id (str): The product the reviews belong to.
+        reviews (list): New review texts (reviews already counted are skipped).
+        review_ids (list): Optional stable ids, one per review; otherwise reviews are
+                           recognized by their normalized text.
+
+    Returns:
+        dict: The product's 'clarity_alert', 'dominant_theme', 'review_count', 'theme_counts',
+              whether this update changed the alert ('alert_changed'), and how many reviews were
+              newly counted ('new_reviews'); or an 'error' message.
+    """
+    delta, error = _unseen_delta(product_id, reviews, review_ids)
+    if error:
+        return error
+    themes, classified = classify_review_themes([text for _, text in delta]) if delta else ({}, set())
+    return _apply_delta(product_id, delta, themes, classified)
+
+
+async def aupdate_product_clarity(product_id: str, reviews: list, review_ids: list = None) -> dict:
+    """Async counterpart of update_product_clarity."""
+    delta, error = _unseen_delta(product_id, reviews, review_ids)
+    if error:
+        return error
+    themes, classified = (await aclassify_review_themes([text for _, text in delta])) if delta else ({}, set())
+    return _apply_delta(product_id, delta, themes, classified)
+
+
+def get_product_clarity(product_id: str) -> dict:
+    """The product's current clarity summary, without any model call."""
+    state = get_clarity_store().get_state(product_id)
+    if state is None:
+        return {"error": f"No clarity state for product {product_id}."}
+    return _response(product_id, state, alert_changed=False, new_reviews=0)
+
+
+def _review_key(review_text: str, review_id: str = None) -> str:
+    if review_id:
+        return f"id:{review_id}"
+    return "text:" + hashlib.sha1(normalize_text(review_text).encode("utf-8")).hexdigest()
+
+
+def _unseen_delta(product_id: str, reviews: list, review_ids: list):
+    if review_ids is not None and len(review_ids) != len(reviews):
+        return None, {"error": "review_ids must have one entry per review."}
+    keys = [_review_key(text, review_id) for text, review_id in zip(reviews, review_ids or [None] * len(reviews))]
+    unseen = get_clarity_store().unseen_keys(product_id, keys)
+    delta, taken = [], set()
+    for key, text in zip(keys, reviews):
+        if key in unseen and key not in taken:
+            taken.add(key)
+            delta.append((key, text))
+    return delta, None
+
+
+def _apply_delta(product_id: str, delta: list, themes: dict, classified: set) -> dict:
+    if delta and not classified:
+        return {"error": "Clarity theme extraction failed for every new review."}
+
+    # Reviews whose chunk failed aren't counted (or marked seen), so resending them retries them.
+    review_themes = {delta[index][0]: [] for index in classified}
+    for theme_id, indices in themes.items():
+        for index in indices:
+            review_themes[delta[index][0]].append(theme_id)
+
+    previous, state = get_clarity_store().apply_delta(product_id, review_themes, _fold_counts)
+    alert_changed = (previous or {}).get("dominant_theme") != state["dominant_theme"]
+    if alert_changed:
+        metrics.inc("clarity_alert_changes_total")
+    new_reviews = state["review_count"] - (previous or {}).get("review_count", 0)
+    metrics.inc("clarity_state_reviews_total", new_reviews)
+    return _response(product_id, state, alert_changed, new_reviews)
+
+
+def _fold_counts(previous: dict, fresh: dict) -> dict:
+    # O(new reviews + number of themes): the history is represented only by its counts.
+    theme_counts = dict(previous["theme_counts"]) if previous else {}
+    for review_themes in fresh.values():
+        for theme_id in set(review_themes):
+            theme_counts[theme_id] = theme_counts.get(theme_id, 0) + 1
+    review_count = (previous["review_count"] if previous else 0) + len(fresh)
+
+    dominant, alert = (previous["dominant_theme"], previous["alert"]) if previous else (None, None)
+    new_dominant, new_alert = select_clarity_alert(theme_counts, review_count)
+    if new_dominant != dominant:
+        dominant, alert = new_dominant, new_alert
+    return {"review_count": review_count, "theme_counts": theme_counts, "dominant_theme": dominant, "alert": alert}
+
+
+def _response(product_id: str, state: dict, alert_changed: bool, new_reviews: int) -> dict:
+    return {
+        "product_id": product_id,
+        "clarity_alert": state["alert"],
+        "dominant_theme": state["dominant_theme"],
+        "alert_changed": alert_changed,
+        "review_count": state["review_count"],
+        "theme_counts": state["theme_counts"],
+        "new_reviews": new_reviews,
+    }
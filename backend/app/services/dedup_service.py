@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+import time
+
+from app.utils.cache import normalize_text
+from app.utils.minhash import MinHashLSHIndex
+
+# --- Near-duplicate index settings ---
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") != "0"
+DEDUP_INDEX_PATH = os.environ.get("DEDUP_INDEX_PATH", "/tmp/aura_dedup_index.npz")
+# Ring size of the index. Each entry costs about 1.5 KB at the default 64 permutations / 8 bands,
+# so the ring is also capped at whatever fits in DEDUP_MAX_MEMORY_MB.
+DEDUP_MAX_ENTRIES = int(os.environ.get("DEDUP_MAX_ENTRIES", "200000"))
+DEDUP_MAX_MEMORY_MB = float(os.environ.get("DEDUP_MAX_MEMORY_MB", "128"))
+DEDUP_NUM_PERM = int(os.environ.get("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS = int(os.environ.get("DEDUP_BANDS", "8"))
+# Estimated Jaccard similarity above which a review reuses an indexed verdict.
+DEDUP_SIMILARITY_THRESHOLD = float(os.environ.get("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+# Once this many reviews share (near-)identical text, it's treated as recycled content.
+DEDUP_RECYCLED_CLUSTER_SIZE = int(os.environ.get("DEDUP_RECYCLED_CLUSTER_SIZE", "5"))
+DEDUP_RECYCLED_SCORE_CAP = float(os.environ.get("DEDUP_RECYCLED_SCORE_CAP", "0.3"))
+DEDUP_SAVE_INTERVAL_SECONDS = float(os.environ.get("DEDUP_SAVE_INTERVAL_SECONDS", "60"))
+
+_index = None
+_index_lock = threading.Lock()
+_last_saved_at = time.time()
+
+
+def _max_entries() -> int:
+    budget = int(DEDUP_MAX_MEMORY_MB * 1024 * 1024) // MinHashLSHIndex.estimated_entry_bytes(DEDUP_NUM_PERM, DEDUP_BANDS)
+    return max(1, min(DEDUP_MAX_ENTRIES, budget))
+
+
+def get_dedup_index() -> MinHashLSHIndex:
+    """Process-wide index, loaded from DEDUP_INDEX_PATH on first use when a saved copy exists."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = None
+                if DEDUP_INDEX_PATH and os.path.exists(DEDUP_INDEX_PATH):
+                    try:
+                        index = MinHashLSHIndex.load(DEDUP_INDEX_PATH)
+                    except Exception as e:
+                        print(f"WARNING: Could not load near-duplicate index from {DEDUP_INDEX_PATH}: {e}")
+                if index is not None and index.max_entries != _max_entries():
+                    # The ring can't be resized in place; start over rather than exceed the budget.
+                    print(f"WARNING: Saved near-duplicate index has {index.max_entries} slots, expected "
+                          f"{_max_entries()}; starting a new index.")
+                    index = None
+                _index = index or MinHashLSHIndex(DEDUP_NUM_PERM, DEDUP_BANDS, _max_entries())
+    return _index
+
+
+def save_dedup_index():
+    global _last_saved_at
+    if _index is None or not DEDUP_INDEX_PATH:
+        return
+    try:
+        _index.save(DEDUP_INDEX_PATH)
+    except OSError as e:
+        print(f"WARNING: Could not save near-duplicate index to {DEDUP_INDEX_PATH}: {e}")
+    _last_saved_at = time.time()
+
+
+def _maybe_save():
+    # Lambda has no shutdown hook, so persist on a timer from the request path instead. The write
+    # happens on a background thread so it never lands on a request (or the event loop).
+    global _last_saved_at
+    if time.time() - _last_saved_at >= DEDUP_SAVE_INTERVAL_SECONDS:
+        _last_saved_at = time.time()
+        threading.Thread(target=save_dedup_index, name="dedup-index-save", daemon=True).start()
+
+
+def _member_key(review_text: str, review_id: str = None) -> str:
+    # Re-scoring a review with a known id refreshes its entry. Without an id there is no way to tell a
+    # repost from the same review being analyzed again (reloads, several viewers), so anonymous
+    # submissions are keyed by their normalized text: identical text counts once, and only distinct
+    # near-duplicate wordings grow the cluster.
+    if review_id:
+        return f"id:{review_id}"
+    return "text:" + hashlib.sha1(normalize_text(review_text).encode("utf-8")).hexdigest()
+
+
+def find_near_duplicate(review_text: str):
+    """
+    Looks a review up in the index before any model call.
+
+    Returns:
+        tuple: (signature, match). `match` is None, or a dict with the matched cluster's
+               'cluster_id', 'similarity', 'cluster_size' and reusable 'verdict'.
+    """
+    index = get_dedup_index()
+    signature = index.signature(review_text)
+    return signature, index.query(signature, DEDUP_SIMILARITY_THRESHOLD)
+
+
+def record_review(review_text: str, verdict: dict, signature=None, match: dict = None, review_id: str = None) -> dict:
+    """
+    Adds a scored review to the index and attaches the 'duplicate_cluster' signal to its verdict.
+    Verdicts for content recycled across DEDUP_RECYCLED_CLUSTER_SIZE or more reviews are
+    capped at DEDUP_RECYCLED_SCORE_CAP.
+    """
+    index = get_dedup_index()
+    if signature is None:
+        signature, match = find_near_duplicate(review_text)
+
+    # Store the verdict without per-request annotations so reuse starts from a clean copy.
+    stored_verdict = {k: v for k, v in verdict.items() if k in ("authenticity_score", "reasoning", "source")}
+    cluster = index.add(signature, _member_key(review_text, review_id), stored_verdict, match)
+    _maybe_save()
+
+    verdict = dict(verdict)
+    verdict["duplicate_cluster"] = {
+        "cluster_id": cluster["cluster_id"],
+        "size": cluster["cluster_size"],
+        "similarity": match["similarity"] if match else None,
+    }
+    if cluster["cluster_size"] >= DEDUP_RECYCLED_CLUSTER_SIZE and \
+       verdict.get("authenticity_score", 0.0) > DEDUP_RECYCLED_SCORE_CAP:
+        verdict["authenticity_score"] = DEDUP_RECYCLED_SCORE_CAP
+        verdict["reasoning"] = (f"{verdict.get('reasoning', '')} Near-identical text appears in "
+                                f"{cluster['cluster_size']} reviews, indicating recycled content.").strip()
+    return verdict
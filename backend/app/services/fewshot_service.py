@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from functools import lru_cache
+
+from app.utils.example_bank import ExampleBank, embed_texts, format_example, source_hash
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# --- Dynamic few-shot settings ---
+FEWSHOT_ENABLED = os.environ.get("FEWSHOT_ENABLED", "1") != "0"
+# Number of nearest examples put into each authenticity prompt.
+FEWSHOT_K = int(os.environ.get("FEWSHOT_K", "3"))
+# JSON source of truth for the example bank, and where its precomputed embeddings live.
+FEWSHOT_EXAMPLES_PATH = os.environ.get("FEWSHOT_EXAMPLES_PATH", os.path.join(_DATA_DIR, "authenticity_examples.json"))
+FEWSHOT_EMBEDDINGS_PATH = os.environ.get("FEWSHOT_EMBEDDINGS_PATH", os.path.join(_DATA_DIR, "authenticity_examples.npz"))
+# Writable fallback for embeddings computed at runtime (Lambda only allows writes under /tmp).
+FEWSHOT_RUNTIME_EMBEDDINGS_PATH = os.environ.get("FEWSHOT_RUNTIME_EMBEDDINGS_PATH", "/tmp/aura_fewshot_embeddings.npz")
+
+# Hash of the bank's contents; part of the prompt version so edits to the bank invalidate caches.
+FEWSHOT_BANK_VERSION = source_hash(FEWSHOT_EXAMPLES_PATH)
+
+_bank = None
+_bank_failed = False
+_bank_lock = threading.Lock()
+
+
+def _load_bank():
+    for path in (FEWSHOT_EMBEDDINGS_PATH, FEWSHOT_RUNTIME_EMBEDDINGS_PATH):
+        if os.path.exists(path):
+            try:
+                bank = ExampleBank.load(path)
+            except Exception as e:
+                print(f"WARNING: Could not load few-shot embeddings from {path}: {e}")
+                continue
+            if bank.version == FEWSHOT_BANK_VERSION:
+                return bank
+
+    # No up-to-date precomputed matrix (e.g. local runs): embed the bank once and keep it in /tmp.
+    bank = ExampleBank.build(FEWSHOT_EXAMPLES_PATH)
+    try:
+        bank.save(FEWSHOT_RUNTIME_EMBEDDINGS_PATH)
+    except OSError as e:
+        print(f"WARNING: Could not save few-shot embeddings to {FEWSHOT_RUNTIME_EMBEDDINGS_PATH}: {e}")
+    return bank
+
+
+def get_example_bank():
+    """Process-wide example bank, or None when embeddings are unavailable (e.g. no sentence-transformers)."""
+    global _bank, _bank_failed
+    if _bank is None and not _bank_failed:
+        with _bank_lock:
+            if _bank is None and not _bank_failed:
+                try:
+                    _bank = _load_bank()
+                except Exception as e:
+                    print(f"WARNING: Dynamic few-shot selection disabled, using all examples: {e}")
+                    _bank_failed = True
+    return _bank
+
+
+@lru_cache(maxsize=1)
+def _all_examples() -> list:
+    with open(FEWSHOT_EXAMPLES_PATH, encoding="utf-8") as f:
+        return json.load(f)["examples"]
+
+
+def select_examples(review_text: str) -> str:
+    """
+    Renders the few-shot block for the authenticity prompt: the FEWSHOT_K bank examples closest
+    to the review, or the whole bank when dynamic selection is off or unavailable.
+    """
+    return select_pack_examples([review_text])
+
+
+def select_pack_examples(review_texts: list) -> str:
+    """
+    Few-shot block shared by several reviews scored in one packed prompt: the FEWSHOT_K bank
+    examples closest to the reviews' mean embedding, so the block's size doesn't grow with the pack.
+    """
+    bank = get_example_bank() if FEWSHOT_ENABLED else None
+    if bank is None:
+        examples = _all_examples()
+    else:
+        examples = bank.nearest(embed_texts(review_texts).mean(axis=0), FEWSHOT_K)
+    return "\n".join(format_example(example) for example in examples)
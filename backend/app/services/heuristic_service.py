@@ -0,0 +1,156 @@
+import os
+import re
+
+# --- Heuristic pre-filter settings ---
+HEURISTIC_PREFILTER_ENABLED = os.environ.get("HEURISTIC_PREFILTER_ENABLED", "1") != "0"
+# A review whose fake-signal score reaches this is answered locally as fake.
+HEURISTIC_FAKE_THRESHOLD = float(os.environ.get("HEURISTIC_FAKE_THRESHOLD", "0.7"))
+# A review whose specificity score reaches this (with no fake signals) is answered locally as
+# authentic. Lexical cues can't spot sarcasm or sophisticated fakes, so this is off by default.
+HEURISTIC_AUTHENTIC_THRESHOLD = float(os.environ.get("HEURISTIC_AUTHENTIC_THRESHOLD", "1.1"))
+
+# The deterministic tells spelled out in CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE.
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+# A bare domain is much weaker evidence: genuine reviews say where they bought the item.
+DOMAIN_PATTERN = re.compile(
+    r"\b([a-z0-9-]+)\.(xyz|com|net|org|shop|store|biz|info|top|online|site|io|click|buzz)\b", re.IGNORECASE)
+# ...unless it's pushed at the reader ("Visit buyproductnow.xyz") or sits on a TLD retailers don't use.
+PROMOTED_DOMAIN_PATTERN = re.compile(
+    r"\b(visit|check out|go to|head (over )?to|shop at|order (from|at)|available at|find (it|us) at)\s+"
+    r"(www\.)?([a-z0-9-]+)\.[a-z]{2,}\b", re.IGNORECASE)
+SPAM_TLDS = {"xyz", "top", "biz", "info", "online", "site", "click", "buzz"}
+RETAILER_DOMAINS = {
+    "amazon", "walmart", "target", "bestbuy", "ebay", "etsy", "costco", "homedepot", "lowes", "wayfair",
+    "ikea", "newegg", "kohls", "macys", "nordstrom", "zappos", "chewy", "aliexpress", "temu", "flipkart",
+}
+GRADE_SPAM_PATTERN = re.compile(r"\bA\+{3,}", re.IGNORECASE)
+GENERIC_PHRASES = (
+    "good product", "great product", "amazing product", "best product", "best purchase",
+    "happy with the purchase", "works as advertised", "works great", "highly recommend",
+    "everyone should buy", "love it so much", "five stars", "5 stars", "no issues",
+    "must buy", "best purchase ever", "would recommend to everyone",
+)
+MARKETING_JARGON = (
+    "optimal solution", "seamless", "robust", "interoperability", "scalable", "ecosystem",
+    "synergy", "cutting-edge", "state-of-the-art", "game changer", "game-changer",
+    "revolutionary", "enterprise", "tech-forward", "best-in-class", "unparalleled",
+    "visit", "click here", "discount code", "promo code",
+)
+EXPERIENCE_PATTERN = re.compile(
+    r"\b(i noticed|i used|i've been using|i bought|i tried|my experience|my (old|new)|after (a|two|three|\d+)|"
+    r"when i|took me|for my)\b",
+    re.IGNORECASE,
+)
+CONTRAST_PATTERN = re.compile(r"\b(but|however|although|though|except)\b", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\d")
+
+
+def _count_phrases(text_lower: str, phrases) -> list:
+    return [phrase for phrase in phrases if phrase in text_lower]
+
+
+def score_review(review_text: str) -> dict:
+    """
+    Scores a review on the lexical tells from the authenticity prompt. Pure string work, so it
+    runs in microseconds.
+
+    Returns:
+        dict: 'fake_score' and 'specificity_score' (both 0.0-1.0) and the 'signals' that fired.
+    """
+    text = review_text or ""
+    text_lower = text.lower()
+    words = text.split()
+    signals = []
+    fake_score = 0.0
+
+    domains = [(name.lower(), tld.lower()) for name, tld in DOMAIN_PATTERN.findall(text)
+               if name.lower() not in RETAILER_DOMAINS]
+    promoted = [match[-1].lower() for match in PROMOTED_DOMAIN_PATTERN.findall(text)]
+    promoted = any(name not in RETAILER_DOMAINS for name in promoted)
+    spam_domain = any(tld in SPAM_TLDS for _, tld in domains)
+    if URL_PATTERN.search(text):
+        fake_score += 0.6
+        signals.append("external_url")
+    elif promoted or spam_domain:
+        # Either is strong evidence; a call to action pointing at a spam TLD is conclusive.
+        fake_score += 0.8 if promoted and spam_domain else 0.6
+        signals.append("promoted_domain")
+    elif domains:
+        # A plain mention of a shop's domain is not enough to flag a review on its own.
+        fake_score += 0.25
+        signals.append("bare_domain")
+
+    if GRADE_SPAM_PATTERN.search(text):
+        fake_score += 0.3
+        signals.append("grade_spam")
+
+    exclamations = text.count("!")
+    if exclamations >= 3 and exclamations / max(len(words), 1) > 0.1:
+        fake_score += 0.2
+        signals.append("exclamation_density")
+
+    generic = _count_phrases(text_lower, GENERIC_PHRASES)
+    if generic:
+        fake_score += min(0.6, 0.15 * len(generic))
+        signals.append("generic_phrases")
+
+    jargon = _count_phrases(text_lower, MARKETING_JARGON)
+    if len(jargon) >= 2:
+        fake_score += min(0.4, 0.1 * len(jargon))
+        signals.append("marketing_jargon")
+
+    if len(words) <= 12 and generic:
+        fake_score += 0.15
+        signals.append("extreme_brevity")
+
+    specificity_score = 0.0
+    if EXPERIENCE_PATTERN.search(text):
+        specificity_score += 0.4
+    if NUMBER_PATTERN.search(text):
+        specificity_score += 0.25
+    if CONTRAST_PATTERN.search(text):
+        specificity_score += 0.2
+    if len(words) >= 40:
+        specificity_score += 0.25
+
+    # Concrete detail is the main authentic tell, so it offsets generic-sounding phrasing
+    # (but never an external link or promoted domain, which are definitive spam signals on their own).
+    if "external_url" not in signals and "promoted_domain" not in signals:
+        fake_score -= 0.5 * specificity_score
+
+    return {
+        "fake_score": round(max(0.0, min(1.0, fake_score)), 3),
+        "specificity_score": round(min(1.0, specificity_score), 3),
+        "signals": signals,
+    }
+
+
+def prefilter_review(review_text: str):
+    """
+    First stage of the authenticity pipeline.
+
+    Returns:
+        dict or None: A verdict in the usual 'authenticity_score'/'reasoning' shape, marked with
+                      "source": "heuristic", when the lexical signals are conclusive; None when
+                      the review needs the LLM.
+    """
+    scores = score_review(review_text)
+
+    if scores["fake_score"] >= HEURISTIC_FAKE_THRESHOLD:
+        return {
+            "authenticity_score": round(max(0.02, 0.3 * (1.0 - scores["fake_score"])), 2),
+            "reasoning": "Flagged by local pre-filter: " + ", ".join(s.replace("_", " ") for s in scores["signals"])
+                         + ", strongly indicative of a fake or promotional review.",
+            "source": "heuristic",
+            "heuristic_signals": scores["signals"],
+        }
+
+    if not scores["signals"] and scores["specificity_score"] >= HEURISTIC_AUTHENTIC_THRESHOLD:
+        return {
+            "authenticity_score": 0.85,
+            "reasoning": "Local pre-filter found concrete, first-hand detail and no fake signals.",
+            "source": "heuristic",
+            "heuristic_signals": [],
+        }
+
+    return None
@@ -0,0 +1,253 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app.services.bedrock_service import (
+    AUTHENTICITY_PACKING, analyze_reviews_packed, get_authenticity_analysis, pack_reviews,
+)
+from app.utils.scheduler import LANE_BATCH, lane, model_error
+from app.utils.job_store import JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, get_job_store
+
+# --- Bulk scan job settings ---
+# Bedrock calls in flight per job (each scores one review, or one packed group with
+# AUTHENTICITY_PACKING on); the default leaves Bedrock pool headroom for interactive traffic.
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", "8"))
+# Jobs processed at the same time; further jobs wait in the queue.
+JOB_MAX_ACTIVE = int(os.environ.get("JOB_MAX_ACTIVE", "2"))
+# Results written to the store per checkpoint. Smaller means less rework after an interruption.
+JOB_CHECKPOINT_SIZE = int(os.environ.get("JOB_CHECKPOINT_SIZE", "25"))
+JOB_MAX_REVIEWS = int(os.environ.get("JOB_MAX_REVIEWS", "100000"))
+JOB_RESULTS_PAGE_LIMIT = 500
+# Times a job may crash its worker in this process before it's marked failed instead of re-queued.
+JOB_MAX_CRASHES = int(os.environ.get("JOB_MAX_CRASHES", "3"))
+# Attempts per review when analysis fails for a retryable reason (throttling, deadlines); later
+# attempts wait JOB_RETRY_BACKOFF_SECONDS, doubling each time. Other errors fail the item at once.
+JOB_ITEM_MAX_ATTEMPTS = int(os.environ.get("JOB_ITEM_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.environ.get("JOB_RETRY_BACKOFF_SECONDS", "2"))
+# Longest a worker sleeps between checks while a job only has items waiting to be retried.
+_RETRY_POLL_SECONDS = 1.0
+
+_queue = queue.Queue()
+_queued_ids = set()
+_crash_counts = {}
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def submit_job(reviews: list, review_ids: list = None, max_concurrency: int = None) -> dict:
+    """
+    Stores a bulk authenticity scan and queues it for the background workers.
+
+    Args:
+        reviews (list): The review texts to analyze.
+        review_ids (list): Optional stable ids, one per review (see get_authenticity_analysis).
+        max_concurrency (int): Reviews analyzed concurrently for this job. Defaults to JOB_CONCURRENCY.
+
+    Returns:
+        dict: The new job's status and progress, or an 'error' message if the input is invalid.
+    """
+    if not reviews:
+        return {"error": "No reviews submitted."}
+    if len(reviews) > JOB_MAX_REVIEWS:
+        return {"error": f"A job can contain at most {JOB_MAX_REVIEWS} reviews."}
+    if review_ids is not None and len(review_ids) != len(reviews):
+        return {"error": "review_ids must have one entry per review."}
+
+    job_id = uuid.uuid4().hex
+    max_concurrency = max(1, min(max_concurrency or JOB_CONCURRENCY, JOB_CONCURRENCY * 4))
+    job = get_job_store().create_job(job_id, list(zip(reviews, review_ids or [None] * len(reviews))), max_concurrency)
+    _enqueue(job_id)
+    return job
+
+
+def get_job(job_id: str) -> dict:
+    """A job's status and progress counters, or an 'error' if it doesn't exist."""
+    start_workers()
+    job = get_job_store().get_job(job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found."}
+    if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        # Polling re-queues an unfinished job no worker holds, e.g. one whose worker crashed.
+        # _enqueue() is a no-op while the job is queued or running here.
+        _enqueue(job_id)
+    return job
+
+
+def get_job_results(job_id: str, offset: int = 0, limit: int = 100) -> dict:
+    """
+    One page of a job's per-review results, in input order.
+
+    Returns:
+        dict: 'job_id', 'status', 'offset', 'results' and 'next_offset' (None on the last page).
+              Each result carries 'index', 'status' ("pending", "done" or "error") and, once
+              analyzed, the analysis under 'result'.
+    """
+    job = get_job(job_id)
+    if "error" in job:
+        return job
+    offset = max(0, offset)
+    limit = max(1, min(limit, JOB_RESULTS_PAGE_LIMIT))
+    results = get_job_store().get_results(job_id, offset, limit)
+    next_offset = offset + len(results)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "offset": offset,
+        "results": results,
+        "next_offset": next_offset if next_offset < job["total"] else None,
+    }
+
+
+def cancel_job(job_id: str) -> dict:
+    """Stops a queued or running job after its current checkpoint; finished results are kept."""
+    job = get_job_store().get_job(job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found."}
+    if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        get_job_store().set_status(job_id, JOB_CANCELLED)
+    return get_job_store().get_job(job_id)
+
+
+def start_workers():
+    """Starts the worker threads once per process and re-queues unfinished jobs from the store."""
+    with _workers_lock:
+        if _workers:
+            return
+        for number in range(max(1, JOB_MAX_ACTIVE)):
+            worker = threading.Thread(target=_worker_loop, name=f"scan-job-worker-{number}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+    for job_id in get_job_store().unfinished_job_ids():
+        _enqueue(job_id)
+
+
+def _enqueue(job_id: str):
+    start_workers()
+    with _workers_lock:
+        if job_id in _queued_ids:
+            return
+        _queued_ids.add(job_id)
+    _queue.put(job_id)
+
+
+def _worker_loop():
+    while True:
+        job_id = _queue.get()
+        try:
+            run_job(job_id)
+        except Exception as e:
+            _record_crash(job_id, e)
+        finally:
+            with _workers_lock:
+                _queued_ids.discard(job_id)
+
+
+def _record_crash(job_id: str, error: Exception):
+    # The job stays unfinished in the store, so the next poll (or restart) resumes it from its
+    # last checkpoint; a job that keeps crashing is marked failed so polling doesn't loop forever.
+    with _workers_lock:
+        crashes = _crash_counts[job_id] = _crash_counts.get(job_id, 0) + 1
+    if crashes < JOB_MAX_CRASHES:
+        print(f"ERROR: Bulk scan job {job_id} stopped unexpectedly and will be resumed: {error}")
+        return
+    print(f"ERROR: Bulk scan job {job_id} failed after {crashes} unexpected stops: {error}")
+    try:
+        get_job_store().set_status(job_id, JOB_FAILED)
+    except Exception as e:
+        print(f"ERROR: Could not mark bulk scan job {job_id} as failed: {e}")
+
+
+def _analyze_items(items: list) -> list:
+    indices = [index for index, _, _ in items]
+    try:
+        # Jobs run in the batch lane with no deadline: they wait out throttling instead of failing.
+        with lane(LANE_BATCH):
+            if len(items) == 1:
+                _, review_text, review_id = items[0]
+                return [(indices[0], get_authenticity_analysis(review_text, review_id))]
+            analyses = analyze_reviews_packed([text for _, text, _ in items], [review_id for _, _, review_id in items])
+        return list(zip(indices, analyses))
+    except Exception as e:
+        print(f"ERROR: Unexpected failure while analyzing job item: {e}")
+        return [(index, model_error(e)) for index in indices]
+
+
+def _pending_groups(store, job_id: str):
+    # Paged so a job of any size is never loaded into memory at once.
+    last_index = -1
+    while True:
+        page = store.pending_items(job_id, last_index, JOB_CHECKPOINT_SIZE * 4)
+        if not page:
+            return
+        if AUTHENTICITY_PACKING:
+            for group in pack_reviews([text for _, text, _ in page]):
+                yield [page[position] for position in group]
+        else:
+            yield from ([item] for item in page)
+        last_index = page[-1][0]
+
+
+def _save_results(store, job_id: str, completed: list):
+    store.save_results(job_id, completed, JOB_ITEM_MAX_ATTEMPTS, JOB_RETRY_BACKOFF_SECONDS)
+
+
+def run_job(job_id: str):
+    """
+    Processes a job's pending reviews until none are left, or it's cancelled. A sliding window
+    keeps the job's max_concurrency analyses (single reviews or packed groups) in flight, and
+    completed results are checkpointed every JOB_CHECKPOINT_SIZE items, so an interrupted job
+    redoes little more than that many reviews. Reviews that failed for a retryable reason are
+    picked up again by later passes once their backoff has passed.
+    """
+    store = get_job_store()
+    job = store.get_job(job_id)
+    if job is None or job["status"] not in (JOB_QUEUED, JOB_RUNNING):
+        return
+    store.set_status(job_id, JOB_RUNNING)
+
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=job["max_concurrency"], thread_name_prefix=f"scan-{job_id[:8]}") as executor:
+        while not cancelled:
+            retry_at = store.next_retry_at(job_id)
+            if retry_at is None:
+                break
+            if retry_at > time.time():
+                # Only items backing off are left; wait for the first, checking for cancellation.
+                time.sleep(max(0.0, min(retry_at - time.time(), _RETRY_POLL_SECONDS)))
+                cancelled = store.get_job(job_id)["status"] == JOB_CANCELLED
+                continue
+
+            groups = _pending_groups(store, job_id)
+            in_flight, completed = set(), []
+            while True:
+                while not cancelled and len(in_flight) < job["max_concurrency"]:
+                    group = next(groups, None)
+                    if group is None:
+                        break
+                    in_flight.add(executor.submit(_analyze_items, group))
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed.extend(future.result())
+                if len(completed) >= JOB_CHECKPOINT_SIZE:
+                    _save_results(store, job_id, completed)
+                    completed = []
+                    cancelled = store.get_job(job_id)["status"] == JOB_CANCELLED
+            _save_results(store, job_id, completed)
+            cancelled = store.get_job(job_id)["status"] == JOB_CANCELLED
+
+    if not cancelled and store.get_job(job_id)["status"] == JOB_RUNNING:
+        store.set_status(job_id, JOB_COMPLETED)
+
+
+if __name__ == "__main__":
+    # Standalone worker: drains every unfinished job in the store, then exits.
+    #   python -m app.services.job_service
+    for unfinished_job_id in get_job_store().unfinished_job_ids():
+        print(f"Resuming bulk scan job {unfinished_job_id}")
+        run_job(unfinished_job_id)
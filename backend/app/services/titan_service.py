@@ -1,38 +1,289 @@
-import boto3
+import asyncio
+import contextvars
 import json
-from app.utils.prompts import CLARITY_PROMPT_TEMPLATE, AUTHENTICITY_PROMPT_TEMPLATE
+import os
+from concurrent.futures import ThreadPoolExecutor
+from app.services.bedrock_client import ainvoke_model, invoke_model
+from app.utils import metrics
+from app.utils.cache import CACHE_ENABLED, get_result_cache, make_cache_key, normalize_text, prompt_version
+from app.utils.json_stream import extract_json_object
+from app.utils.singleflight import SingleFlight
+from app.utils.prompts import (
+    CLARITY_PROMPT_TEMPLATE,
+    AUTHENTICITY_PROMPT_TEMPLATE,
+    CLARITY_THEMES,
+    CLARITY_THEME_EXTRACTION_PROMPT_TEMPLATE,
+)
+TITAN_MODEL_ID = 'amazon.titan-text-express-v1'
 
-# Initialize the Bedrock client
-bedrock_runtime = boto3.client(service_name='bedrock-runtime', region_name='us-east-1')
+# --- Map-reduce Clarity Engine settings ---
+# "auto" switches to map-reduce once the reviews exceed one chunk; "always"/"never" force a mode.
+CLARITY_MAPREDUCE_MODE = os.environ.get("CLARITY_MAPREDUCE_MODE", "auto")
+# Review text per map call, in (estimated) tokens. Keeps every Titan prompt well inside its context window.
+CLARITY_CHUNK_TOKEN_BUDGET = int(os.environ.get("CLARITY_CHUNK_TOKEN_BUDGET", "3000"))
+CLARITY_MAP_CONCURRENCY = int(os.environ.get("CLARITY_MAP_CONCURRENCY", "8"))
+# Same rule as CLARITY_PROMPT_TEMPLATE: a theme needs to appear in at least 20% of reviews.
+CLARITY_THEME_PREVALENCE = float(os.environ.get("CLARITY_THEME_PREVALENCE", "0.2"))
+
+# The alert depends on the prompts, the theme taxonomy (its descriptions and alert texts) and the
+# map-reduce settings, so editing any of them invalidates cached alerts.
+CLARITY_PROMPT_VERSION = prompt_version(
+    CLARITY_PROMPT_TEMPLATE, CLARITY_THEME_EXTRACTION_PROMPT_TEMPLATE, json.dumps(CLARITY_THEMES, sort_keys=True),
+    f"mapreduce={CLARITY_MAPREDUCE_MODE}:{CLARITY_CHUNK_TOKEN_BUDGET}:{CLARITY_THEME_PREVALENCE}")
+
+# Keyed by the cache key, i.e. by model, prompt version and the normalized review set.
+_clarity_flight = SingleFlight("clarity")
+
+def _clarity_cache_key(reviews: list) -> str:
+    # The alert depends on the review set, not its order, so the key uses the sorted, normalized texts.
+    return make_cache_key("clarity", TITAN_MODEL_ID, CLARITY_PROMPT_VERSION,
+                          sorted(normalize_text(review) for review in reviews))
 
 def generate_clarity_alert(reviews: list) -> str:
-    reviews_text = "\n".join(reviews)
-    prompt = CLARITY_PROMPT_TEMPLATE.format(reviews_text=reviews_text)
-    body = json.dumps({
+    with metrics.span("clarity", "cache_lookup"):
+        cache_key = _clarity_cache_key(reviews)
+        if CACHE_ENABLED:
+            hit, cached_alert = get_result_cache().get(cache_key)
+            if hit:
+                return cached_alert
+
+    # Concurrent requests for the same review set share one in-flight Titan call (or map-reduce).
+    return _clarity_flight.do(cache_key, _generate_and_store, reviews, cache_key)
+
+async def agenerate_clarity_alert(reviews: list) -> str:
+    """Async counterpart of generate_clarity_alert for `async def` handlers."""
+    with metrics.span("clarity", "cache_lookup"):
+        cache_key = _clarity_cache_key(reviews)
+        if CACHE_ENABLED:
+            hit, cached_alert = get_result_cache().get(cache_key)
+            if hit:
+                return cached_alert
+
+    return await _clarity_flight.ado(cache_key, _agenerate_and_store, reviews, cache_key)
+
+def _generate_and_store(reviews: list, cache_key: str) -> str:
+    # Cached before the in-flight call completes, so a request arriving right after finds it.
+    # An alert computed with some map chunks missing is returned but not cached.
+    alert, complete = _generate_clarity_alert_uncached(reviews)
+    if CACHE_ENABLED and complete:
+        get_result_cache().put(cache_key, alert)
+    return alert
+
+async def _agenerate_and_store(reviews: list, cache_key: str) -> str:
+    alert, complete = await _agenerate_clarity_alert_uncached(reviews)
+    if CACHE_ENABLED and complete:
+        get_result_cache().put(cache_key, alert)
+    return alert
+
+def _use_mapreduce(reviews_text: str) -> bool:
+    return CLARITY_MAPREDUCE_MODE == "always" or \
+        (CLARITY_MAPREDUCE_MODE == "auto" and estimate_tokens(reviews_text) > CLARITY_CHUNK_TOKEN_BUDGET)
+
+def _build_clarity_body(reviews_text: str) -> dict:
+    with metrics.span("clarity", "prompt_build"):
+        prompt = CLARITY_PROMPT_TEMPLATE.format(reviews_text=reviews_text)
+    return {
         "inputText": prompt,
         "textGenerationConfig": {"maxTokenCount": 50, "temperature": 0}
-    })
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId='amazon.titan-text-express-v1',
-        accept='application/json', contentType='application/json'
-    )
-    response_body = json.loads(response.get('body').read())
-    alert = response_body.get('results')[0].get('outputText').strip()
+    }
+
+def _parse_clarity_alert(response_body: dict) -> str:
+    with metrics.span("clarity", "output_parse"):
+        alert = response_body.get('results')[0].get('outputText').strip()
     return alert if alert != "NO_ALERT" else None
 
+def _generate_clarity_alert_uncached(reviews: list) -> tuple:
+    """(alert, complete): `complete` is False when some map-reduce chunks failed."""
+    reviews_text = "\n".join(reviews)
+    if _use_mapreduce(reviews_text):
+        return _reduce_themes(reviews, *classify_review_themes(reviews))
+    return _parse_clarity_alert(invoke_model(TITAN_MODEL_ID, _build_clarity_body(reviews_text))), True
+
+async def _agenerate_clarity_alert_uncached(reviews: list) -> tuple:
+    reviews_text = "\n".join(reviews)
+    if _use_mapreduce(reviews_text):
+        return _reduce_themes(reviews, *(await aclassify_review_themes(reviews)))
+    return _parse_clarity_alert(await ainvoke_model(TITAN_MODEL_ID, _build_clarity_body(reviews_text))), True
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting Titan prompts.
+    return len(text) // 4 + 1
+
+def chunk_reviews(reviews: list, token_budget: int = None) -> list:
+    """
+    Splits reviews into chunks whose combined text stays within `token_budget` estimated tokens.
+
+    Returns:
+        list: Chunks, each a list of (review_index, review_text) pairs. A single review that is
+              larger than the budget is truncated so it still fits in one chunk.
+    """
+    token_budget = token_budget or CLARITY_CHUNK_TOKEN_BUDGET
+    chunks, current, current_tokens = [], [], 0
+    for index, review in enumerate(reviews):
+        review = " ".join(review.split())
+        tokens = estimate_tokens(review)
+        if tokens > token_budget:
+            review = review[:token_budget * 4]
+            tokens = token_budget
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append((index, review))
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _build_theme_body(chunk: list) -> dict:
+    """Map step prompt: asks Titan which reviews in one chunk mention each taxonomy theme."""
+    with metrics.span("clarity", "prompt_build"):
+        theme_list = "\n".join(f"- {theme_id}: {theme['description']}" for theme_id, theme in CLARITY_THEMES.items())
+        # Reviews are numbered 1..n inside the chunk and mapped back to their global index afterwards.
+        numbered_reviews = "\n".join(f"{number}. {review}" for number, (_, review) in enumerate(chunk, start=1))
+        prompt = CLARITY_THEME_EXTRACTION_PROMPT_TEMPLATE.format(theme_list=theme_list,
+                                                                 numbered_reviews=numbered_reviews)
+    return {
+        "inputText": prompt,
+        "textGenerationConfig": {"maxTokenCount": 400, "temperature": 0}
+    }
+
+def _parse_chunk_themes(chunk: list, response_body: dict) -> dict:
+    output_text = response_body.get('results')[0].get('outputText').strip()
+
+    with metrics.span("clarity", "json_extract"):
+        # A stray brace in Titan's text must not swallow the object (see IncrementalJSONExtractor).
+        raw_themes = extract_json_object(output_text, lambda candidate: candidate if isinstance(candidate, dict) else None)
+    if raw_themes is None:
+        raise ValueError(f"No JSON object found in theme extraction output. Raw output: {output_text}")
+
+    themes = {}
+    for theme_id, numbers in raw_themes.items():
+        if theme_id not in CLARITY_THEMES or not isinstance(numbers, list):
+            continue
+        indices = {chunk[n - 1][0] for n in numbers if isinstance(n, int) and 1 <= n <= len(chunk)}
+        if indices:
+            themes[theme_id] = indices
+    return themes
+
+def classify_review_themes(reviews: list) -> tuple:
+    """
+    Map step over any number of reviews: chunks them and classifies the chunks in parallel.
+
+    Returns:
+        tuple: (themes, classified) where `themes` maps theme id -> set of review indices and
+               `classified` is the set of indices of reviews whose chunk was classified
+               successfully. Failed chunks are logged and left out of both.
+    """
+    chunks = chunk_reviews(reviews)
+    if not chunks:
+        return {}, set()
+
+    def extract(chunk):
+        return _parse_chunk_themes(chunk, invoke_model(TITAN_MODEL_ID, _build_theme_body(chunk)))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(CLARITY_MAP_CONCURRENCY, len(chunks)))) as executor:
+        # Each task runs in a copy of the request's context so its metrics count toward the request.
+        futures = [executor.submit(contextvars.copy_context().run, extract, chunk) for chunk in chunks]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    return _merge_chunk_themes(chunks, outcomes)
+
+async def aclassify_review_themes(reviews: list) -> tuple:
+    """Async counterpart of classify_review_themes."""
+    chunks = chunk_reviews(reviews)
+    if not chunks:
+        return {}, set()
+
+    semaphore = asyncio.Semaphore(max(1, CLARITY_MAP_CONCURRENCY))
+
+    async def extract(chunk):
+        async with semaphore:
+            return _parse_chunk_themes(chunk, await ainvoke_model(TITAN_MODEL_ID, _build_theme_body(chunk)))
+
+    outcomes = await asyncio.gather(*(extract(chunk) for chunk in chunks), return_exceptions=True)
+    return _merge_chunk_themes(chunks, outcomes)
+
+def _merge_chunk_themes(chunks: list, outcomes: list) -> tuple:
+    themes, classified = {}, set()
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"ERROR: Clarity theme extraction failed for a chunk of {len(chunk)} reviews: {outcome}")
+            continue
+        classified.update(index for index, _ in chunk)
+        for theme_id, indices in outcome.items():
+            themes.setdefault(theme_id, set()).update(indices)
+    return themes, classified
+
+def select_clarity_alert(theme_counts: dict, total_reviews: int) -> tuple:
+    """
+    Reduce step: picks the dominant theme and applies the prevalence rule.
+
+    Returns:
+        tuple: (dominant_theme_id, alert). Both are None when no theme reaches
+               CLARITY_THEME_PREVALENCE of `total_reviews`.
+    """
+    if not theme_counts or total_reviews <= 0:
+        return None, None
+    # Ties resolve in taxonomy order so the result is deterministic.
+    dominant = max(CLARITY_THEMES, key=lambda theme_id: theme_counts.get(theme_id, 0))
+    if theme_counts.get(dominant, 0) < CLARITY_THEME_PREVALENCE * total_reviews:
+        return None, None
+    return dominant, CLARITY_THEMES[dominant]["alert"]
+
+def generate_clarity_alert_mapreduce(reviews: list) -> str:
+    """
+    Hierarchical Clarity Engine for large review sets. Each Titan call sees at most one
+    token-budgeted chunk, and all chunks run concurrently, so prompt size is bounded and
+    latency stays close to that of a single call as review volume grows.
+    """
+    return _reduce_themes(reviews, *classify_review_themes(reviews))[0]
+
+async def agenerate_clarity_alert_mapreduce(reviews: list) -> str:
+    """Async counterpart of generate_clarity_alert_mapreduce."""
+    return _reduce_themes(reviews, *(await aclassify_review_themes(reviews)))[0]
+
+def _reduce_themes(reviews: list, themes: dict, classified: set) -> tuple:
+    """(alert, complete): the alert over the classified reviews, and whether every chunk succeeded."""
+    if not classified and reviews:
+        raise RuntimeError("Clarity theme extraction failed for every chunk.")
+    theme_counts = {theme_id: len(indices) for theme_id, indices in themes.items()}
+    _, alert = select_clarity_alert(theme_counts, len(classified))
+    return alert, len(classified) == len(reviews)
+
 def analyze_review_authenticity(review_text: str) -> dict:
-    prompt = AUTHENTICITY_PROMPT_TEMPLATE.format(review_text=review_text)
-    body = json.dumps({
+    """
+    Cheap first-tier authenticity score from Titan Express (see the cascade in bedrock_service).
+
+    Returns:
+        dict: Titan's JSON verdict ('authenticity_score', 'key_positive_signals',
+              'potential_concerns'), or an 'error' message if its output can't be parsed.
+    """
+    return _parse_authenticity(invoke_model(TITAN_MODEL_ID, _build_authenticity_body(review_text)))
+
+async def aanalyze_review_authenticity(review_text: str) -> dict:
+    """Async counterpart of analyze_review_authenticity."""
+    return _parse_authenticity(await ainvoke_model(TITAN_MODEL_ID, _build_authenticity_body(review_text)))
+
+def _build_authenticity_body(review_text: str) -> dict:
+    with metrics.span("authenticity", "prompt_build"):
+        prompt = AUTHENTICITY_PROMPT_TEMPLATE.format(review_text=review_text)
+    return {
         "inputText": prompt,
         "textGenerationConfig": {"maxTokenCount": 200, "temperature": 0.1}
-    })
-    response = bedrock_runtime.invoke_model(
-        body=body, modelId='amazon.titan-text-express-v1',
-        accept='application/json', contentType='application/json'
-    )
-    response_body = json.loads(response.get('body').read())
+    }
+
+def _parse_authenticity(response_body: dict) -> dict:
     try:
-        analysis_json = response_body.get('results')[0].get('outputText').strip()
-        return json.loads(analysis_json)
-    except (json.JSONDecodeError, IndexError, TypeError):
-        return {"error": "Failed to parse AI model response."}
\ No newline at end of file
+        with metrics.span("authenticity", "output_parse"):
+            output_text = response_body.get('results')[0].get('outputText')
+            # Titan often wraps the object in prose or a code fence; take the first JSON object in it.
+            analysis = extract_json_object(output_text)
+    except (IndexError, TypeError, AttributeError):
+        analysis = None
+    if not isinstance(analysis, dict):
+        return {"error": "Failed to parse AI model response."}
+    return analysis
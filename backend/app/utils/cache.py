@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Tunables for the result cache. The SQLite tier defaults to /tmp because that is the
+# only writable path on Lambda and it survives warm container reuse.
+CACHE_ENABLED = os.environ.get("AURA_CACHE_ENABLED", "1") != "0"
+CACHE_MAX_ENTRIES = int(os.environ.get("AURA_CACHE_MAX_ENTRIES", "4096"))
+CACHE_TTL_SECONDS = float(os.environ.get("AURA_CACHE_TTL_SECONDS", str(24 * 3600)))
+CACHE_DB_PATH = os.environ.get("AURA_CACHE_DB_PATH", "/tmp/aura_result_cache.sqlite3")
+# Row cap for the SQLite tier (Lambda's /tmp is 512 MB by default); the soonest-expiring rows go first.
+CACHE_DB_MAX_ENTRIES = int(os.environ.get("AURA_CACHE_DB_MAX_ENTRIES", "100000"))
+# How often writes also purge expired rows and enforce the row cap.
+CACHE_DB_PRUNE_INTERVAL_SECONDS = float(os.environ.get("AURA_CACHE_DB_PRUNE_INTERVAL_SECONDS", "300"))
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a review used for cache keys: NFC unicode with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def prompt_version(*templates: str) -> str:
+    """Short, stable hash of the prompt template(s); editing a prompt invalidates old entries."""
+    digest = hashlib.sha256()
+    for template in templates:
+        digest.update(template.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def make_cache_key(namespace: str, model_id: str, version: str, payload) -> str:
+    """Content-addressed key over the normalized input, the model id and the prompt version."""
+    raw = json.dumps([namespace, model_id, version, payload], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _MemoryTier:
+    """Thread-safe in-process LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _SQLiteTier:
+    """
+    Persistent tier backed by a single-file SQLite database. Expired rows are purged, and the
+    table trimmed to `max_entries`, on open and then at most every `prune_interval` seconds of writes.
+    """
+
+    def __init__(self, path: str, max_entries: int = CACHE_DB_MAX_ENTRIES,
+                 prune_interval: float = CACHE_DB_PRUNE_INTERVAL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+        self._last_prune = 0.0
+        self.prune()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            with self._lock:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+        return expires_at, json.loads(value)
+
+    def put(self, key, value, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+        if time.time() - self._last_prune >= self.prune_interval:
+            self.prune()
+
+    def prune(self):
+        """Deletes expired rows, then the soonest-expiring rows beyond max_entries."""
+        with self._lock:
+            now = time.time()
+            self._last_prune = now
+            self._conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+            excess = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY expires_at LIMIT ?)",
+                    (excess,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+
+
+class ResultCache:
+    """
+    Two-tier (in-process LRU -> SQLite) cache for model verdicts.
+
+    Values must be JSON-serializable. `None` is a legitimate cached value (e.g. "no clarity
+    alert"), so lookups return a (hit, value) pair rather than overloading `None`.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 db_path: str = CACHE_DB_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.memory = _MemoryTier(max_entries, ttl_seconds)
+        self.disk = None
+        if db_path:
+            try:
+                self.disk = _SQLiteTier(db_path)
+            except sqlite3.Error as e:
+                # A read-only or missing filesystem shouldn't take the engines down; run memory-only.
+                print(f"WARNING: Persistent result cache unavailable at {db_path}: {e}")
+        self._stats_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get(self, key: str):
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count("memory_hits")
+            return True, entry[1]
+
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"WARNING: Result cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                expires_at, value = entry
+                # Promote to the memory tier, keeping the original expiry.
+                self.memory.put(key, value, expires_at)
+                self._count("disk_hits")
+                return True, value
+
+        self._count("misses")
+        return False, None
+
+    def put(self, key: str, value):
+        expires_at = time.time() + self.ttl_seconds
+        self.memory.put(key, value, expires_at)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value, expires_at)
+            except sqlite3.Error as e:
+                print(f"WARNING: Result cache write failed: {e}")
+        self._count("writes")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["enabled"] = CACHE_ENABLED
+        return stats
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache shared by both engines (created on first use)."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Per-product running clarity summaries. /tmp is the only writable path on Lambda; point
+# CLARITY_STATE_PATH at persistent storage to keep summaries across containers.
+CLARITY_STATE_PATH = os.environ.get("CLARITY_STATE_PATH", "/tmp/aura_clarity_state.sqlite3")
+
+
+class ClarityStateStore:
+    """
+    SQLite store of one compact summary per product (review count, per-theme counts, current
+    alert), plus the keys of reviews already counted so a resent review is never counted twice.
+    Every operation touches only the product's summary row and the delta's keys, never its history.
+    """
+
+    def __init__(self, path: str = CLARITY_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS product_clarity (product_id TEXT PRIMARY KEY, "
+            "review_count INTEGER NOT NULL, theme_counts TEXT NOT NULL, dominant_theme TEXT, "
+            "alert TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS product_reviews (product_id TEXT NOT NULL, review_key TEXT NOT NULL, "
+            "PRIMARY KEY (product_id, review_key)) WITHOUT ROWID"
+        )
+
+    def get_state(self, product_id: str):
+        """The product's summary dict, or None if no review has been counted for it yet."""
+        with self._lock:
+            return self._read_state(product_id)
+
+    def _read_state(self, product_id: str):
+        row = self._conn.execute(
+            "SELECT review_count, theme_counts, dominant_theme, alert, updated_at FROM product_clarity "
+            "WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        review_count, theme_counts, dominant_theme, alert, updated_at = row
+        return {"product_id": product_id, "review_count": review_count, "theme_counts": json.loads(theme_counts),
+                "dominant_theme": dominant_theme, "alert": alert, "updated_at": updated_at}
+
+    def unseen_keys(self, product_id: str, review_keys: list) -> set:
+        """The subset of `review_keys` not yet counted for the product."""
+        with self._lock:
+            seen = set()
+            for key in set(review_keys):
+                if self._conn.execute("SELECT 1 FROM product_reviews WHERE product_id = ? AND review_key = ?",
+                                      (product_id, key)).fetchone():
+                    seen.add(key)
+        return set(review_keys) - seen
+
+    def apply_delta(self, product_id: str, review_themes: dict, apply):
+        """
+        Atomically folds classified reviews into the product's summary.
+
+        Args:
+            product_id (str): The product.
+            review_themes (dict): review key -> list of theme ids found in that review.
+            apply (callable): Called with the current summary (None for a new product) and the
+                              newly counted keys' themes; returns the updated summary dict.
+
+        Returns:
+            tuple: (previous_state, new_state).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = self._read_state(product_id)
+                # Re-check inside the transaction: a concurrent update may have counted some already.
+                fresh = {}
+                for key, themes in review_themes.items():
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO product_reviews (product_id, review_key) VALUES (?, ?)",
+                        (product_id, key))
+                    if cursor.rowcount:
+                        fresh[key] = themes
+                state = apply(previous, fresh)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO product_clarity "
+                    "(product_id, review_count, theme_counts, dominant_theme, alert, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (product_id, state["review_count"], json.dumps(state["theme_counts"]),
+                     state["dominant_theme"], state["alert"], time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return previous, state
+
+
+_clarity_store = None
+_clarity_store_lock = threading.Lock()
+
+
+def get_clarity_store() -> ClarityStateStore:
+    """Process-wide clarity state store (created on first use)."""
+    global _clarity_store
+    if _clarity_store is None:
+        with _clarity_store_lock:
+            if _clarity_store is None:
+                _clarity_store = ClarityStateStore(CLARITY_STATE_PATH)
+    return _clarity_store
+
+
+def set_clarity_store(store: ClarityStateStore):
+    """Replaces the store, e.g. with ClarityStateStore(":memory:"). None resets it."""
+    global _clarity_store
+    with _clarity_store_lock:
+        _clarity_store = store
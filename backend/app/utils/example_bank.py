@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Sentence-transformers model used to embed both the bank and incoming reviews.
+FEWSHOT_EMBEDDING_MODEL = os.environ.get("FEWSHOT_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """Loads the sentence-transformers model on first use (importing torch is expensive)."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(FEWSHOT_EMBEDDING_MODEL)
+    return _encoder
+
+
+def embed_texts(texts: list) -> np.ndarray:
+    """Unit-normalized float32 embeddings, one row per text."""
+    return np.asarray(get_encoder().encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+def format_example(example: dict) -> str:
+    """Renders one bank entry in the Review / Reasoning / Analysis layout the prompt uses."""
+    analysis = json.dumps(example["analysis"], ensure_ascii=False)
+    return (f'Review: "{example["review"]}"\n'
+            f'Reasoning: {example["reasoning"]}\n'
+            f'Analysis: {{ {analysis[1:-1]} }}\n')
+
+
+def source_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class ExampleBank:
+    """
+    Few-shot examples with precomputed unit-norm embeddings stored as one float16 matrix.
+    Nearest-neighbour search is a single matrix-vector product, so the bank can grow well past
+    the original nine examples without the prompt getting any larger.
+    """
+
+    def __init__(self, examples: list, embeddings: np.ndarray, version: str):
+        if len(examples) != len(embeddings):
+            raise ValueError("Each example needs exactly one embedding row.")
+        self.examples = examples
+        self.embeddings = np.asarray(embeddings, dtype=np.float16)
+        self.version = version
+
+    def nearest(self, query_embedding: np.ndarray, k: int) -> list:
+        """Returns up to k examples ordered from most to least similar (cosine)."""
+        k = min(k, len(self.examples))
+        if k <= 0:
+            return []
+        scores = self.embeddings.astype(np.float32) @ np.asarray(query_embedding, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.examples[i] for i in top]
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, embeddings=self.embeddings, version=np.array(self.version),
+                     examples=np.array(json.dumps(self.examples, ensure_ascii=False)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ExampleBank":
+        with np.load(path) as data:
+            return cls(json.loads(str(data["examples"])), data["embeddings"], str(data["version"]))
+
+    @classmethod
+    def build(cls, examples_path: str) -> "ExampleBank":
+        """Embeds every example in a JSON bank file ({"examples": [...]})."""
+        with open(examples_path, encoding="utf-8") as f:
+            examples = json.load(f)["examples"]
+        embeddings = embed_texts([example["review"] for example in examples])
+        return cls(examples, embeddings, source_hash(examples_path))
+
+
+if __name__ == "__main__":
+    # Precompute the embedding matrix at build time:
+    #   python -m app.utils.example_bank app/data/authenticity_examples.json app/data/authenticity_examples.npz
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.utils.example_bank <examples.json> <output.npz>")
+    bank = ExampleBank.build(sys.argv[1])
+    bank.save(sys.argv[2])
+    print(f"Wrote {len(bank.examples)} examples ({bank.embeddings.shape[1]} dims) to {sys.argv[2]}")
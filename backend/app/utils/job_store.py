@@ -0,0 +1,220 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Local, single-file store for bulk scan jobs. /tmp is the only writable path on Lambda; point
+# JOB_STORE_PATH at a persistent volume for a long-running worker.
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH", "/tmp/aura_jobs.sqlite3")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+
+ITEM_PENDING = "pending"
+ITEM_DONE = "done"
+ITEM_ERROR = "error"
+
+
+class JobStore(abc.ABC):
+    """
+    Storage interface for bulk scan jobs and their per-review results.
+
+    The job service only talks to this interface, so the SQLite default can be swapped for any
+    other backend with set_job_store(). Items that aren't checkpointed stay pending, which is
+    what lets an interrupted job resume where it stopped. Items whose result is retryable (e.g.
+    throttled) also stay pending, with a retry time, until they run out of attempts.
+    """
+
+    @abc.abstractmethod
+    def create_job(self, job_id: str, reviews: list, max_concurrency: int) -> dict:
+        """Stores a new queued job. `reviews` is a list of (review_text, review_id) pairs."""
+
+    @abc.abstractmethod
+    def get_job(self, job_id: str):
+        """The job's status and progress counters, or None if it doesn't exist."""
+
+    @abc.abstractmethod
+    def set_status(self, job_id: str, status: str):
+        """Moves the job to `status`, one of the JOB_* constants."""
+
+    @abc.abstractmethod
+    def unfinished_job_ids(self) -> list:
+        """Ids of queued or running jobs, oldest first, for resuming after a restart."""
+
+    @abc.abstractmethod
+    def pending_items(self, job_id: str, after_index: int, limit: int) -> list:
+        """Up to `limit` (index, review_text, review_id) items due now and still pending, with index > after_index."""
+
+    @abc.abstractmethod
+    def next_retry_at(self, job_id: str):
+        """The earliest retry time (time.time() seconds) among pending items, or None if none are pending."""
+
+    @abc.abstractmethod
+    def save_results(self, job_id: str, results: list, max_attempts: int = 1, retry_backoff_seconds: float = 0.0):
+        """
+        Checkpoints (index, result) pairs. Results with an 'error' key count as failed, except
+        'retryable' ones that have been attempted fewer than `max_attempts` times: those stay
+        pending and become due again after `retry_backoff_seconds`, doubled on every attempt.
+        """
+
+    @abc.abstractmethod
+    def get_results(self, job_id: str, offset: int, limit: int) -> list:
+        """One page of items in input order, each with 'index', 'status' and, once scored, 'result'."""
+
+
+class SQLiteJobStore(JobStore):
+    """JobStore backed by a local SQLite file; needs nothing beyond the standard library."""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "total INTEGER NOT NULL, completed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "max_concurrency INTEGER NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_items (job_id TEXT NOT NULL, idx INTEGER NOT NULL, "
+            "review_text TEXT NOT NULL, review_id TEXT, status TEXT NOT NULL, result TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, retry_at REAL NOT NULL DEFAULT 0, PRIMARY KEY (job_id, idx))"
+        )
+        # Stores created before item retries were tracked lack these columns.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        if "attempts" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if "retry_at" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN retry_at REAL NOT NULL DEFAULT 0")
+
+    def create_job(self, job_id: str, reviews: list, max_concurrency: int) -> dict:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, status, total, max_concurrency, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, JOB_QUEUED, len(reviews), max_concurrency, now, now),
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_items (job_id, idx, review_text, review_id, status) VALUES (?, ?, ?, ?, ?)",
+                    ((job_id, index, text, review_id, ITEM_PENDING) for index, (text, review_id) in enumerate(reviews)),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, total, completed, failed, max_concurrency, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "total", "completed", "failed", "max_concurrency", "created_at", "updated_at")
+        return dict(zip(keys, row))
+
+    def set_status(self, job_id: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                               (status, time.time(), job_id))
+
+    def unfinished_job_ids(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def pending_items(self, job_id: str, after_index: int, limit: int) -> list:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT idx, review_text, review_id FROM job_items "
+                "WHERE job_id = ? AND status = ? AND idx > ? AND retry_at <= ? ORDER BY idx LIMIT ?",
+                (job_id, ITEM_PENDING, after_index, time.time(), limit),
+            ).fetchall()
+
+    def next_retry_at(self, job_id: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(retry_at) FROM job_items WHERE job_id = ? AND status = ?", (job_id, ITEM_PENDING)
+            ).fetchone()[0]
+
+    def save_results(self, job_id: str, results: list, max_attempts: int = 1, retry_backoff_seconds: float = 0.0):
+        if not results:
+            return
+        now = time.time()
+        with self._lock:
+            # Items and counters move together, so a crash never leaves progress double-counted.
+            self._conn.execute("BEGIN")
+            try:
+                attempts = dict(self._conn.execute(
+                    f"SELECT idx, attempts FROM job_items WHERE job_id = ? AND idx IN ({','.join('?' * len(results))})",
+                    (job_id, *(index for index, _ in results)),
+                ).fetchall())
+                rows, retries = [], []
+                for index, result in results:
+                    attempt = attempts.get(index, 0) + 1
+                    if result.get("retryable") and attempt < max_attempts:
+                        retries.append((attempt, now + retry_backoff_seconds * 2 ** (attempt - 1), job_id, index))
+                    else:
+                        rows.append((ITEM_ERROR if "error" in result else ITEM_DONE, json.dumps(result), attempt,
+                                     job_id, index))
+                failed = sum(1 for row in rows if row[0] == ITEM_ERROR)
+                self._conn.executemany(
+                    "UPDATE job_items SET status = ?, result = ?, attempts = ? WHERE job_id = ? AND idx = ?", rows)
+                self._conn.executemany(
+                    "UPDATE job_items SET attempts = ?, retry_at = ? WHERE job_id = ? AND idx = ?", retries)
+                self._conn.execute(
+                    "UPDATE jobs SET completed = completed + ?, failed = failed + ?, updated_at = ? WHERE job_id = ?",
+                    (len(rows) - failed, failed, now, job_id),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_results(self, job_id: str, offset: int, limit: int) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, status, result FROM job_items WHERE job_id = ? AND idx >= ? ORDER BY idx LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        results = []
+        for index, status, result in rows:
+            item = {"index": index, "status": status}
+            if result is not None:
+                item["result"] = json.loads(result)
+            results.append(item)
+        return results
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide job store, a SQLiteJobStore at JOB_STORE_PATH unless replaced."""
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = SQLiteJobStore(JOB_STORE_PATH)
+    return _job_store
+
+
+def set_job_store(store: JobStore):
+    """Replaces the job store, e.g. with SQLiteJobStore(":memory:") or another backend. None resets it."""
+    global _job_store
+    with _job_store_lock:
+        _job_store = store
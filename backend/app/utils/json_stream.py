@@ -0,0 +1,142 @@
+import json
+import time
+
+
+class IncrementalJSONExtractor:
+    """
+    Finds the first valid top-level JSON object in model output that arrives in pieces.
+
+    The scanner tracks brace depth and string/escape state, so braces inside strings and nested
+    objects are handled correctly (unlike a non-greedy regex). Each character is scanned once no
+    matter how the text is split across feed() calls. An object that closes but fails to parse or
+    validate is skipped and scanning continues with the next one. A "{" that isn't followed by a
+    key or "}" is treated as reasoning text, and with a validator, a nested object that validates
+    is accepted even if an unbalanced brace before it never closes.
+    """
+
+    def __init__(self, validator=None):
+        self.validator = validator
+        self.text = ""
+        self.result = None
+        self._pos = 0
+        self._depth = 0
+        self._start = None
+        self._starts = []
+        self._in_string = False
+        self._escaped = False
+        self._outside = []
+        # Total time spent scanning, for the pipeline's json_extract metric.
+        self.seconds = 0.0
+
+    @property
+    def reasoning(self) -> str:
+        """Output outside the accepted object so far (the model's free-text reasoning)."""
+        return "".join(self._outside)
+
+    def feed(self, chunk: str):
+        """
+        Adds more output.
+
+        Returns:
+            dict or None: The first valid object once it has closed (and on every later call),
+                          otherwise None.
+        """
+        if self.result is not None:
+            return self.result
+        started = time.perf_counter()
+        result = self._scan(chunk)
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def _scan(self, chunk: str):
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth > 0:
+                self._in_string = True
+            elif char == "{":
+                opens_object = self._opens_object(text, self._pos)
+                if opens_object is None:
+                    # Can't tell until the next non-blank character arrives.
+                    return None
+                if opens_object:
+                    if self._depth == 0:
+                        self._start = self._pos
+                    self._starts.append(self._pos)
+                    self._depth += 1
+                else:
+                    # A brace in the reasoning (e.g. "{" in prose). If an object is open, it can't be
+                    # valid JSON either, so it was reasoning too: restart the scan after this brace.
+                    if self._depth > 0:
+                        self._outside.append(text[self._start:self._pos])
+                        self._depth, self._starts, self._start = 0, [], None
+                    self._outside.append(char)
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                start = self._starts.pop()
+                if self._depth == 0:
+                    candidate = self._accept(text[self._start:self._pos + 1])
+                    if candidate is not None:
+                        self.result = candidate
+                        self._pos += 1
+                        return candidate
+                    # Not the object we want (e.g. braces in the reasoning): it's still reasoning text.
+                    self._outside.append(text[self._start:self._pos + 1])
+                elif self.validator is not None:
+                    # An unbalanced "{" earlier in the reasoning keeps the depth above zero, so a
+                    # nested object the validator accepts is taken as the answer on its own.
+                    candidate = self._accept(text[start:self._pos + 1])
+                    if candidate is not None:
+                        self._outside.append(text[self._start:start])
+                        self._depth, self._starts, self._start = 0, [], None
+                        self.result = candidate
+                        self._pos += 1
+                        return candidate
+            elif self._depth == 0:
+                self._outside.append(char)
+            self._pos += 1
+        return None
+
+    @staticmethod
+    def _opens_object(text: str, pos: int):
+        """Whether the "{" at `pos` can start a JSON object, or None if the text ends before telling."""
+        pos += 1
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        return text[pos] in "\"}" if pos < len(text) else None
+
+    def _accept(self, json_string: str):
+        try:
+            candidate = json.loads(json_string)
+        except json.JSONDecodeError:
+            return None
+        if self.validator is not None:
+            # Validators return the (possibly normalized) object, or None to reject it.
+            return self.validator(candidate)
+        return candidate
+
+
+def extract_json_object(text: str, validator=None):
+    """Non-incremental convenience wrapper: the first valid object in `text`, or None."""
+    return IncrementalJSONExtractor(validator).feed(text)
+
+
+def extract_json_objects(text: str, validator=None) -> list:
+    """Every valid top-level object in `text`, in order, e.g. the items of a partial or malformed JSON array."""
+    extractor = IncrementalJSONExtractor(validator)
+    objects = []
+    found = extractor.feed(text)
+    while found is not None:
+        objects.append(found)
+        # Resume scanning after the accepted object.
+        extractor.result = None
+        found = extractor.feed("")
+    return objects
@@ -0,0 +1,265 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+
+# --- Metrics settings ---
+METRICS_ENABLED = os.environ.get("AURA_METRICS_ENABLED", "1") != "0"
+# One structured log line per request (CloudWatch Embedded Metric Format). On by default under
+# Lambda, where there's no long-lived process to scrape /metrics from.
+METRICS_LOG_ENABLED = os.environ.get(
+    "AURA_METRICS_LOG", "1" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "0") != "0"
+METRICS_NAMESPACE = os.environ.get("AURA_METRICS_NAMESPACE", "AuraAI")
+# Histogram bucket upper bounds, in seconds.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+# (name, sorted label items) -> value
+_counters = {}
+_gauges = {}
+# (component, stage) -> [bucket counts..., +Inf count, sum]
+_stages = {}
+_current_request = contextvars.ContextVar("aura_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Everything recorded while serving one request; the source of the per-request log line."""
+
+    __slots__ = ("route", "started", "stage_seconds", "counts", "handler_started")
+
+    def __init__(self):
+        self.route = None
+        self.started = time.perf_counter()
+        self.stage_seconds = {}
+        self.counts = {}
+        self.handler_started = None
+
+
+def begin_request() -> RequestMetrics:
+    """Starts per-request collection in the current context. Pair with end_request()."""
+    request = RequestMetrics()
+    _current_request.set(request)
+    return request
+
+
+def end_request():
+    _current_request.set(None)
+
+
+def observe(component: str, stage: str, seconds: float):
+    """Records one timed stage, e.g. observe("authenticity", "prompt_build", 0.002)."""
+    if not METRICS_ENABLED:
+        return
+    index = bisect.bisect_left(STAGE_BUCKETS, seconds)
+    key = (component, stage)
+    with _lock:
+        histogram = _stages.get(key)
+        if histogram is None:
+            histogram = _stages[key] = [0] * (len(STAGE_BUCKETS) + 2)
+        histogram[index] += 1
+        histogram[-1] += seconds
+    request = _current_request.get()
+    if request is not None:
+        name = f"{component}.{stage}"
+        request.stage_seconds[name] = request.stage_seconds.get(name, 0.0) + seconds
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Adds to a counter, e.g. inc("bedrock_errors_total", model=model_id, code="ThrottlingException")."""
+    if not METRICS_ENABLED or not amount:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    request = _current_request.get()
+    if request is not None:
+        request.counts[name] = request.counts.get(name, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Sets a gauge to its latest value, e.g. a ratio derived from counters."""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _gauges[(name, tuple(sorted(labels.items())))] = value
+
+
+class span:
+    """Context manager timing a pipeline stage: `with span("clarity", "prompt_build"): ...`."""
+
+    __slots__ = ("component", "stage", "started")
+
+    def __init__(self, component: str, stage: str):
+        self.component = component
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.component, self.stage, time.perf_counter() - self.started)
+        return False
+
+
+# --- Bedrock response metadata ---
+
+def record_bedrock_call(model_id: str, response_metadata: dict = None, input_tokens=None, output_tokens=None):
+    """
+    Counts one completed Bedrock call with its retries and token usage. Token counts default to the
+    x-amzn-bedrock-*-token-count response headers; streams pass them from invocationMetrics.
+    """
+    response_metadata = response_metadata or {}
+    headers = response_metadata.get("HTTPHeaders") or {}
+    if input_tokens is None:
+        input_tokens = headers.get("x-amzn-bedrock-input-token-count")
+    if output_tokens is None:
+        output_tokens = headers.get("x-amzn-bedrock-output-token-count")
+    inc("bedrock_calls_total", model=model_id)
+    inc("bedrock_retries_total", response_metadata.get("RetryAttempts", 0), model=model_id)
+    if input_tokens is not None:
+        inc("bedrock_input_tokens_total", int(input_tokens), model=model_id)
+    if output_tokens is not None:
+        inc("bedrock_output_tokens_total", int(output_tokens), model=model_id)
+
+
+def record_bedrock_error(model_id: str, error: Exception):
+    """Counts a failed Bedrock call by error code (ThrottlingException, ReadTimeoutError, ...)."""
+    response = getattr(error, "response", None) or {}
+    code = (response.get("Error") or {}).get("Code") or type(error).__name__
+    inc("bedrock_errors_total", model=model_id, code=code)
+    inc("bedrock_retries_total", (response.get("ResponseMetadata") or {}).get("RetryAttempts", 0), model=model_id)
+
+
+# --- Exposition ---
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        stages = {key: list(values) for key, values in _stages.items()}
+
+    lines = []
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE aura_{name} counter")
+        lines.append(f"aura_{name}{_format_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE aura_{name} gauge")
+        lines.append(f"aura_{name}{_format_labels(labels)} {value}")
+
+    lines.append("# HELP aura_stage_seconds Time spent per pipeline stage.")
+    lines.append("# TYPE aura_stage_seconds histogram")
+    for (component, stage), values in sorted(stages.items()):
+        labels = (("component", component), ("stage", stage))
+        cumulative = 0
+        for bound, count in zip(STAGE_BUCKETS + ("+Inf",), values[:-1]):
+            cumulative += count
+            lines.append(f"aura_stage_seconds_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+        lines.append(f"aura_stage_seconds_sum{_format_labels(labels)} {values[-1]}")
+        lines.append(f"aura_stage_seconds_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def emit_request_log(request: RequestMetrics):
+    """Prints one CloudWatch Embedded Metric Format line for a finished request."""
+    values = {f"{name}_ms": round(seconds * 1000, 3) for name, seconds in request.stage_seconds.items()}
+    metrics = [{"Name": name, "Unit": "Milliseconds"} for name in values]
+    for name, count in request.counts.items():
+        values[name] = count
+        metrics.append({"Name": name, "Unit": "Count"})
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{"Namespace": METRICS_NAMESPACE, "Dimensions": [["route"]], "Metrics": metrics}],
+        },
+        "route": request.route or "unknown",
+    }
+    record.update(values)
+    print(json.dumps(record))
+
+
+async def mark_handler_started():
+    """FastAPI dependency: everything before it (CORS, routing, body parsing) counts as ASGI overhead."""
+    request = _current_request.get()
+    if request is not None and request.handler_started is None:
+        request.handler_started = time.perf_counter()
+        observe("http", "asgi_overhead", request.handler_started - request.started)
+
+
+class MetricsMiddleware:
+    """
+    Outermost ASGI middleware: opens per-request collection, times the whole request and counts it
+    by route and status. Writes the request's log line when METRICS_LOG_ENABLED, unless an outer
+    layer (the Lambda handler) owns the request and writes it instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request = _current_request.get()
+        owns_request = request is None
+        if owns_request:
+            request = begin_request()
+        started = request.started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            # Label by route template, never the raw path, to keep label cardinality bounded.
+            route = scope.get("route")
+            request.route = getattr(route, "path", None) or "unmatched"
+            observe("http", "request", time.perf_counter() - started)
+            inc("http_requests_total", route=request.route, status=status["code"])
+            if owns_request:
+                if METRICS_LOG_ENABLED:
+                    emit_request_log(request)
+                end_request()
+
+
+def instrument_lambda_handler(asgi_handler):
+    """
+    Wraps the Mangum handler so each invocation is one metrics request: Mangum's own event/response
+    translation is timed as ("lambda", "mangum_overhead") and the log line is written at the end.
+    """
+    def handler(event, context):
+        if not METRICS_ENABLED:
+            return asgi_handler(event, context)
+        request = begin_request()
+        started = time.perf_counter()
+        try:
+            return asgi_handler(event, context)
+        finally:
+            total = time.perf_counter() - started
+            observe("lambda", "mangum_overhead", max(0.0, total - request.stage_seconds.get("http.request", 0.0)))
+            if METRICS_LOG_ENABLED:
+                emit_request_log(request)
+            end_request()
+
+    return handler
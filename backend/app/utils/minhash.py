@@ -0,0 +1,232 @@
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-gram shingles over lowercased text; very short texts fall back to their word set."""
+    words = _WORD_PATTERN.findall((text or "").lower())
+    if len(words) < size:
+        return set(words)
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHashLSHIndex:
+    """
+    Near-duplicate index over review text using MinHash signatures and banded LSH.
+
+    Memory is bounded by `max_entries`: entries live in a fixed-size ring, and the oldest
+    entry is evicted once the ring is full. Each entry costs its signature (4 bytes per
+    permutation), one dict bucket slot per band and its member-key bookkeeping, plus the
+    verdict of its cluster: about 1.5 KB at the defaults (see `estimated_entry_bytes`), so
+    200k entries take roughly 300 MB. Size the ring from a memory budget, not a review count.
+
+    Entries are grouped into clusters of near-duplicates. The first member's verdict is kept
+    per cluster so later members can reuse it, and cluster sizes count distinct members
+    (by `member_key`), so re-scoring the same review does not inflate them.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 8, max_entries: int = 200_000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.seed = seed
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.RLock()
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._cluster_ids = np.zeros(0, dtype=np.int64)
+        self._member_keys = []
+        self._member_slots = {}
+        self._buckets = {}
+        self._cluster_sizes = {}
+        self._verdicts = {}
+        self._count = 0
+        self._next_cluster_id = 0
+
+    @staticmethod
+    def estimated_entry_bytes(num_perm: int = 64, bands: int = 8) -> int:
+        """Upper estimate of one entry's memory, measured with tracemalloc when every entry is its own cluster."""
+        return 5 * num_perm + 65 * bands + 650
+
+    # --- Hashing ---
+
+    def signature(self, text: str) -> np.ndarray:
+        tokens = shingles(text)
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        raw = signature.tobytes()
+        width = self.rows * 4
+        return [(band << 32) | zlib.crc32(raw[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+    # --- Bucket bookkeeping (values are an int slot, or a list once a bucket is shared) ---
+
+    def _bucket_add(self, key: int, slot: int):
+        current = self._buckets.get(key)
+        if current is None:
+            self._buckets[key] = slot
+        elif isinstance(current, list):
+            current.append(slot)
+        else:
+            self._buckets[key] = [current, slot]
+
+    def _bucket_remove(self, key: int, slot: int):
+        current = self._buckets.get(key)
+        if isinstance(current, list):
+            current.remove(slot)
+            if len(current) == 1:
+                self._buckets[key] = current[0]
+        elif current == slot:
+            del self._buckets[key]
+
+    def _grow(self):
+        # Double the ring (up to max_entries) instead of preallocating the whole budget.
+        capacity = min(self.max_entries, max(1024, len(self._signatures) * 2))
+        signatures = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+        signatures[:len(self._signatures)] = self._signatures
+        cluster_ids = np.full(capacity, -1, dtype=np.int64)
+        cluster_ids[:len(self._cluster_ids)] = self._cluster_ids
+        self._signatures, self._cluster_ids = signatures, cluster_ids
+        self._member_keys.extend([None] * (capacity - len(self._member_keys)))
+
+    # --- Public API ---
+
+    def query(self, signature: np.ndarray, threshold: float):
+        """
+        Finds the most similar indexed entry whose estimated Jaccard similarity is >= threshold.
+
+        Returns:
+            dict or None: 'cluster_id', 'similarity', 'cluster_size' and the cluster 'verdict'.
+        """
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                if isinstance(bucket, list):
+                    candidates.update(bucket)
+                else:
+                    candidates.add(bucket)
+            if not candidates:
+                return None
+
+            slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarities = (self._signatures[slots] == signature).mean(axis=1)
+            best = int(similarities.argmax())
+            if similarities[best] < threshold:
+                return None
+            cluster_id = int(self._cluster_ids[slots[best]])
+            return {
+                "cluster_id": cluster_id,
+                "similarity": round(float(similarities[best]), 3),
+                "cluster_size": self._cluster_sizes.get(cluster_id, 0),
+                "verdict": self._verdicts.get(cluster_id),
+            }
+
+    def add(self, signature: np.ndarray, member_key: str, verdict: dict = None, match: dict = None) -> dict:
+        """
+        Indexes one review, joining `match`'s cluster if given or starting a new one.
+        Re-adding an already indexed `member_key` only refreshes its cluster's verdict.
+
+        Returns:
+            dict: The 'cluster_id' and current 'cluster_size' of the review's cluster.
+        """
+        with self._lock:
+            slot = self._member_slots.get(member_key)
+            if slot is not None:
+                cluster_id = int(self._cluster_ids[slot])
+            else:
+                cluster_id = match["cluster_id"] if match else None
+                if cluster_id is None or cluster_id not in self._cluster_sizes:
+                    cluster_id = self._next_cluster_id
+                    self._next_cluster_id += 1
+
+                slot = self._count % self.max_entries
+                if slot >= len(self._signatures):
+                    self._grow()
+                elif self._count >= self.max_entries:
+                    self._evict(slot)
+
+                self._signatures[slot] = signature
+                self._cluster_ids[slot] = cluster_id
+                self._member_keys[slot] = member_key
+                self._member_slots[member_key] = slot
+                for key in self._band_keys(signature):
+                    self._bucket_add(key, slot)
+                self._cluster_sizes[cluster_id] = self._cluster_sizes.get(cluster_id, 0) + 1
+                self._count += 1
+
+            if verdict is not None and cluster_id not in self._verdicts:
+                self._verdicts[cluster_id] = verdict
+            return {"cluster_id": cluster_id, "cluster_size": self._cluster_sizes[cluster_id]}
+
+    def _evict(self, slot: int):
+        for key in self._band_keys(self._signatures[slot]):
+            self._bucket_remove(key, slot)
+        self._member_slots.pop(self._member_keys[slot], None)
+        cluster_id = int(self._cluster_ids[slot])
+        self._cluster_sizes[cluster_id] -= 1
+        if self._cluster_sizes[cluster_id] <= 0:
+            del self._cluster_sizes[cluster_id]
+            self._verdicts.pop(cluster_id, None)
+
+    def __len__(self):
+        return min(self._count, self.max_entries)
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        """Writes the index atomically; band buckets are rebuilt from signatures on load."""
+        with self._lock:
+            size = len(self)
+            meta = {
+                "num_perm": self.num_perm, "bands": self.bands, "max_entries": self.max_entries,
+                "seed": self.seed, "count": self._count, "next_cluster_id": self._next_cluster_id,
+                "member_keys": self._member_keys[:size],
+                "cluster_sizes": {str(k): v for k, v in self._cluster_sizes.items()},
+                "verdicts": {str(k): v for k, v in self._verdicts.items()},
+            }
+            signatures = self._signatures[:size].copy()
+            cluster_ids = self._cluster_ids[:size].copy()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, signatures=signatures, cluster_ids=cluster_ids, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSHIndex":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(meta["num_perm"], meta["bands"], meta["max_entries"], meta["seed"])
+            index._signatures = data["signatures"].astype(np.uint32)
+            index._cluster_ids = data["cluster_ids"].astype(np.int64)
+        index._member_keys = meta["member_keys"]
+        index._member_slots = {key: slot for slot, key in enumerate(index._member_keys) if key is not None}
+        index._count = meta["count"]
+        index._next_cluster_id = meta["next_cluster_id"]
+        index._cluster_sizes = {int(k): v for k, v in meta["cluster_sizes"].items()}
+        index._verdicts = {int(k): v for k, v in meta["verdicts"].items()}
+        for slot in range(len(index._signatures)):
+            for key in index._band_keys(index._signatures[slot]):
+                index._bucket_add(key, slot)
+        return index
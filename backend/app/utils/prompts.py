@@ -58,4 +58,108 @@ Review to Analyze:
 ---
 
 JSON Response:
-"""
\ No newline at end of file
+"""
+
+# Prompt for the Claude-backed Authenticity Engine (bedrock_service)
+CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE = """
+You are an expert review authenticity analyzer, highly skilled in detecting subtle nuances in language. Your primary objective is to accurately determine the authenticity of product reviews by applying criteria consistent with distinguishing genuine user experiences from deceptive content. You will leverage a deep understanding of human review patterns and common manipulation tactics.
+
+**Characteristics of Authentic Reviews:**
+* **Specificity & Detail:** Contains concrete examples, features, usage scenarios, or specific problems.
+* **Personal Experience:** Uses phrases like "I noticed," "I used it for," "my experience," reflecting real interaction.
+* **Balanced Perspective (Contradictory Sentiment):** Often includes a mix of pros and cons, or expresses mixed feelings about different aspects within the same review.
+* **Natural Language & Imperfections (Low-Effort Authenticity / Grammar Quirks):** May include minor typos, grammatical quirks, or a conversational tone, or be very short if reflecting genuine "good enough" sentiment tied to value/price.
+* **Specific Emotional Expression:** Anger, joy, or frustration tied to a particular feature or event.
+* **Irrelevant but Real Details:** May discuss logistical elements like shipping, packaging, or delivery, even if unrelated to core product function, because these are real customer experiences.
+* **Sarcasm:** Employs positive words or exaggerated praise to convey an underlying negative sentiment or criticism, requiring contextual understanding.
+
+**Characteristics of Fake Reviews (including Sophisticated Fakes):**
+* **Generality & Vagueness (Empty Raves/Inane Negativity):** Lacks specific details, uses generic praise ("good product," "works great") or vague, unsubstantiated criticism.
+* **Overly Hyperbolic or Emotional Language:** Excessive exclamation points, extreme adjectives without concrete support.
+* **Repetition & Content Recycling:** Phrases or ideas repeated excessively; content might be recycled from other reviews.
+* **Promotional Language (Astroturfing):** Sounds like marketing copy, uses excessive jargon, or promotes external links/other products.
+* **"A+ in Composition":** Consistently perfect grammar and syntax, sometimes unnatural for a casual review, especially when paired with generic content (AI tell).
+* **Lack of Realistic Incidents:** Struggles to invent specific, vivid anecdotes that make a review feel truly authentic.
+* **Reviewer Profile Anomalies:** (While you can't check profiles, this informs the textual patterns to look for.)
+
+**Your Analysis Process for the given Review:**
+1.  **Thorough Reading:** Carefully read and understand the review.
+2.  **Pattern Recognition:** Identify specific words, phrases, and structural patterns that align with either authentic or fake characteristics.
+3.  **Contextual Interpretation:** For ambiguous cases (like sarcasm or irrelevant details), interpret the true intent based on the full context.
+4.  **Reasoning Formulation:** Detail your step-by-step thought process, explaining *why* you classify it as authentic or fake, citing specific textual evidence from the review.
+5.  **Score Assignment:** Assign an "authenticity_score" (float from 0.0 to 1.0) based on your analysis:
+    * **0.0-0.2:** Highly likely fake (e.g., clear spam, blatant promotion, extremely generic positive/negative, AI tells).
+    * **0.2-0.5:** Likely fake or very low-effort, suspicious authentic (e.g., overly vague, some AI tells, unsubstantiated claims).
+    * **0.5-0.7:** Ambiguous / Neutral / Low-effort authentic (e.g., "It's fine," short but not suspicious, or reviews primarily about logistics with vague product comment).
+    * **0.7-0.9:** Likely authentic (e.g., some specific details, natural tone, minor flaws, or genuine mixed sentiment).
+    * **0.9-1.0:** Highly likely authentic (e.g., highly detailed, balanced, clear personal experience, nuanced human expression like sarcasm).
+6.  **Strict JSON Output:** Provide your final findings as a JSON object.
+
+Here are diverse, challenging examples (balanced for authentic/fake and covering edge cases) for precise analysis:
+
+{examples}
+Review: "{review_text}"
+Please analyze the authenticity of the above review.
+Provide your reasoning step-by-step in your thought process before giving the final analysis.
+Your final output MUST be ONLY a single JSON object with two keys:
+- "authenticity_score": a float between 0.0 (completely fake) and 1.0 (completely authentic).
+- "reasoning": a string explaining your analysis.
+
+Output JSON:
+"""
+
+# Packed variant of the Claude Authenticity prompt for bulk scoring: the same instructions and
+# examples, followed by several numbered reviews that are scored in one call as a JSON array.
+CLAUDE_PACKED_AUTHENTICITY_PROMPT_TEMPLATE = CLAUDE_AUTHENTICITY_PROMPT_TEMPLATE.split('Review: "{review_text}"')[0] + """Now analyze each of the {count} numbered reviews below on its own, applying the same criteria and scoring scale to each one.
+
+{numbered_reviews}
+
+Do not write out your thought process. Your output MUST be ONLY a JSON array with exactly one object per review, in order, each with three keys:
+- "index": the review's number.
+- "authenticity_score": a float between 0.0 (completely fake) and 1.0 (completely authentic).
+- "reasoning": one or two sentences citing the evidence for the score.
+"""
+
+# Fixed theme taxonomy for the map-reduce Clarity Engine. Chunks are classified against
+# these ids so per-chunk counts can be merged exactly; each alert is <= 15 words.
+CLARITY_THEMES = {
+    "sizing_runs_small": {"category": "sizing", "description": "runs small / too tight", "alert": "Customers suggest ordering a size up; this item runs small."},
+    "sizing_runs_large": {"category": "sizing", "description": "runs large / too loose", "alert": "Customers suggest ordering a size down; this item runs large."},
+    "sizing_inconsistent": {"category": "sizing", "description": "inconsistent or unpredictable sizing", "alert": "Be aware: customers report inconsistent sizing, so check the size chart carefully."},
+    "color_differs_from_photos": {"category": "color", "description": "color differs from the product photos", "alert": "Be aware: the color may look different from the product photos."},
+    "color_less_vibrant": {"category": "color", "description": "color is duller or less vibrant than expected", "alert": "Be aware: customers find the color less vibrant than expected."},
+    "material_feels_cheap": {"category": "material", "description": "material feels cheap or low quality", "alert": "Be aware: customers say the material feels cheaper than expected."},
+    "material_thinner_than_expected": {"category": "material", "description": "material is thinner than expected", "alert": "Be aware: customers report the material is thinner than expected."},
+    "assembly_difficult": {"category": "assembly", "description": "difficult or time-consuming to assemble", "alert": "Be aware: customers report assembly is difficult and time-consuming."},
+    "assembly_unclear_instructions": {"category": "assembly", "description": "assembly instructions are unclear or missing", "alert": "Be aware: customers report the assembly instructions are unclear."},
+}
+
+# Map step of the map-reduce Clarity Engine: classify one bounded chunk of numbered reviews.
+CLARITY_THEME_EXTRACTION_PROMPT_TEMPLATE = """
+Read the numbered customer reviews below. For each theme in the list, find the reviews that clearly complain about or warn of that theme.
+Only use these theme ids:
+{theme_list}
+
+Respond with ONLY a JSON object that maps each theme id that appears to the list of review numbers mentioning it, for example {{"sizing_runs_small": [1, 4]}}. If no theme appears, respond with {{}}. Do not invent themes.
+
+Reviews:
+---
+{numbered_reviews}
+---
+
+JSON:
+"""
+
+# Output-format repair for the Claude Authenticity Engine: re-asks only for the JSON verdict
+# when an analysis finished without a valid object, instead of rerunning the full prompt.
+CLAUDE_JSON_REPAIR_PROMPT_TEMPLATE = """
+Below is an analysis of a product review's authenticity. Convert its conclusion into a single JSON object with exactly two keys:
+- "authenticity_score": a float between 0.0 (completely fake) and 1.0 (completely authentic).
+- "reasoning": a string summarizing the analysis in one sentence.
+Respond with ONLY the JSON object.
+
+Analysis:
+---
+{raw_output}
+---
+"""
@@ -0,0 +1,275 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.utils import metrics
+
+# --- Bedrock scheduler settings (one limiter per model id, since quotas are per model) ---
+BEDROCK_SCHEDULER_ENABLED = os.environ.get("BEDROCK_SCHEDULER_ENABLED", "1") != "0"
+# A model's calls aren't rate limited until its first throttling signal; AIMD then starts from the
+# rate calls were actually starting at. A positive BEDROCK_RATE_INITIAL skips that phase and limits
+# from the start. AIMD keeps the rate within the min/max bounds (requests/second).
+BEDROCK_RATE_INITIAL = float(os.environ.get("BEDROCK_RATE_INITIAL", "0"))
+BEDROCK_RATE_MIN = float(os.environ.get("BEDROCK_RATE_MIN", "0.5"))
+BEDROCK_RATE_MAX = float(os.environ.get("BEDROCK_RATE_MAX", "100"))
+# Calls that may start back to back after an idle period.
+BEDROCK_RATE_BURST = float(os.environ.get("BEDROCK_RATE_BURST", "10"))
+# Additive increase in calls/s per second of successful calls (each success adds INCREASE / rate,
+# so growth stays linear however fast calls complete), and multiplicative decrease per throttling signal.
+BEDROCK_RATE_INCREASE = float(os.environ.get("BEDROCK_RATE_INCREASE", "1"))
+BEDROCK_RATE_DECREASE = float(os.environ.get("BEDROCK_RATE_DECREASE", "0.5"))
+# Throttles within this window of the last decrease are the same congestion event.
+BEDROCK_RATE_DECREASE_INTERVAL_SECONDS = 1.0
+# Queueing budget for one interactive request, shared by all of its model calls (see interactive_deadline()).
+BEDROCK_INTERACTIVE_MAX_WAIT_SECONDS = float(os.environ.get("BEDROCK_INTERACTIVE_MAX_WAIT_SECONDS", "5"))
+
+# Priority lanes, highest first: a call never starts while a higher lane has callers waiting.
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+LANES = (LANE_INTERACTIVE, LANE_BATCH)
+
+# Error codes Bedrock uses when it's over quota or out of capacity.
+THROTTLE_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+                        "ModelNotReadyException"}
+
+_MAX_POLL_SECONDS = 0.05
+# Window over which call starts are counted before the first throttling signal.
+_RATE_WINDOW_SECONDS = 1.0
+
+_lane = contextvars.ContextVar("bedrock_lane", default=LANE_INTERACTIVE)
+_deadline = contextvars.ContextVar("bedrock_deadline", default=None)
+
+
+class SchedulerDeadlineExceeded(Exception):
+    """Raised instead of queueing a call that can't start before its deadline."""
+
+
+@contextmanager
+def lane(name: str, deadline: float = None):
+    """
+    Runs the enclosed model calls in a priority lane, optionally with a deadline.
+
+    Args:
+        name (str): LANE_INTERACTIVE or LANE_BATCH.
+        deadline (float): time.monotonic() by which calls must have started, or None.
+    """
+    lane_token = _lane.set(name)
+    deadline_token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(deadline_token)
+        _lane.reset(lane_token)
+
+
+def current_deadline():
+    """The enclosing lane's deadline (a time.monotonic() value), or None if its calls may wait indefinitely."""
+    return _deadline.get()
+
+
+def interactive_deadline() -> float:
+    """Deadline for an interactive request; set it once per request so chained calls share the budget."""
+    return time.monotonic() + BEDROCK_INTERACTIVE_MAX_WAIT_SECONDS
+
+
+def is_throttle(error: Exception) -> bool:
+    response = getattr(error, "response", None) or {}
+    return (response.get("Error") or {}).get("Code") in THROTTLE_ERROR_CODES
+
+
+def model_error(error: Exception) -> dict:
+    """The error dict an engine returns for a failed model call; capacity problems are marked retryable."""
+    if isinstance(error, SchedulerDeadlineExceeded):
+        return {"error": f"Model capacity unavailable within the request's time budget: {error}", "retryable": True}
+    if is_throttle(error):
+        return {"error": "Model capacity is temporarily exhausted (throttled); please retry shortly.",
+                "retryable": True}
+    return {"error": f"Internal server error during analysis: {str(error)}"}
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket in front of one model, with an AIMD refill rate: successful calls raise the rate by
+    BEDROCK_RATE_INCREASE per second and each throttling signal multiplies it by BEDROCK_RATE_DECREASE,
+    so it settles just under the quota Bedrock actually grants instead of a guessed constant.
+
+    Until the first throttling signal (unless started with a `rate`), calls start immediately and
+    the limiter only counts them, so unthrottled traffic pays nothing. The first signal starts AIMD
+    at BEDROCK_RATE_DECREASE times the rate calls were starting at.
+
+    Callers queue FIFO within their lane, and a token goes to the head of the highest non-empty
+    lane, so interactive calls overtake queued batch work. A caller whose estimated queueing time
+    would run past its deadline fails fast with SchedulerDeadlineExceeded.
+    """
+
+    def __init__(self, name: str, rate: float = BEDROCK_RATE_INITIAL, min_rate: float = BEDROCK_RATE_MIN,
+                 max_rate: float = BEDROCK_RATE_MAX, burst: float = BEDROCK_RATE_BURST):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self._limited = rate > 0
+        self._rate = max(min_rate, min(rate, max_rate)) if self._limited else max_rate
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._starts = deque()
+        self._lock = threading.Lock()
+        self._queues = {lane_name: deque() for lane_name in LANES}
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def limited(self) -> bool:
+        """Whether AIMD is active, i.e. a rate was given or a throttling signal has been seen."""
+        return self._limited
+
+    def acquire(self):
+        """Blocks until a call may start in the current lane, or raises SchedulerDeadlineExceeded."""
+        ticket, lane_name, deadline, started = self._enqueue()
+        try:
+            delay = self._poll(ticket, lane_name, deadline)
+            while delay is not None:
+                time.sleep(delay)
+                delay = self._poll(ticket, lane_name, deadline)
+        finally:
+            self._dequeue(ticket, lane_name, started)
+
+    async def aacquire(self):
+        """Async counterpart of acquire(); waits on the event loop instead of a thread."""
+        ticket, lane_name, deadline, started = self._enqueue()
+        try:
+            delay = self._poll(ticket, lane_name, deadline)
+            while delay is not None:
+                await asyncio.sleep(delay)
+                delay = self._poll(ticket, lane_name, deadline)
+        finally:
+            self._dequeue(ticket, lane_name, started)
+
+    def on_success(self, retried: bool = False):
+        """Feeds back a completed call. Calls botocore had to retry count as a throttling signal."""
+        if retried:
+            self.on_throttle()
+            return
+        if not self._limited:
+            return
+        with self._lock:
+            # At `rate` successes per second this adds BEDROCK_RATE_INCREASE per second. Below 1 call/s
+            # each success adds at most BEDROCK_RATE_INCREASE.
+            self._rate = min(self.max_rate, self._rate + BEDROCK_RATE_INCREASE / max(self._rate, 1.0))
+            rate = self._rate
+        metrics.set_gauge("scheduler_rate", rate, model=self.name)
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease < BEDROCK_RATE_DECREASE_INTERVAL_SECONDS:
+                return
+            self._last_decrease = now
+            if self._limited:
+                self._refill(now)
+                rate = self._rate
+            else:
+                # First signal: the calls were starting faster than the quota, so decrease from that rate.
+                self._trim_starts(now)
+                rate = len(self._starts) / _RATE_WINDOW_SECONDS
+                self._starts.clear()
+                self._limited = True
+                self._updated = now
+            self._rate = max(self.min_rate, min(self.max_rate, rate * BEDROCK_RATE_DECREASE))
+            # Drop any saved-up burst so the backlog doesn't hit the quota again all at once.
+            self._tokens = min(self._tokens, 0.0)
+            rate = self._rate
+        metrics.inc("scheduler_throttle_signals_total", model=self.name)
+        metrics.set_gauge("scheduler_rate", rate, model=self.name)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"rate": round(self._rate, 3), "limited": self._limited,
+                    "waiting": {name: len(queue) for name, queue in self._queues.items()}}
+
+    def _enqueue(self):
+        ticket, lane_name, deadline = object(), _lane.get(), _deadline.get()
+        if lane_name not in self._queues:
+            lane_name = LANE_BATCH
+        started = time.monotonic()
+        with self._lock:
+            self._queues[lane_name].append(ticket)
+        return ticket, lane_name, deadline, started
+
+    def _dequeue(self, ticket, lane_name: str, started: float):
+        with self._lock:
+            try:
+                self._queues[lane_name].remove(ticket)
+            except ValueError:
+                pass
+        metrics.observe("scheduler", lane_name, time.monotonic() - started)
+
+    def _trim_starts(self, now: float):
+        while self._starts and self._starts[0] <= now - _RATE_WINDOW_SECONDS:
+            self._starts.popleft()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _poll(self, ticket, lane_name: str, deadline: float):
+        """None once the caller holds a token, otherwise how long to sleep before polling again."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._limited:
+                self._starts.append(now)
+                self._trim_starts(now)
+                return None
+            self._refill(now)
+            position = self._queues[lane_name].index(ticket)
+            for higher in LANES[:LANES.index(lane_name)]:
+                position += len(self._queues[higher])
+            if position == 0 and self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return None
+            # Everyone ahead needs a token first, so this is when this caller's token would arrive.
+            wait = (position + 1 - self._tokens) / self._rate
+            next_token = (1.0 - self._tokens) / self._rate
+            rate = self._rate
+        if deadline is not None and now + wait > deadline:
+            metrics.inc("scheduler_rejected_total", model=self.name, lane=lane_name)
+            raise SchedulerDeadlineExceeded(
+                f"{self.name} needs about {wait:.1f}s of queueing at {rate:.1f} calls/s, "
+                f"{max(0.0, deadline - now):.1f}s left")
+        return min(_MAX_POLL_SECONDS, max(0.001, next_token))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model_id: str) -> AdaptiveRateLimiter:
+    """The process-wide limiter for a model, created on first use."""
+    limiter = _limiters.get(model_id)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(model_id, AdaptiveRateLimiter(model_id))
+    return limiter
+
+
+def get_stats() -> dict:
+    """Current rate, whether it's limiting yet, and queue lengths per model."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.get_stats() for limiter in limiters}
+
+
+def record_gauges():
+    """Publishes get_stats() as gauges; called before each /metrics scrape."""
+    for model_id, stats in get_stats().items():
+        metrics.set_gauge("scheduler_rate", stats["rate"], model=model_id)
+        metrics.set_gauge("scheduler_limited", 1 if stats["limited"] else 0, model=model_id)
+        for lane_name, waiting in stats["waiting"].items():
+            metrics.set_gauge("scheduler_waiting", waiting, model=model_id, lane=lane_name)
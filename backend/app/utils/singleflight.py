@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from app.utils import metrics
+from app.utils.scheduler import current_deadline
+
+SINGLEFLIGHT_ENABLED = os.environ.get("AURA_SINGLEFLIGHT_ENABLED", "1") != "0"
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for a key is running, later callers with
+    the same key wait for its result instead of starting their own.
+
+    Sync (`do`) and async (`ado`) callers share the same in-flight table, so a request served
+    by a worker thread and one served on the event loop still coalesce. Nothing is kept once the
+    call completes, so coalescing never serves a stale result. Don't call `do` from the event
+    loop thread itself; it blocks while waiting.
+
+    The leader's call runs in the leader's scheduler lane, so a follower never waits past its own
+    deadline (see scheduler.lane()): once that passes, it makes the call itself under its own lane
+    and deadline. Followers do the same when `shareable` rejects the leader's result, e.g. an error
+    caused by the leader's deadline rather than the request.
+    """
+
+    def __init__(self, name: str, shareable=None):
+        self.name = name
+        self.shareable = shareable
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    def do(self, key: str, func, *args):
+        """Runs func(*args) unless an identical call is already in flight, and returns its result."""
+        if not SINGLEFLIGHT_ENABLED:
+            return func(*args)
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                result = future.result(timeout=self._wait_timeout())
+            except FutureTimeoutError:
+                self._record_fallback("deadline")
+                return func(*args)
+            if not self._is_shareable(result):
+                self._record_fallback("unshareable")
+                return func(*args)
+            return result
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self._finish(key, future, exception=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def ado(self, key: str, coro_func, *args):
+        """Async counterpart of do(): awaits coro_func(*args), or the identical call already in flight."""
+        if not SINGLEFLIGHT_ENABLED:
+            return await coro_func(*args)
+        future, leader = self._join(key)
+        if leader:
+            # The shared call runs as its own task, so one caller disconnecting can't cancel it
+            # for everyone else waiting on it.
+            task = asyncio.ensure_future(coro_func(*args))
+            task.add_done_callback(lambda done: self._finish_task(key, future, done))
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self._wait_timeout())
+        except asyncio.TimeoutError:
+            self._record_fallback("deadline")
+            return await coro_func(*args)
+        if not self._is_shareable(result):
+            self._record_fallback("unshareable")
+            return await coro_func(*args)
+        return result
+
+    @staticmethod
+    def _wait_timeout():
+        deadline = current_deadline()
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _is_shareable(self, result) -> bool:
+        return self.shareable is None or self.shareable(result)
+
+    def _record_fallback(self, reason: str):
+        metrics.inc("singleflight_fallbacks_total", flight=self.name, reason=reason)
+
+    def _join(self, key: str):
+        with self._lock:
+            self._calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self._coalesced += 1
+            ratio = self._coalesced / self._calls
+        metrics.inc("singleflight_calls_total", flight=self.name)
+        if not leader:
+            metrics.inc("singleflight_coalesced_total", flight=self.name)
+        metrics.set_gauge("singleflight_coalescing_ratio", ratio, flight=self.name)
+        return future, leader
+
+    def _finish(self, key: str, future: Future, result=None, exception: BaseException = None):
+        # Leave the table before publishing, so a caller arriving afterwards starts a fresh call
+        # (which normally hits the result cache the leader has just written).
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _finish_task(self, key: str, future: Future, task):
+        if task.cancelled():
+            self._finish(key, future, exception=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._finish(key, future, exception=task.exception())
+        else:
+            self._finish(key, future, result=task.result())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            calls, coalesced, in_flight = self._calls, self._coalesced, len(self._in_flight)
+        return {"calls": calls, "coalesced": coalesced, "in_flight": in_flight,
+                "coalescing_ratio": coalesced / calls if calls else 0.0}
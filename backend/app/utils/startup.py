@@ -0,0 +1,120 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Imported first by app.main, so this is as close to process start as application code gets.
+PROCESS_START = time.time()
+
+# Lazy mode (default): engine modules, boto3 clients and models load on first use or in warm_up().
+# Set AURA_LAZY_INIT=0 to import everything eagerly at module import time instead.
+LAZY_INIT = os.environ.get("AURA_LAZY_INIT", "1") != "0"
+# Comma-separated warm-up targets run by the init hook: "clarity", "authenticity", "fewshot".
+# "fewshot" is opt-in: loading torch and the embedding model can eat most of Lambda's 10 s init
+# budget, so by default the model loads on the first authenticity request that needs it.
+AURA_WARMUP = [t.strip() for t in os.environ.get("AURA_WARMUP", "clarity,authenticity").split(",") if t.strip()]
+
+_lock = threading.Lock()
+_import_times_ms = {}
+_warmup_times_ms = {}
+_first_response_ms = None
+
+
+def profile_import(module_name: str):
+    """Imports a module, recording how long the first (uncached) import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record_import_time(module_name, started)
+    return module
+
+
+def record_import_time(name: str, started: float):
+    """Records an import measured by the caller, `started` being a time.perf_counter() value."""
+    with _lock:
+        _import_times_ms.setdefault(name, round((time.perf_counter() - started) * 1000, 2))
+
+
+def record_first_response():
+    global _first_response_ms
+    if _first_response_ms is None:
+        with _lock:
+            if _first_response_ms is None:
+                _first_response_ms = round((time.time() - PROCESS_START) * 1000, 2)
+
+
+class FirstResponseMiddleware:
+    """Plain ASGI middleware that timestamps the first response start; a no-op afterwards."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _first_response_ms is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                record_first_response()
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+
+def _warm_clarity():
+    profile_import("app.services.titan_service")
+    profile_import("app.services.bedrock_client").get_bedrock_runtime()
+
+
+def _warm_authenticity():
+    profile_import("app.services.bedrock_service")
+    profile_import("app.services.bedrock_client").get_bedrock_runtime()
+
+
+def _warm_fewshot():
+    profile_import("app.services.fewshot_service").get_example_bank()
+
+
+_WARMUP_TARGETS = {
+    "clarity": _warm_clarity,
+    "authenticity": _warm_authenticity,
+    "fewshot": _warm_fewshot,
+}
+
+
+def warm_up(targets: list = None):
+    """
+    Init hook: loads the named engines ahead of the first request. Call it from the Lambda init
+    phase (handler import) or the uvicorn startup event. Targets that are already warm are
+    skipped, so calling it more than once is cheap.
+    """
+    for target in (AURA_WARMUP if targets is None else targets):
+        if target in _warmup_times_ms:
+            continue
+        warm = _WARMUP_TARGETS.get(target)
+        if warm is None:
+            print(f"WARNING: Unknown warm-up target '{target}'.")
+            continue
+        started = time.perf_counter()
+        try:
+            warm()
+        except Exception as e:
+            print(f"WARNING: Warm-up of '{target}' failed: {e}")
+            continue
+        with _lock:
+            _warmup_times_ms[target] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def get_startup_profile() -> dict:
+    with _lock:
+        return {
+            "lazy_init": LAZY_INIT,
+            "uptime_seconds": round(time.time() - PROCESS_START, 3),
+            "import_times_ms": dict(_import_times_ms),
+            "warmup_times_ms": dict(_warmup_times_ms),
+            "time_to_first_response_ms": _first_response_ms,
+        }
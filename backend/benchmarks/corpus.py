@@ -0,0 +1,92 @@
+import random
+
+# Building blocks for synthetic but realistic-looking marketplace reviews. The mix covers the
+# shapes the engines treat differently: specific first-hand reviews, generic praise the heuristic
+# prefilter catches, promotional spam, recycled copy-paste text and theme-bearing complaints
+# for the Clarity Engine.
+_PRODUCTS = ["denim jacket", "running shoes", "bookshelf", "desk lamp", "throw blanket", "office chair",
+             "linen shirt", "backpack", "coffee table", "yoga mat"]
+_DURATIONS = ["two weeks", "a month", "three months", "about ten days", "since March", "half a year"]
+_SPECIFIC_DETAILS = [
+    "The zipper on the left pocket started sticking after {n} days.",
+    "I'm {n} cm tall and the length was just right.",
+    "It took me {n} minutes to put together with the included Allen key.",
+    "After {n} washes the stitching still looks new.",
+    "The box arrived with a dented corner but the item itself was fine.",
+    "My partner uses it daily for {n}-hour shifts and hasn't complained.",
+]
+_THEME_COMPLAINTS = [
+    "It runs small, I had to size up.",
+    "Definitely runs large, order a size down.",
+    "The color is off, it looks nothing like the product photos and is different from the photo.",
+    "The fabric is thin and almost see-through.",
+    "Feels cheap and flimsy for the price.",
+    "It was hard to assemble and took hours to assemble.",
+    "The instructions were confusing and the manual was useless.",
+]
+_GENERIC_FAKES = [
+    "Amazing product! Best purchase ever. Highly recommend to everyone. Five stars!!!",
+    "Good product. Happy with the purchase. Would buy again.",
+    "Wow. This is the best {product} ever. I love it very much. Must buy!",
+    "Excellent quality, excellent seller, excellent price. Perfect perfect perfect.",
+]
+_SPAM = [
+    "Great {product}! Get yours cheaper at www.best-deals-outlet.example, use code SAVE50!!!",
+    "Love it!!! Visit http://promo.example/{product} for 70% off today only!!!",
+]
+
+
+def _authentic_review(rng: random.Random) -> str:
+    product = rng.choice(_PRODUCTS)
+    details = rng.sample(_SPECIFIC_DETAILS, 2)
+    parts = [f"I've had this {product} for {rng.choice(_DURATIONS)}."]
+    parts += [detail.format(n=rng.randint(2, 40)) for detail in details]
+    if rng.random() < 0.4:
+        parts.append(rng.choice(_THEME_COMPLAINTS))
+    parts.append(rng.choice(["Overall I'm satisfied.", "Would probably buy it again.",
+                             "Not perfect, but fair for what I paid.", "Three stars from me."]))
+    return " ".join(parts)
+
+
+def generate_reviews(count: int, seed: int = 0, duplicate_rate: float = 0.1, fake_rate: float = 0.25,
+                     spam_rate: float = 0.05) -> list:
+    """
+    Builds a deterministic review corpus.
+
+    Args:
+        count (int): Number of reviews to generate.
+        seed (int): Random seed; the same seed always yields the same corpus.
+        duplicate_rate (float): Share of reviews that repeat an earlier review (recycled text).
+        fake_rate (float): Share of generic, low-specificity praise.
+        spam_rate (float): Share of promotional spam with links or coupon codes.
+
+    Returns:
+        list: The review texts.
+    """
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(count):
+        roll = rng.random()
+        if reviews and roll < duplicate_rate:
+            review = rng.choice(reviews)
+        elif roll < duplicate_rate + spam_rate:
+            review = rng.choice(_SPAM).format(product=rng.choice(_PRODUCTS).replace(" ", "-"))
+        elif roll < duplicate_rate + spam_rate + fake_rate:
+            review = rng.choice(_GENERIC_FAKES).format(product=rng.choice(_PRODUCTS))
+        else:
+            review = _authentic_review(rng)
+        reviews.append(review)
+    return reviews
+
+
+def generate_product_reviews(count: int, seed: int = 0, theme_rate: float = 0.3) -> list:
+    """A single product's reviews for the Clarity Engine, with `theme_rate` carrying one recurring complaint."""
+    rng = random.Random(seed)
+    theme = rng.choice(_THEME_COMPLAINTS)
+    reviews = []
+    for _ in range(count):
+        review = _authentic_review(rng)
+        if rng.random() < theme_rate:
+            review = f"{review} {theme}"
+        reviews.append(review)
+    return reviews
@@ -0,0 +1,233 @@
+import io
+import json
+import random
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from app.utils.prompts import CLARITY_THEMES
+
+# Keyword cues the fake uses to "classify" reviews for the map-reduce Clarity Engine.
+_THEME_KEYWORDS = {
+    "sizing_runs_small": ("runs small", "too tight", "size up", "too small"),
+    "sizing_runs_large": ("runs large", "too loose", "size down", "too big"),
+    "color_differs_from_photos": ("different from the photo", "not the color", "color is off"),
+    "material_thinner_than_expected": ("thin", "see-through"),
+    "material_feels_cheap": ("feels cheap", "cheap material", "flimsy"),
+    "assembly_difficult": ("hard to assemble", "took hours to assemble", "assembly was a nightmare"),
+    "assembly_unclear_instructions": ("instructions", "manual was useless"),
+}
+_NUMBERED_REVIEW = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+_PACKED_REVIEW = re.compile(r'^(\d+)\. Review: "(.*)"$', re.MULTILINE)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class LatencyModel:
+    """Log-normal latency with a configurable median and spread, plus a per-output-token cost."""
+
+    def __init__(self, median_ms: float = 800.0, sigma: float = 0.5, per_token_ms: float = 0.0, seed: int = 0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.per_token_ms = per_token_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_byte_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            return self.median_ms * self._rng.lognormvariate(0.0, self.sigma) / 1000.0
+
+    def token_seconds(self, tokens: int) -> float:
+        return tokens * self.per_token_ms / 1000.0
+
+
+class _Body:
+    def __init__(self, payload: dict):
+        self._stream = io.BytesIO(json.dumps(payload).encode("utf-8"))
+
+    def read(self):
+        return self._stream.read()
+
+
+class _EventStream:
+    def __init__(self, pieces: list, metrics: dict, latency: LatencyModel):
+        self._pieces = pieces
+        self._metrics = metrics
+        self._latency = latency
+        self.closed = False
+
+    def __iter__(self):
+        for i, piece in enumerate(self._pieces):
+            if self.closed:
+                return
+            time.sleep(self._latency.token_seconds(_estimate_tokens(piece)))
+            chunk = {"completion": piece, "stop_reason": None}
+            if i == len(self._pieces) - 1:
+                chunk["stop_reason"] = "stop_sequence"
+                chunk["amazon-bedrock-invocationMetrics"] = self._metrics
+            yield {"chunk": {"bytes": json.dumps(chunk).encode("utf-8")}}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBedrockRuntime:
+    """
+    Local stand-in for the boto3 `bedrock-runtime` client, for benchmarks that must not touch AWS.
+
+    Understands the Titan (`inputText`) and Claude (`prompt`) body formats used by the engines and
+    answers each prompt type plausibly. Latency follows `latency`; `throttle_rate` of calls raise
+    ThrottlingException (the fake sits below botocore's retry handler, so treat it as the rate that
+    survives retries) and `malformed_rate` of Claude completions carry no JSON verdict. With
+    `quota_rps`, each model also throttles calls beyond that many per second, like a Bedrock quota.
+    Call and token counts are kept in `stats`.
+    """
+
+    def __init__(self, latency: LatencyModel = None, throttle_rate: float = 0.0, malformed_rate: float = 0.0,
+                 seed: int = 0, quota_rps: float = None):
+        self.latency = latency or LatencyModel(seed=seed)
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+        self.quota_rps = quota_rps
+        self._quota = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "stream_calls": 0, "throttled": 0, "input_tokens": 0, "output_tokens": 0}
+
+    # --- boto3 client surface ---
+
+    def invoke_model(self, body, modelId, accept=None, contentType=None):
+        request = json.loads(body)
+        payload, input_tokens, output_tokens = self._respond(modelId, request, "InvokeModel")
+        time.sleep(self.latency.first_byte_seconds() + self.latency.token_seconds(output_tokens))
+        return {
+            "body": _Body(payload),
+            "contentType": "application/json",
+            "ResponseMetadata": {
+                "HTTPStatusCode": 200,
+                "RetryAttempts": 0,
+                "HTTPHeaders": {
+                    "x-amzn-bedrock-input-token-count": str(input_tokens),
+                    "x-amzn-bedrock-output-token-count": str(output_tokens),
+                },
+            },
+        }
+
+    def invoke_model_with_response_stream(self, body, modelId, accept=None, contentType=None):
+        request = json.loads(body)
+        payload, input_tokens, output_tokens = self._respond(modelId, request, "InvokeModelWithResponseStream")
+        with self._lock:
+            self.stats["stream_calls"] += 1
+        text = payload.get("completion", "")
+        pieces = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+        metrics = {"inputTokenCount": input_tokens, "outputTokenCount": output_tokens}
+        time.sleep(self.latency.first_byte_seconds())
+        return {"body": _EventStream(pieces, metrics, self.latency), "contentType": "application/json",
+                "ResponseMetadata": {"HTTPStatusCode": 200, "RetryAttempts": 0, "HTTPHeaders": {}}}
+
+    # --- Response synthesis ---
+
+    def _respond(self, model_id: str, request: dict, operation: str):
+        with self._lock:
+            self.stats["calls"] += 1
+            throttled = self._rng.random() < self.throttle_rate or self._over_quota(model_id)
+            malformed = self._rng.random() < self.malformed_rate
+            if throttled:
+                self.stats["throttled"] += 1
+        if throttled:
+            time.sleep(self.latency.first_byte_seconds() * 0.1)
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, operation)
+
+        if "inputText" in request:
+            prompt = request["inputText"]
+            text = self._titan_output(prompt)
+            payload = {"results": [{"outputText": text, "tokenCount": _estimate_tokens(text)}]}
+        else:
+            prompt = request["prompt"]
+            text = self._claude_output(prompt, malformed)
+            payload = {"completion": text, "stop_reason": "stop_sequence"}
+
+        input_tokens, output_tokens = _estimate_tokens(prompt), _estimate_tokens(text)
+        with self._lock:
+            self.stats["input_tokens"] += input_tokens
+            self.stats["output_tokens"] += output_tokens
+        return payload, input_tokens, output_tokens
+
+    def _over_quota(self, model_id: str) -> bool:
+        # One-second token bucket per model; called with the lock held.
+        if not self.quota_rps:
+            return False
+        now = time.monotonic()
+        tokens, updated = self._quota.get(model_id, (self.quota_rps, now))
+        tokens = min(self.quota_rps, tokens + (now - updated) * self.quota_rps)
+        allowed = tokens >= 1.0
+        self._quota[model_id] = (tokens - 1.0 if allowed else tokens, now)
+        return not allowed
+
+    def _titan_output(self, prompt: str) -> str:
+        numbered = _NUMBERED_REVIEW.findall(prompt)
+        if numbered:
+            themes = {}
+            for number, review in numbered:
+                for theme_id in self._themes_in(review):
+                    themes.setdefault(theme_id, []).append(int(number))
+            return json.dumps(themes)
+        if "Clarity Alert:" in prompt:
+            reviews = [line for line in prompt.split("---")[1].splitlines() if line.strip()]
+            counts = {}
+            for review in reviews:
+                for theme_id in self._themes_in(review):
+                    counts[theme_id] = counts.get(theme_id, 0) + 1
+            if counts:
+                theme_id = max(counts, key=counts.get)
+                if counts[theme_id] >= 0.2 * len(reviews):
+                    return CLARITY_THEMES[theme_id]["alert"]
+            return "NO_ALERT"
+        # Titan authenticity prompt.
+        review = prompt.rsplit("Review to Analyze:", 1)[-1]
+        score = self._score(review)
+        return json.dumps({"authenticity_score": score, "key_positive_signals": [], "potential_concerns": []})
+
+    def _claude_output(self, prompt: str, malformed: bool) -> str:
+        if "Convert its conclusion into a single JSON object" in prompt:
+            # Format-repair prompt: the reply continues the prefilled "{".
+            return ' "authenticity_score": 0.5, "reasoning": "Recovered from an unstructured analysis."}'
+        if "ONLY a JSON array" in prompt:
+            return self._packed_output(prompt, malformed)
+        review = prompt.rsplit('Review: "', 1)[-1].split('"\nPlease analyze', 1)[0]
+        score = self._score(review)
+        reasoning = ("The review was read for specificity, personal experience and promotional tone. "
+                     f"It contains {len(review.split())} words and "
+                     f"{'concrete details' if score >= 0.5 else 'mostly generic claims'}.")
+        if malformed:
+            return f"{reasoning} Overall I would put the authenticity around {score}."
+        verdict = json.dumps({"authenticity_score": score, "reasoning": reasoning})
+        return f"{reasoning}\n{verdict}\nThis concludes the analysis."
+
+    def _packed_output(self, prompt: str, malformed: bool) -> str:
+        # The reply continues the prefilled "[". A malformed reply is cut off mid-array.
+        items = []
+        for number, review in _PACKED_REVIEW.findall(prompt.split("numbered reviews below", 1)[-1]):
+            score = self._score(review)
+            items.append(json.dumps({"index": int(number), "authenticity_score": score,
+                                     "reasoning": f"{len(review.split())} words with "
+                                                  f"{'concrete details' if score >= 0.5 else 'mostly generic claims'}."}))
+        text = ", ".join(items) + "]"
+        return text[:len(text) // 2] if malformed else text
+
+    @staticmethod
+    def _themes_in(review: str) -> list:
+        review = review.lower()
+        return [theme_id for theme_id, cues in _THEME_KEYWORDS.items() if any(cue in review for cue in cues)]
+
+    @staticmethod
+    def _score(review: str) -> float:
+        words = len(review.split())
+        specific = sum(ch.isdigit() for ch in review) > 0 or " i " in f" {review.lower()} "
+        return round(min(0.95, 0.3 + words / 100.0 + (0.3 if specific else 0.0)), 2)
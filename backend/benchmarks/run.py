@@ -0,0 +1,274 @@
+"""
+Offline load test for the backend.
+
+Swaps the shared bedrock-runtime client for FakeBedrockRuntime, then drives the FastAPI app either
+directly over ASGI (as uvicorn would) or through the Mangum `handler` with API Gateway events (as
+Lambda would), and reports throughput, latency percentiles and Bedrock calls/tokens per request.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.run --scenario authenticity --driver asgi --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_product_reviews, generate_reviews
+
+SCENARIOS = {
+    "authenticity": "/api/v1/analyze_review_authenticity",
+    "authenticity_stream": "/api/v1/analyze_review_authenticity/stream",
+    "batch": "/api/v1/analyze_reviews_authenticity",
+    "clarity": "/api/v1/generate_clarity_alert",
+}
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test against a local Bedrock stand-in.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="authenticity")
+    parser.add_argument("--driver", choices=["asgi", "mangum", "both"], default="asgi",
+                        help="asgi drives the app in-process; mangum goes through handler.handler.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Concurrent in-flight requests for the asgi driver. A Lambda container serves "
+                             "one request at a time, so the mangum driver always runs sequentially.")
+    parser.add_argument("--warmup-requests", type=int, default=5, help="Unmeasured requests sent first.")
+    parser.add_argument("--batch-size", type=int, default=20, help="Reviews per request for the batch scenario.")
+    parser.add_argument("--reviews-per-product", type=int, default=40, help="Reviews per clarity request.")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median Bedrock time to first byte.")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread of that latency.")
+    parser.add_argument("--per-token-ms", type=float, default=0.0, help="Extra latency per output token.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--quota-rps", type=float, default=None,
+                        help="Per-model calls/second the stand-in accepts before throttling.")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Setting applied before the app is imported, e.g. AURA_CACHE_ENABLED=0.")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file.")
+    return parser.parse_args(argv)
+
+
+def _configure_environment(args):
+    # Keep the persistent tiers in a scratch directory so runs never see each other's state.
+    scratch = tempfile.mkdtemp(prefix="aura-bench-")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ.setdefault("AURA_CACHE_DB_PATH", os.path.join(scratch, "result_cache.sqlite3"))
+    os.environ.setdefault("DEDUP_INDEX_PATH", os.path.join(scratch, "dedup_index.npz"))
+    os.environ.setdefault("FEWSHOT_RUNTIME_EMBEDDINGS_PATH", os.path.join(scratch, "fewshot.npz"))
+    for setting in args.env:
+        key, _, value = setting.partition("=")
+        os.environ[key] = value
+
+
+def _build_payloads(args, count: int, offset: int = 0) -> list:
+    if args.scenario == "clarity":
+        return [{"reviews": generate_product_reviews(args.reviews_per_product, seed=args.seed + offset + i)}
+                for i in range(count)]
+    if args.scenario == "batch":
+        reviews = generate_reviews(count * args.batch_size, seed=args.seed + offset,
+                                   duplicate_rate=args.duplicate_rate)
+        return [{"reviews": reviews[i * args.batch_size:(i + 1) * args.batch_size]} for i in range(count)]
+    reviews = generate_reviews(count, seed=args.seed + offset, duplicate_rate=args.duplicate_rate)
+    return [{"review_text": review} for review in reviews]
+
+
+def _count_errors(status: int, body: bytes) -> int:
+    """Number of failed reviews in a response; the engines report most failures inside a 200 body."""
+    if status >= 400:
+        return 1
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        # Server-sent events: one 'error' key in the final result event.
+        return 1 if b'"error"' in body else 0
+    if isinstance(payload, dict) and "results" in payload:
+        return sum(1 for item in payload["results"] if "error" in item)
+    return 1 if isinstance(payload, dict) and "error" in payload else 0
+
+
+# --- Drivers ---
+
+async def _asgi_request(app, path: str, payload: dict):
+    body = json.dumps(payload).encode("utf-8")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode("utf-8"), "query_string": b"",
+        "root_path": "", "client": ("127.0.0.1", 50000), "server": ("benchmark", 80),
+        "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"origin", b"http://localhost:3000")],
+    }
+    request_sent = False
+    response = {"status": 500, "chunks": [], "first_byte": None}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The client never disconnects; the app cancels this wait when the response completes.
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if response["first_byte"] is None:
+                response["first_byte"] = time.perf_counter()
+            response["chunks"].append(message["body"])
+
+    await app(scope, receive, send)
+    return response["status"], b"".join(response["chunks"]), response["first_byte"]
+
+
+async def _run_asgi(app, args, path: str, payloads: list) -> list:
+    queue = list(enumerate(payloads))
+    samples = [None] * len(payloads)
+
+    async def worker():
+        while queue:
+            index, payload = queue.pop()
+            started = time.perf_counter()
+            status, body, first_byte = await _asgi_request(app, path, payload)
+            finished = time.perf_counter()
+            samples[index] = (finished - started, (first_byte or finished) - started, _count_errors(status, body))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, args.concurrency))))
+    return samples
+
+
+def _api_gateway_event(path: str, payload: dict) -> dict:
+    headers = {"content-type": "application/json", "host": "benchmark.execute-api.us-east-1.amazonaws.com",
+               "origin": "http://localhost:3000"}
+    return {
+        "resource": "/{proxy+}", "path": path, "httpMethod": "POST",
+        "headers": headers, "multiValueHeaders": {k: [v] for k, v in headers.items()},
+        "queryStringParameters": None, "multiValueQueryStringParameters": None,
+        "pathParameters": {"proxy": path.lstrip("/")}, "stageVariables": None,
+        "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "POST", "path": f"/prod{path}",
+                           "stage": "prod", "requestId": "benchmark", "identity": {"sourceIp": "127.0.0.1"}},
+        "body": json.dumps(payload), "isBase64Encoded": False,
+    }
+
+
+def _run_mangum(handler, path: str, payloads: list) -> list:
+    # Mangum runs each invocation on the thread's current event loop, which the Lambda runtime
+    # provides but asyncio.run() clears on exit.
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    samples = []
+    for payload in payloads:
+        event = _api_gateway_event(path, payload)
+        started = time.perf_counter()
+        response = handler(event, None)
+        elapsed = time.perf_counter() - started
+        body = response.get("body") or ""
+        # Mangum buffers the whole response, so time to first byte equals total latency.
+        samples.append((elapsed, elapsed, _count_errors(response.get("statusCode", 500), body.encode("utf-8"))))
+    return samples
+
+
+# --- Reporting ---
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def _report(driver: str, args, samples: list, elapsed: float, calls_before: dict, calls_after: dict) -> dict:
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    first_bytes = sorted(sample[1] * 1000 for sample in samples)
+    count = len(samples)
+    reviews_per_request = args.batch_size if args.scenario == "batch" else 1
+    delta = {key: calls_after[key] - calls_before[key] for key in calls_after}
+    return {
+        "scenario": args.scenario,
+        "driver": driver,
+        "requests": count,
+        "concurrency": 1 if driver == "mangum" else args.concurrency,
+        "duration_s": round(elapsed, 3),
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {p: round(_percentile(latencies, float(p[1:])), 1) for p in ("p50", "p95", "p99")},
+        "latency_max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "first_byte_ms": {p: round(_percentile(first_bytes, float(p[1:])), 1) for p in ("p50", "p95")},
+        "failed_reviews": sum(sample[2] for sample in samples),
+        "reviews": count * reviews_per_request,
+        "bedrock_calls_per_request": round(delta["calls"] / count, 3) if count else 0.0,
+        "stream_calls_per_request": round(delta["stream_calls"] / count, 3) if count else 0.0,
+        "throttled_calls": delta["throttled"],
+        "input_tokens_per_request": round(delta["input_tokens"] / count, 1) if count else 0.0,
+        "output_tokens_per_request": round(delta["output_tokens"] / count, 1) if count else 0.0,
+    }
+
+
+def _print_report(report: dict):
+    print(f"\n== {report['scenario']} via {report['driver']} "
+          f"({report['requests']} requests, concurrency {report['concurrency']}) ==")
+    print(f"  throughput        {report['rps']} req/s over {report['duration_s']} s")
+    latency = report["latency_ms"]
+    print(f"  latency (ms)      p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  "
+          f"max {report['latency_max_ms']}")
+    print(f"  first byte (ms)   p50 {report['first_byte_ms']['p50']}  p95 {report['first_byte_ms']['p95']}")
+    print(f"  failed reviews    {report['failed_reviews']} of {report['reviews']}")
+    print(f"  bedrock calls     {report['bedrock_calls_per_request']}/request "
+          f"({report['stream_calls_per_request']} streamed, {report['throttled_calls']} throttled)")
+    print(f"  tokens            {report['input_tokens_per_request']} in / "
+          f"{report['output_tokens_per_request']} out per request")
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    _configure_environment(args)
+
+    # Inject the stand-in before the app is imported, so warm-up and every engine use it.
+    from benchmarks.fake_bedrock import FakeBedrockRuntime, LatencyModel
+    from app.services import bedrock_client
+    fake = FakeBedrockRuntime(
+        latency=LatencyModel(args.latency_ms, args.latency_sigma, args.per_token_ms, seed=args.seed),
+        throttle_rate=args.throttle_rate, malformed_rate=args.malformed_rate, seed=args.seed,
+        quota_rps=args.quota_rps,
+    )
+    bedrock_client.set_bedrock_runtime(fake)
+
+    from app.main import app
+    from app.utils import startup
+    startup.warm_up()
+
+    path = SCENARIOS[args.scenario]
+    drivers = ["asgi", "mangum"] if args.driver == "both" else [args.driver]
+    reports = []
+    for run, driver in enumerate(drivers):
+        # Fresh corpus per driver so the second run isn't served entirely from the first one's cache.
+        offset = run * 100003
+        warmup = _build_payloads(args, args.warmup_requests, offset=offset + 50021)
+        payloads = _build_payloads(args, args.requests, offset=offset)
+        if driver == "asgi":
+            asyncio.run(_run_asgi(app, args, path, warmup))
+            calls_before = dict(fake.stats)
+            started = time.perf_counter()
+            samples = asyncio.run(_run_asgi(app, args, path, payloads))
+        else:
+            from handler import handler
+            _run_mangum(handler, path, warmup)
+            calls_before = dict(fake.stats)
+            started = time.perf_counter()
+            samples = _run_mangum(handler, path, payloads)
+        report = _report(driver, args, samples, time.perf_counter() - started, calls_before, dict(fake.stats))
+        _print_report(report)
+        reports.append(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,18 @@
+import time
+_handler_import_started = time.perf_counter()
+
 from app.main import app  # Imports the FastAPI 'app' instance
+from app.utils import metrics, startup
 from mangum import Mangum
 
 # Mangum is the bridge between the AWS Lambda event and our FastAPI app.
 # The 'handler' is the object that AWS Lambda will invoke.
-handler = Mangum(app)
\ No newline at end of file
+# Lifespan events are off: Mangum would run startup/shutdown around every invocation,
+# and the app's shutdown hooks are meant for long-running uvicorn processes.
+# The wrapper times Mangum's own overhead and writes one structured metric log line per invocation.
+handler = metrics.instrument_lambda_handler(Mangum(app, lifespan="off"))
+
+# Record how long importing the app took, then warm the AURA_WARMUP engines while still in the
+# Lambda init phase, so the first invocation doesn't pay for it.
+startup.record_import_time("handler", _handler_import_started)
+startup.warm_up()
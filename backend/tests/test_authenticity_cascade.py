@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import bedrock_service, titan_service
+
+CLEAR = ["Clear review one, arrived on time.", "Clear review two, fits as described."]
+AMBIGUOUS = ["Ambiguous review one, it is okay I guess.", "Ambiguous review two, not sure yet."]
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """Titan settles reviews starting with "Clear"; Claude answers packed calls for the rest."""
+    calls = {"titan": [], "claude": []}
+    for setting in ("CACHE_ENABLED", "DEDUP_ENABLED", "HEURISTIC_PREFILTER_ENABLED"):
+        monkeypatch.setattr(bedrock_service, setting, False)
+    monkeypatch.setattr(bedrock_service, "AUTHENTICITY_CASCADE_ENABLED", True)
+    monkeypatch.setattr(bedrock_service, "_build_packed_body", lambda texts: {"reviews": list(texts)})
+
+    def titan(review_text):
+        calls["titan"].append(review_text)
+        score = 0.95 if review_text.startswith("Clear") else 0.5
+        return {"authenticity_score": score, "key_positive_signals": [], "potential_concerns": []}
+
+    async def atitan(review_text):
+        return titan(review_text)
+
+    def claude(model_id, body):
+        calls["claude"].append(body["reviews"])
+        items = [{"index": number, "authenticity_score": 0.6, "reasoning": "Escalated."}
+                 for number in range(1, len(body["reviews"]) + 1)]
+        return {"completion": json.dumps(items)[1:]}
+
+    async def aclaude(model_id, body):
+        return claude(model_id, body)
+
+    monkeypatch.setattr(bedrock_service, "analyze_review_authenticity", titan)
+    monkeypatch.setattr(bedrock_service, "aanalyze_review_authenticity", atitan)
+    monkeypatch.setattr(bedrock_service, "invoke_model", claude)
+    monkeypatch.setattr(bedrock_service, "ainvoke_model", aclaude)
+    return calls
+
+
+def _check(results, calls):
+    assert [result["tier"] for result in results] == ["titan", "claude", "titan", "claude"]
+    assert sorted(calls["titan"]) == sorted(CLEAR + AMBIGUOUS)
+    # Only the escalated reviews are packed, in a single Claude call.
+    assert calls["claude"] == [[AMBIGUOUS[0], AMBIGUOUS[1]]]
+
+
+def test_packed_scoring_routes_through_titan_first(models):
+    reviews = [CLEAR[0], AMBIGUOUS[0], CLEAR[1], AMBIGUOUS[1]]
+    _check(bedrock_service.analyze_reviews_packed(reviews), models)
+
+
+def test_async_packed_scoring_routes_through_titan_first(models):
+    reviews = [CLEAR[0], AMBIGUOUS[0], CLEAR[1], AMBIGUOUS[1]]
+    _check(asyncio.run(bedrock_service.aanalyze_reviews_packed(reviews)), models)
+
+
+@pytest.mark.parametrize("output_text", [
+    '{"authenticity_score": 0.9, "key_positive_signals": ["detail"]}',
+    'Here is the analysis:\n```json\n{"authenticity_score": 0.9, "key_positive_signals": ["detail"]}\n```',
+])
+def test_titan_authenticity_output_is_parsed_leniently(output_text):
+    parsed = titan_service._parse_authenticity({"results": [{"outputText": output_text}]})
+    assert parsed == {"authenticity_score": 0.9, "key_positive_signals": ["detail"]}
+
+
+def test_unparsable_titan_output_is_an_error():
+    assert "error" in titan_service._parse_authenticity({"results": [{"outputText": "No JSON here."}]})
+    assert "error" in titan_service._parse_authenticity({})
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.services import batch_service
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    """Scores a review by its text: "slow N" sleeps N seconds, "boom" raises, "bad" returns an error dict."""
+    seen_ids = []
+
+    async def analyze(review_text, review_id=None):
+        seen_ids.append(review_id)
+        if review_text.startswith("slow"):
+            await asyncio.sleep(float(review_text.split()[1]))
+        if review_text == "boom":
+            raise RuntimeError("unexpected")
+        if review_text == "bad":
+            return {"error": "Model returned malformed JSON."}
+        return {"authenticity_score": 0.5, "reasoning": review_text}
+
+    monkeypatch.setattr(batch_service, "AUTHENTICITY_PACKING", False)
+    monkeypatch.setattr(batch_service, "aget_authenticity_analysis", analyze)
+    return seen_ids
+
+
+def _run(*args, **kwargs):
+    return asyncio.run(batch_service.aanalyze_reviews_batch(*args, **kwargs))
+
+
+def test_results_come_back_in_input_order(analyses):
+    reviews = ["slow 0.05", "slow 0.01", "fast", "slow 0.03"]
+    results = _run(reviews, max_concurrency=4)
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["reasoning"] for result in results] == reviews
+
+
+def test_failures_stay_with_their_own_item(analyses):
+    results = _run(["fine", "boom", "bad", "also fine"])
+    assert "error" not in results[0] and "error" not in results[3]
+    assert results[1]["error"].startswith("Internal server error during analysis")
+    assert results[2]["error"] == "Model returned malformed JSON."
+
+
+def test_review_ids_are_passed_through(analyses):
+    _run(["one", "two"], max_concurrency=1, review_ids=["R1", "R2"])
+    assert analyses == ["R1", "R2"]
+
+
+def test_mismatched_review_ids_reject_the_batch(analyses):
+    assert "error" in _run(["one", "two"], review_ids=["R1"])
+    assert analyses == []
+
+
+def test_oversized_batch_is_rejected(analyses, monkeypatch):
+    monkeypatch.setattr(batch_service, "MAX_BATCH_REVIEWS", 2)
+    assert "error" in _run(["one", "two", "three"])
+    assert analyses == []
+
+
+def test_items_past_the_timeout_are_reported_as_timed_out(analyses):
+    results = _run(["fast", "slow 5"], timeout_seconds=0.2)
+    assert results[0]["reasoning"] == "fast"
+    assert "did not complete" in results[1]["error"]
+    assert results[1]["index"] == 1
+
+
+def test_empty_batch(analyses):
+    assert _run([]) == []
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from app.utils import cache
+from app.utils.cache import ResultCache, _SQLiteTier, make_cache_key, normalize_text, prompt_version
+
+
+class _Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+def test_entries_expire_from_both_tiers(tmp_path, clock):
+    results = ResultCache(max_entries=10, ttl_seconds=60, db_path=str(tmp_path / "cache.sqlite3"))
+    results.put("key", {"authenticity_score": 0.4})
+    assert results.get("key") == (True, {"authenticity_score": 0.4})
+
+    clock.now += 61
+    assert results.get("key") == (False, None)
+    assert results.disk.get("key") is None
+
+
+def test_disk_hits_are_promoted_to_memory_with_their_original_expiry(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    ResultCache(ttl_seconds=60, db_path=path).put("key", {"value": 1})
+
+    # A new process (e.g. a fresh Lambda container) only has the SQLite file.
+    results = ResultCache(ttl_seconds=60, db_path=path)
+    assert results.get("key") == (True, {"value": 1})
+    assert results.get("key") == (True, {"value": 1})
+    assert results.get_stats()["disk_hits"] == 1
+    assert results.get_stats()["memory_hits"] == 1
+
+    clock.now += 61
+    assert results.get("key") == (False, None)
+
+
+def test_none_is_a_cacheable_value(tmp_path):
+    results = ResultCache(db_path=str(tmp_path / "cache.sqlite3"))
+    results.put("no-alert", None)
+    assert results.get("no-alert") == (True, None)
+    assert results.get("missing") == (False, None)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    results = ResultCache(max_entries=2, db_path="")
+    results.put("a", 1)
+    results.put("b", 2)
+    results.get("a")
+    results.put("c", 3)
+    assert results.get("b") == (False, None)
+    assert results.get("a") == (True, 1)
+
+
+def test_prune_drops_expired_rows_then_the_soonest_expiring(tmp_path, clock):
+    tier = _SQLiteTier(str(tmp_path / "cache.sqlite3"), max_entries=2, prune_interval=3600)
+    tier.put("expired", 0, clock.now - 1)
+    for number in range(3):
+        tier.put(f"live{number}", number, clock.now + 10 + number)
+    tier.prune()
+    assert tier.get("expired") is None
+    assert tier.get("live0") is None
+    assert [tier.get(f"live{number}")[1] for number in (1, 2)] == [1, 2]
+
+
+def test_prompt_version_change_invalidates_keys(tmp_path):
+    results = ResultCache(db_path=str(tmp_path / "cache.sqlite3"))
+    text = normalize_text("  Runs small, had to size up. ")
+    old_key = make_cache_key("authenticity", "model", prompt_version("Prompt v1"), text)
+    results.put(old_key, {"authenticity_score": 0.9})
+
+    assert make_cache_key("authenticity", "model", prompt_version("Prompt v1"), text) == old_key
+    new_key = make_cache_key("authenticity", "model", prompt_version("Prompt v2"), text)
+    assert new_key != old_key
+    assert results.get(new_key) == (False, None)
+    assert make_cache_key("authenticity", "other-model", prompt_version("Prompt v1"), text) != old_key
+
+
+def test_normalized_text_shares_a_key():
+    assert normalize_text("Runs   small.\n") == normalize_text("Runs small.")
+    assert normalize_text("Café") == normalize_text("Café")
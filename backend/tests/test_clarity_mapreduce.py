@@ -0,0 +1,50 @@
+import pytest
+
+from app.services import titan_service
+from app.utils.cache import ResultCache
+
+CHUNK = [(0, "Runs small."), (1, "Great fabric."), (2, "Size up, it's tight.")]
+
+
+def _titan(output_text):
+    return {"results": [{"outputText": output_text}]}
+
+
+def test_chunk_themes_ignore_stray_braces_in_the_text():
+    output = 'Reviews {1 and 3} mention sizing. {"sizing_runs_small": [1, 3], "not_a_theme": [2]} Done }'
+    assert titan_service._parse_chunk_themes(CHUNK, _titan(output)) == {"sizing_runs_small": {0, 2}}
+
+
+def test_chunk_themes_accept_an_empty_object_and_reject_no_object():
+    assert titan_service._parse_chunk_themes(CHUNK, _titan("{}")) == {}
+    with pytest.raises(ValueError):
+        titan_service._parse_chunk_themes(CHUNK, _titan("No themes found."))
+
+
+@pytest.fixture
+def mapreduce(monkeypatch):
+    results = ResultCache(db_path="")
+    monkeypatch.setattr(titan_service, "CACHE_ENABLED", True)
+    monkeypatch.setattr(titan_service, "get_result_cache", lambda: results)
+    monkeypatch.setattr(titan_service, "CLARITY_MAPREDUCE_MODE", "always")
+    monkeypatch.setattr(titan_service, "CLARITY_CHUNK_TOKEN_BUDGET", 5)
+    return results
+
+
+def test_partial_mapreduce_alert_is_not_cached(mapreduce, monkeypatch):
+    reviews = ["Runs small, size up.", "Runs small, very tight.", "Fabric is nice and soft."]
+
+    def invoke(model_id, body):
+        if "Fabric" in body["inputText"]:
+            raise RuntimeError("throttled")
+        return _titan('{"sizing_runs_small": [1]}')
+
+    monkeypatch.setattr(titan_service, "invoke_model", invoke)
+    alert = titan_service.generate_clarity_alert(reviews)
+    assert alert == titan_service.CLARITY_THEMES["sizing_runs_small"]["alert"]
+    assert mapreduce.get(titan_service._clarity_cache_key(reviews)) == (False, None)
+
+    monkeypatch.setattr(titan_service, "invoke_model", lambda model_id, body: _titan(
+        '{"sizing_runs_small": [1]}' if "small" in body["inputText"] else "{}"))
+    titan_service.generate_clarity_alert(reviews)
+    assert mapreduce.get(titan_service._clarity_cache_key(reviews))[0] is True
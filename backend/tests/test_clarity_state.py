@@ -0,0 +1,73 @@
+import pytest
+
+from app.services import clarity_state_service
+from app.utils.clarity_store import ClarityStateStore, set_clarity_store
+
+SMALL = "Runs small, had to size up."
+FADED = "The color looks nothing like the photos."
+
+
+@pytest.fixture
+def classified(monkeypatch):
+    """Classifies reviews mentioning "small" or "color"; records what was sent to the model."""
+    sent = []
+
+    def classify(reviews):
+        sent.append(list(reviews))
+        themes = {}
+        for index, review in enumerate(reviews):
+            if "small" in review:
+                themes.setdefault("sizing_runs_small", []).append(index)
+            if "color" in review:
+                themes.setdefault("color_differs_from_photos", []).append(index)
+        return themes, set(range(len(reviews)))
+
+    set_clarity_store(ClarityStateStore(":memory:"))
+    monkeypatch.setattr(clarity_state_service, "classify_review_themes", classify)
+    yield sent
+    set_clarity_store(None)
+
+
+def test_only_unseen_reviews_are_classified_and_counted(classified):
+    first = clarity_state_service.update_product_clarity("P1", [SMALL, SMALL + " Again.", FADED])
+    assert first["review_count"] == 3
+    assert first["dominant_theme"] == "sizing_runs_small"
+    assert first["alert_changed"] is True
+
+    # Resent text (even re-spaced) is skipped; only the new review reaches the model.
+    second = clarity_state_service.update_product_clarity("P1", ["Runs  small, had to size up.", FADED + " Sadly."])
+    assert classified[-1] == [FADED + " Sadly."]
+    assert second["new_reviews"] == 1
+    assert second["theme_counts"] == {"sizing_runs_small": 2, "color_differs_from_photos": 2}
+    assert second["alert_changed"] is False
+
+
+def test_review_ids_identify_reviews(classified):
+    clarity_state_service.update_product_clarity("P1", [SMALL], review_ids=["R1"])
+    update = clarity_state_service.update_product_clarity("P1", [SMALL, SMALL], review_ids=["R1", "R2"])
+    assert update["new_reviews"] == 1
+    assert "error" in clarity_state_service.update_product_clarity("P1", [SMALL], review_ids=[])
+
+
+def test_products_are_independent_and_readable_without_a_model_call(classified):
+    clarity_state_service.update_product_clarity("P1", [SMALL])
+    clarity_state_service.update_product_clarity("P2", [FADED])
+    calls = len(classified)
+    state = clarity_state_service.get_product_clarity("P2")
+    assert len(classified) == calls
+    assert state["dominant_theme"] == "color_differs_from_photos"
+    assert "error" in clarity_state_service.get_product_clarity("P3")
+
+
+def test_store_counts_a_key_once():
+    store = ClarityStateStore(":memory:")
+
+    def fold(previous, fresh):
+        count = (previous["review_count"] if previous else 0) + len(fresh)
+        return {"review_count": count, "theme_counts": {}, "dominant_theme": None, "alert": None}
+
+    store.apply_delta("P1", {"a": [], "b": []}, fold)
+    previous, state = store.apply_delta("P1", {"b": [], "c": []}, fold)
+    assert previous["review_count"] == 2
+    assert state["review_count"] == 3
+    assert store.unseen_keys("P1", ["a", "c", "d"]) == {"d"}
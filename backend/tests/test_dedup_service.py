@@ -0,0 +1,42 @@
+import pytest
+
+from app.services import dedup_service
+from app.utils.minhash import MinHashLSHIndex
+
+REVIEW = "Absolutely love it, best purchase ever, five stars, would recommend to everyone!"
+VERDICT = {"authenticity_score": 0.8, "reasoning": "Reads like a genuine customer.", "source": "llm"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(dedup_service, "DEDUP_INDEX_PATH", "")
+    monkeypatch.setattr(dedup_service, "_index", MinHashLSHIndex(64, 8, 1000))
+
+
+def test_repeated_identical_anonymous_submissions_are_never_penalized():
+    for _ in range(dedup_service.DEDUP_RECYCLED_CLUSTER_SIZE * 3):
+        verdict = dedup_service.record_review("  " + REVIEW.upper().lower() + "\n", VERDICT)
+    assert verdict["duplicate_cluster"]["size"] == 1
+    assert verdict["authenticity_score"] == VERDICT["authenticity_score"]
+
+
+def test_distinct_near_duplicate_wordings_cap_the_score():
+    for number in range(dedup_service.DEDUP_RECYCLED_CLUSTER_SIZE):
+        verdict = dedup_service.record_review(f"{REVIEW} Order {number}.", VERDICT)
+    assert verdict["duplicate_cluster"]["size"] == dedup_service.DEDUP_RECYCLED_CLUSTER_SIZE
+    assert verdict["authenticity_score"] == dedup_service.DEDUP_RECYCLED_SCORE_CAP
+
+
+def test_re_scoring_the_same_review_id_is_not_recycling():
+    for _ in range(dedup_service.DEDUP_RECYCLED_CLUSTER_SIZE + 1):
+        verdict = dedup_service.record_review(REVIEW, VERDICT, review_id="R1")
+    assert verdict["duplicate_cluster"]["size"] == 1
+    assert verdict["authenticity_score"] == VERDICT["authenticity_score"]
+
+
+def test_ring_size_is_capped_by_the_memory_budget(monkeypatch):
+    monkeypatch.setattr(dedup_service, "DEDUP_MAX_MEMORY_MB", 1)
+    assert dedup_service._max_entries() == 1024 * 1024 // MinHashLSHIndex.estimated_entry_bytes(
+        dedup_service.DEDUP_NUM_PERM, dedup_service.DEDUP_BANDS)
+    monkeypatch.setattr(dedup_service, "DEDUP_MAX_ENTRIES", 10)
+    assert dedup_service._max_entries() == 10
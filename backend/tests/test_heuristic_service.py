@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from app.services.heuristic_service import HEURISTIC_FAKE_THRESHOLD, prefilter_review, score_review
+
+_EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "authenticity_examples.json")
+
+
+def _bank_review(fragment: str) -> str:
+    with open(_EXAMPLES_PATH) as f:
+        data = json.load(f)
+    examples = data["examples"] if isinstance(data, dict) else data
+    return next(example["review"] for example in examples if fragment in example["review"])
+
+
+def test_call_to_action_on_a_spam_tld_is_flagged_on_its_own():
+    verdict = prefilter_review("Visit buyproductnow.xyz for more!")
+    assert verdict is not None and verdict["source"] == "heuristic"
+    assert verdict["heuristic_signals"] == ["promoted_domain"]
+
+
+@pytest.mark.parametrize("review", [
+    "Great deals, go to dealz.shop today!",
+    "Order from my site bestdeals.online, fast shipping.",
+])
+def test_call_to_action_or_spam_tld_is_strong_evidence(review):
+    scores = score_review(review)
+    assert scores["signals"] == ["promoted_domain"]
+    assert scores["fake_score"] == 0.6
+
+
+def test_the_bank_example_with_a_promoted_domain_is_short_circuited():
+    review = _bank_review("buyproductnow.xyz")
+    assert score_review(review)["fake_score"] >= HEURISTIC_FAKE_THRESHOLD
+    assert prefilter_review(review)["source"] == "heuristic"
+
+
+def test_explicit_links_are_definitive():
+    scores = score_review("I noticed after two weeks it broke, but see https://cheap-deals.example for a fix")
+    assert "external_url" in scores["signals"]
+    assert scores["fake_score"] >= 0.6
+
+
+@pytest.mark.parametrize("review", [
+    "Bought it on amazon.com after my old one broke, works fine but the cord is short.",
+    "Check out amazon.com for the bigger size, mine was too small after 2 washes.",
+    "Ordered from walmart.com, arrived in 3 days.",
+    "My wife runs a blog at ourhomelife.com and I used this mixer for her recipes for 3 months.",
+])
+def test_retailer_and_plain_domain_mentions_are_not_flagged(review):
+    assert prefilter_review(review) is None
+    assert "promoted_domain" not in score_review(review)["signals"]
+
+
+def test_plain_non_retailer_domain_is_a_weak_signal():
+    scores = score_review("Found it cheaper at mystore.com than in shops.")
+    assert scores["signals"] == ["bare_domain"]
+    assert scores["fake_score"] < HEURISTIC_FAKE_THRESHOLD
+
+
+def test_decimals_and_abbreviations_are_not_domains():
+    for review in ("Version 2.0 works, e.g. the app syncs in 1.5 seconds.", "Battery lasts 4.5 hours."):
+        assert score_review(review)["signals"] == []
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from app.services import job_service
+from app.utils.job_store import JOB_COMPLETED, JOB_FAILED, JOB_RUNNING, JobStore, SQLiteJobStore, set_job_store
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch):
+    set_job_store(SQLiteJobStore(":memory:"))
+    monkeypatch.setattr(job_service, "AUTHENTICITY_PACKING", False)
+    yield
+    set_job_store(None)
+
+
+def _wait_until_idle(job_id: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while job_id in job_service._queued_ids:
+        assert time.monotonic() < deadline, "job worker did not finish"
+        time.sleep(0.01)
+
+
+def _crash_first(calls: int):
+    state = {"calls": 0}
+
+    def analyze(items):
+        state["calls"] += 1
+        if state["calls"] <= calls:
+            raise RuntimeError("worker crashed")
+        return [(index, {"authenticity_score": 0.5, "reasoning": "ok"}) for index, _, _ in items]
+    return analyze
+
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+
+def test_poll_resumes_a_job_whose_worker_crashed(monkeypatch):
+    monkeypatch.setattr(job_service, "_analyze_items", _crash_first(1))
+    job = job_service.submit_job(["First review.", "Second review."])
+    _wait_until_idle(job["job_id"])
+    assert job_service.get_job_store().get_job(job["job_id"])["status"] == JOB_RUNNING
+
+    job_service.get_job(job["job_id"])
+    _wait_until_idle(job["job_id"])
+    job = job_service.get_job(job["job_id"])
+    assert job["status"] == JOB_COMPLETED
+    assert job["completed"] == 2
+
+
+def test_job_that_keeps_crashing_is_marked_failed(monkeypatch):
+    monkeypatch.setattr(job_service, "_analyze_items", _crash_first(1000))
+    job_id = job_service.submit_job(["Only review."])["job_id"]
+    for _ in range(job_service.JOB_MAX_CRASHES):
+        _wait_until_idle(job_id)
+        job = job_service.get_job(job_id)
+    _wait_until_idle(job_id)
+    assert job_service.get_job(job_id)["status"] == JOB_FAILED
+
+
+def _throttled_first(calls: int):
+    state = {"calls": 0}
+
+    def analyze(items):
+        state["calls"] += 1
+        if state["calls"] <= calls:
+            return [(index, {"error": "Model capacity is temporarily exhausted.", "retryable": True})
+                    for index, _, _ in items]
+        return [(index, {"authenticity_score": 0.5, "reasoning": "ok"}) for index, _, _ in items]
+    return analyze
+
+
+def test_retryable_errors_are_retried_after_a_backoff(monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_RETRY_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(job_service, "_analyze_items", _throttled_first(2))
+    job_id = job_service.get_job_store().create_job("retry", [("Only review.", None)], 1)["job_id"]
+    job_service.run_job(job_id)
+
+    job = job_service.get_job_store().get_job(job_id)
+    assert (job["status"], job["completed"], job["failed"]) == (JOB_COMPLETED, 1, 0)
+    assert job_service.get_job_store().get_results(job_id, 0, 10)[0]["status"] == "done"
+
+
+def test_retryable_errors_fail_the_item_after_the_last_attempt(monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_RETRY_BACKOFF_SECONDS", 0.0)
+    monkeypatch.setattr(job_service, "_analyze_items", _throttled_first(1000))
+    job_id = job_service.get_job_store().create_job("exhausted", [("Only review.", None)], 1)["job_id"]
+    job_service.run_job(job_id)
+
+    job = job_service.get_job_store().get_job(job_id)
+    assert (job["status"], job["completed"], job["failed"]) == (JOB_COMPLETED, 0, 1)
+    assert job_service.get_job_store().get_results(job_id, 0, 10)[0]["status"] == "error"
+
+
+def test_retryable_results_stay_pending_until_due():
+    store = job_service.get_job_store()
+    store.create_job("due", [("One.", None), ("Two.", None)], 1)
+    store.save_results("due", [(0, {"error": "throttled", "retryable": True}), (1, {"error": "bad output"})],
+                       max_attempts=3, retry_backoff_seconds=60)
+    assert store.pending_items("due", -1, 10) == []
+    assert store.next_retry_at("due") > time.time() + 30
+    assert [item["status"] for item in store.get_results("due", 0, 10)] == ["pending", "error"]
+    assert store.get_job("due")["failed"] == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from app.utils.json_stream import IncrementalJSONExtractor, extract_json_object, extract_json_objects
+
+VERDICT = '{"authenticity_score": 0.7, "reasoning": "Mentions {sizing} and \\"fit\\"."}'
+
+
+def _has_score(candidate):
+    return candidate if isinstance(candidate, dict) and "authenticity_score" in candidate else None
+
+
+def _feed_in_chunks(text, size, validator=None):
+    extractor = IncrementalJSONExtractor(validator)
+    for i in range(0, len(text), size):
+        if extractor.feed(text[i:i + size]) is not None:
+            break
+    return extractor
+
+
+def test_nested_objects():
+    text = 'Reasoning first. {"authenticity_score": 0.4, "signals": {"tone": {"generic": true}}} trailing'
+    extractor = _feed_in_chunks(text, len(text))
+    assert extractor.result == {"authenticity_score": 0.4, "signals": {"tone": {"generic": True}}}
+    assert extractor.reasoning == "Reasoning first. "
+
+
+def test_braces_inside_strings():
+    assert extract_json_object("Verdict: " + VERDICT) == {
+        "authenticity_score": 0.7, "reasoning": 'Mentions {sizing} and "fit".'}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_result_does_not_depend_on_chunk_splits(size):
+    text = "The review is specific. " + VERDICT + " Extra text."
+    extractor = _feed_in_chunks(text, size)
+    assert extractor.result == extract_json_object(text)
+    assert extractor.reasoning == "The review is specific. "
+
+
+def test_invalid_objects_are_skipped_as_reasoning():
+    text = 'It lists {"size": "M"} as an aside. ' + VERDICT
+    extractor = _feed_in_chunks(text, 5, _has_score)
+    assert extractor.result["authenticity_score"] == 0.7
+    assert extractor.reasoning == 'It lists {"size": "M"} as an aside. '
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_unbalanced_brace_in_reasoning_does_not_hide_the_verdict(size):
+    text = "The reviewer wrote a stray { in the middle of the text. " + VERDICT
+    extractor = _feed_in_chunks(text, size, _has_score)
+    assert extractor.result["authenticity_score"] == 0.7
+    assert extractor.reasoning == "The reviewer wrote a stray { in the middle of the text. "
+
+
+def test_unclosed_object_in_reasoning_does_not_hide_a_valid_verdict():
+    text = 'It quotes {"great product" without closing. ' + VERDICT
+    extractor = _feed_in_chunks(text, 3, _has_score)
+    assert extractor.result["authenticity_score"] == 0.7
+    assert extractor.reasoning == 'It quotes {"great product" without closing. '
+
+
+def test_waits_for_the_character_after_a_brace():
+    extractor = IncrementalJSONExtractor()
+    assert extractor.feed("Reasoning {") is None
+    assert extractor.feed(' ') is None
+    assert extractor.feed('"a": 1}') == {"a": 1}
+
+
+def test_extract_json_objects_recovers_items_of_a_truncated_array():
+    text = '[{"index": 0, "score": 0.1}, {"index": 1, "score": {"nested": 1}}, {"index": 2, "sc'
+    assert extract_json_objects(text) == [{"index": 0, "score": 0.1}, {"index": 1, "score": {"nested": 1}}]
@@ -0,0 +1,77 @@
+from app.utils.minhash import MinHashLSHIndex
+
+REVIEW = "The zipper broke after two weeks of daily use and the seller never answered my emails."
+NEAR_DUPLICATE = "The zipper broke after two weeks of daily use and the seller never answered my email."
+UNRELATED = "Runs small, had to size up. Fabric is soft and the color matches the photos."
+VERDICT = {"authenticity_score": 0.9, "reasoning": "Specific, balanced detail."}
+
+
+def _index(**kwargs):
+    return MinHashLSHIndex(num_perm=64, bands=8, **kwargs)
+
+
+def test_add_and_query_near_duplicate_joins_cluster():
+    index = _index()
+    signature = index.signature(REVIEW)
+    first = index.add(signature, "id:R1", VERDICT)
+
+    match = index.query(index.signature(NEAR_DUPLICATE), threshold=0.5)
+    assert match["cluster_id"] == first["cluster_id"]
+    assert match["verdict"] == VERDICT
+
+    second = index.add(index.signature(NEAR_DUPLICATE), "id:R2", None, match)
+    assert second == {"cluster_id": first["cluster_id"], "cluster_size": 2}
+    assert index.query(index.signature(UNRELATED), threshold=0.5) is None
+
+
+def test_re_adding_a_member_does_not_grow_its_cluster():
+    index = _index()
+    signature = index.signature(REVIEW)
+    index.add(signature, "id:R1", VERDICT)
+    cluster = index.add(signature, "id:R1", VERDICT, index.query(signature, threshold=0.8))
+    assert cluster["cluster_size"] == 1
+    assert len(index) == 1
+
+
+def test_distinct_members_with_identical_text_grow_the_cluster():
+    index = _index()
+    signature = index.signature(REVIEW)
+    for n in range(6):
+        cluster = index.add(signature, f"submission:{n}", VERDICT, index.query(signature, threshold=0.8))
+    assert cluster["cluster_size"] == 6
+
+
+def test_oldest_entry_is_evicted_once_the_ring_is_full():
+    index = _index(max_entries=2)
+    first = index.add(index.signature(REVIEW), "id:R1", VERDICT)
+    index.add(index.signature(UNRELATED), "id:R2")
+    index.add(index.signature("Battery lasts about a day, charger feels flimsy."), "id:R3")
+
+    assert len(index) == 2
+    assert index.query(index.signature(REVIEW), threshold=0.8) is None
+    assert index.query(index.signature(UNRELATED), threshold=0.8) is not None
+    # The evicted member's cluster is gone along with its verdict, so the key can rejoin fresh.
+    rejoined = index.add(index.signature(REVIEW), "id:R1", VERDICT)
+    assert rejoined["cluster_id"] != first["cluster_id"]
+    assert rejoined["cluster_size"] == 1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _index()
+    signature = index.signature(REVIEW)
+    first = index.add(signature, "id:R1", VERDICT)
+    index.add(signature, "id:R2", None, index.query(signature, threshold=0.8))
+    index.add(index.signature(UNRELATED), "id:R3")
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = MinHashLSHIndex.load(path)
+
+    assert len(loaded) == 3
+    match = loaded.query(loaded.signature(NEAR_DUPLICATE), threshold=0.5)
+    assert match["cluster_id"] == first["cluster_id"]
+    assert match["cluster_size"] == 2
+    assert match["verdict"] == VERDICT
+    # Known members are still recognized, and new clusters don't reuse old ids.
+    assert loaded.add(signature, "id:R1")["cluster_size"] == 2
+    assert loaded.add(loaded.signature("Arrived late."), "id:R4")["cluster_id"] > first["cluster_id"]
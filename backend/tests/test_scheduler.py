@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils import scheduler
+from app.utils.scheduler import (
+    BEDROCK_RATE_DECREASE, BEDROCK_RATE_INCREASE, LANE_BATCH, LANE_INTERACTIVE, AdaptiveRateLimiter,
+    SchedulerDeadlineExceeded, lane,
+)
+
+
+def _enqueue(limiter, lane_name, deadline=None):
+    with lane(lane_name, deadline):
+        return limiter._enqueue()
+
+
+def test_unthrottled_calls_are_not_limited():
+    limiter = AdaptiveRateLimiter("model", burst=1)
+    started = time.monotonic()
+    for _ in range(200):
+        limiter.acquire()
+        limiter.on_success()
+    assert time.monotonic() - started < 0.5
+    assert not limiter.limited
+
+
+def test_first_throttle_starts_aimd_from_the_observed_rate():
+    limiter = AdaptiveRateLimiter("model", min_rate=0.5, max_rate=1000)
+    for _ in range(40):
+        limiter.acquire()
+    limiter.on_throttle()
+    assert limiter.limited
+    assert limiter.rate == pytest.approx(40 * BEDROCK_RATE_DECREASE)
+
+
+def test_aimd_increases_additively_and_decreases_multiplicatively(monkeypatch):
+    limiter = AdaptiveRateLimiter("model", rate=10, min_rate=1, max_rate=20)
+    # A second's worth of successes at 10 calls/s adds about BEDROCK_RATE_INCREASE, not 10 times it.
+    for _ in range(10):
+        limiter.on_success()
+    increased = limiter.rate
+    assert increased == pytest.approx(10 + BEDROCK_RATE_INCREASE, rel=0.01)
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(increased * BEDROCK_RATE_DECREASE)
+    # Signals within the decrease interval belong to the same congestion event.
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(increased * BEDROCK_RATE_DECREASE)
+    # A retried call counts as a throttling signal, and the rate never leaves its bounds.
+    monkeypatch.setattr(scheduler, "BEDROCK_RATE_DECREASE_INTERVAL_SECONDS", 0.0)
+    for _ in range(10):
+        limiter.on_success(retried=True)
+    assert limiter.rate == 1
+    for _ in range(200):
+        limiter.on_success()
+    assert limiter.rate == 20
+
+
+def test_poll_serves_interactive_before_queued_batch_calls():
+    limiter = AdaptiveRateLimiter("model", rate=1, burst=1)
+    batch_ticket, _, _, _ = _enqueue(limiter, LANE_BATCH)
+    interactive_ticket, _, _, _ = _enqueue(limiter, LANE_INTERACTIVE)
+
+    # One token is available: it goes to the interactive caller even though batch queued first.
+    assert limiter._poll(batch_ticket, LANE_BATCH, None) is not None
+    assert limiter._poll(interactive_ticket, LANE_INTERACTIVE, None) is None
+    limiter._dequeue(interactive_ticket, LANE_INTERACTIVE, time.monotonic())
+    assert limiter.get_stats()["waiting"] == {LANE_INTERACTIVE: 0, LANE_BATCH: 1}
+
+
+def test_poll_is_fifo_within_a_lane():
+    limiter = AdaptiveRateLimiter("model", rate=1, burst=1)
+    first, _, _, _ = _enqueue(limiter, LANE_BATCH)
+    second, _, _, _ = _enqueue(limiter, LANE_BATCH)
+    assert limiter._poll(second, LANE_BATCH, None) is not None
+    assert limiter._poll(first, LANE_BATCH, None) is None
+
+
+def test_poll_rejects_a_call_that_cannot_start_before_its_deadline():
+    limiter = AdaptiveRateLimiter("model", rate=1, burst=1)
+    limiter.acquire()
+    ticket, lane_name, deadline, _ = _enqueue(limiter, LANE_INTERACTIVE, time.monotonic() + 0.1)
+    with pytest.raises(SchedulerDeadlineExceeded):
+        limiter._poll(ticket, lane_name, deadline)
+
+
+def test_interactive_deadline_is_shared_across_calls():
+    limiter = AdaptiveRateLimiter("model", rate=5, burst=1)
+
+    async def request():
+        with lane(LANE_INTERACTIVE, time.monotonic() + 0.3):
+            for _ in range(10):
+                await limiter.aacquire()
+
+    # Each call alone fits the budget; together they can't, so a later call fails fast.
+    with pytest.raises(SchedulerDeadlineExceeded):
+        asyncio.run(request())
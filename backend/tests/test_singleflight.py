@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.scheduler import LANE_BATCH, LANE_INTERACTIVE, lane
+from app.utils.singleflight import SingleFlight
+
+
+def _blocking_call(release: threading.Event, result="shared"):
+    calls = []
+
+    def call(tag):
+        calls.append(tag)
+        if tag == "leader":
+            assert release.wait(5)
+            if isinstance(result, Exception):
+                raise result
+        return result if tag == "leader" else f"own:{tag}"
+    return call, calls
+
+
+def _start_leader(flight, call):
+    executor = ThreadPoolExecutor(max_workers=1)
+    leader = executor.submit(flight.do, "key", call, "leader")
+    deadline = time.monotonic() + 5
+    while flight.get_stats()["in_flight"] == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return executor, leader
+
+
+def test_followers_share_the_leaders_result():
+    release = threading.Event()
+    flight = SingleFlight("test")
+    call, calls = _blocking_call(release)
+    executor, leader = _start_leader(flight, call)
+    with ThreadPoolExecutor(max_workers=3) as followers:
+        results = [followers.submit(flight.do, "key", call, "follower") for _ in range(3)]
+        time.sleep(0.05)
+        release.set()
+        assert [future.result() for future in results] == ["shared"] * 3
+    assert leader.result() == "shared"
+    assert calls == ["leader"]
+    assert flight.get_stats()["coalesced"] == 3
+    executor.shutdown()
+
+
+def test_leader_failure_reaches_its_followers():
+    release = threading.Event()
+    flight = SingleFlight("test")
+    call, calls = _blocking_call(release, result=RuntimeError("model down"))
+    executor, leader = _start_leader(flight, call)
+    with ThreadPoolExecutor(max_workers=1) as followers:
+        follower = followers.submit(flight.do, "key", call, "follower")
+        time.sleep(0.05)
+        release.set()
+        with pytest.raises(RuntimeError, match="model down"):
+            follower.result()
+    with pytest.raises(RuntimeError):
+        leader.result()
+    assert calls == ["leader"]
+    executor.shutdown()
+
+
+def test_follower_runs_the_call_itself_once_its_deadline_passes():
+    release = threading.Event()
+    flight = SingleFlight("test")
+    call, calls = _blocking_call(release)
+    executor, leader = _start_leader(flight, call)
+    started = time.monotonic()
+    with lane(LANE_INTERACTIVE, time.monotonic() + 0.05):
+        assert flight.do("key", call, "follower") == "own:follower"
+    assert time.monotonic() - started < 1
+    release.set()
+    assert leader.result() == "shared"
+    assert calls == ["leader", "follower"]
+    executor.shutdown()
+
+
+def test_unshareable_results_are_not_inherited():
+    release = threading.Event()
+    flight = SingleFlight("test", shareable=lambda result: result != "shared")
+    call, calls = _blocking_call(release)
+    executor, _ = _start_leader(flight, call)
+    with ThreadPoolExecutor(max_workers=1) as followers:
+        follower = followers.submit(flight.do, "key", call, "follower")
+        time.sleep(0.05)
+        release.set()
+        assert follower.result() == "own:follower"
+    executor.shutdown()
+
+
+def test_async_follower_is_bounded_by_its_deadline():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def call(tag, seconds):
+        calls.append(tag)
+        await asyncio.sleep(seconds)
+        return tag
+
+    async def follow():
+        with lane(LANE_INTERACTIVE, time.monotonic() + 0.05):
+            return await flight.ado("key", call, "follower", 0)
+
+    async def main():
+        with lane(LANE_BATCH):
+            leader = asyncio.ensure_future(flight.ado("key", call, "leader", 0.5))
+        await asyncio.sleep(0)
+        shared = asyncio.ensure_future(flight.ado("key", call, "unused", 0))
+        assert await follow() == "follower"
+        assert await leader == "leader"
+        assert await shared == "leader"
+
+    asyncio.run(main())
+    assert calls == ["leader", "follower"]
@@ -34,7 +34,7 @@ class AuraAiStack(Stack): # Keep your existing stack definition
 
         # Grant Bedrock permissions to the Backend Lambda's execution role
         backend_lambda.add_to_role_policy(iam.PolicyStatement(
-            actions=["bedrock:InvokeModel"],
+            actions=["bedrock:InvokeModel", "bedrock:InvokeModelWithResponseStream"],
             resources=["*"]
         ))
 